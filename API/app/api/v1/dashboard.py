@@ -1,120 +1,403 @@
-from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, UploadFile, File, Form, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import ValidationError
+import pyarrow as pa
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 import pandas as pd
 from ...database import get_db
-from ...models import GenerateDashboardRequest, AIModelEnum, DownloadDashboardRequest, TableData, CreateGitHubRepoRequest
-from ...services.llm_models import ClaudeClient, OpenAIClient 
-from ...services.utils import generate_data_description, clean_dashboard_code, fake_code
+from ...models import GenerateDashboardRequest, AIModelEnum, DownloadDashboardRequest, TableData, CreateGitHubRepoRequest, EditDashboardRequest
+from ...services.data_loader import read_uploaded_file, read_columnar_table, table_data_to_dataframe, is_columnar_upload, persist_upload
 from ...services.project_setup import organize_project, cleanup_project
-from ...services.state_manager import get_dashboard_code, store_dashboard_code, get_table_data
+from ...services.state_manager import get_dashboard_code, get_table_data
+from ...services.dataset_registry import register_dataset, register_dataset_file, get_dataset
+from ...services.generation import (
+    generate_dashboard as run_generation, stream_dashboard, get_profile, edit_dashboard as run_edit, InvalidDashboardCode,
+    ensure_smoke_test_available
+)
+from ...services.smoke_testing import SmokeTestUnavailableError
+from ...services.dashboard_edit import DashboardEditError
+from ...services.llm_scheduler import LLMUnavailableError
+from ...services.client_disconnect import ClientDisconnected, run_until_disconnected, stream_until_disconnected
+from ...services.generation_jobs import job_runner, job_store, JobQueueFullError, JOB_DONE, JOB_FAILED
 from ...services.github import generate_dashboard_files
 from ...services.github_service import GitHubService
 from ...core.config import settings
 import logging
+import json
+from typing import Optional
 import os
 
 logger = logging.getLogger(__name__)
 
 dashboard_router = APIRouter()
 
+async def _read_table_request(request: Request, model_cls):
+    """
+    Lê o corpo da requisição como JSON (`TableData` linha a linha) ou como multipart/form-data,
+    com a tabela em Arrow IPC ou Parquet no campo `table` e os demais campos como formulário.
+
+    Retorna o modelo validado e o DataFrame decodificado (None no caso JSON).
+    """
+    content_type = request.headers.get("content-type", "")
+    try:
+        if content_type.startswith("multipart/form-data"):
+            form = await request.form()
+            table = form.get("table")
+            if table is None or isinstance(table, str):
+                raise HTTPException(status_code=422, detail="Campo 'table' (Arrow IPC ou Parquet) ausente.")
+            try:
+                frame = await run_in_threadpool(read_columnar_table, table.file)
+            except (pa.ArrowInvalid, OSError, ValueError) as e:
+                # Corpo truncado ou que não é Arrow IPC / Parquet, como um CSV/XLSX ilegível
+                raise HTTPException(status_code=400, detail=f"Tabela colunar inválida: {e}")
+            fields = {key: value for key, value in form.items() if key != "table"}
+            return model_cls.model_validate(fields), frame
+        return model_cls.model_validate_json(await request.body()), None
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+
+async def generate_dashboard_body(request: Request):
+    return await _read_table_request(request, GenerateDashboardRequest)
+
+async def create_github_repo_body(request: Request):
+    return await _read_table_request(request, CreateGitHubRepoRequest)
+
+def _requester_id(request: Request) -> str:
+    # Identifica o usuário na fila justa do agendador de LLM: cabeçalho X-User-Id ou IP
+    return request.headers.get("x-user-id") or (request.client.host if request.client else "anonymous")
+
+def _llm_unavailable(e: LLMUnavailableError) -> HTTPException:
+    headers = {"Retry-After": str(max(1, round(e.retry_after)))} if e.retry_after else None
+    return HTTPException(status_code=e.status_code, detail=str(e), headers=headers)
+
+def _client_disconnected(e: ClientDisconnected) -> HTTPException:
+    # 499 (Client Closed Request): ninguém recebe esta resposta, mas fica registrada nos logs de acesso
+    return HTTPException(status_code=499, detail=str(e))
+
+def _resolve_dataset(frame, dataset_id, table_data):
+    """
+    Obtém os dados da requisição: tabela colunar já decodificada, dataset registrado
+    (dataset_id) ou `TableData` inline, nessa ordem de preferência.
+
+    Retorna um DataFrame ou, para datasets processados em streaming, o caminho do arquivo.
+    """
+    if frame is not None:
+        return frame
+    if dataset_id:
+        df = get_dataset(dataset_id)
+        if df is None:
+            raise HTTPException(status_code=404, detail="Dataset not found or has expired.")
+        return df
+    if table_data is not None:
+        # Validação do número de colunas e conversão para DataFrame
+        return table_data_to_dataframe(table_data)
+    raise ValueError("Informe table_data, dataset_id ou uma tabela em formato colunar.")
+
 @dashboard_router.post("/generate-dashboard", response_model=dict)
-def generate_dashboard(request: GenerateDashboardRequest, db: Session = Depends(get_db)):
+async def generate_dashboard(http_request: Request, body=Depends(generate_dashboard_body), db: Session = Depends(get_db)):
     try:
+        request, frame = body
         table_data = request.table_data
         model_choice = request.model
-        logger.info(f"Received data: columns={len(table_data.columns)}, data_length={len(table_data.data)}, model={model_choice}")
-        
-        # Validação do número de colunas
-        row_lengths = [len(row) for row in table_data.data]
-        if len(set(row_lengths)) > 1:
-            raise ValueError(f"Inconsistent number of columns in rows. Found lengths: {set(row_lengths)}")
-        
-        if len(table_data.columns) != row_lengths[0]:
-            raise ValueError(f"Mismatch between number of columns ({len(table_data.columns)}) and data ({row_lengths[0]})")
-        
-        # Conversão para DataFrame
-        df = pd.DataFrame(table_data.data, columns=table_data.columns)
-        logger.info(f"Created DataFrame with shape: {df.shape}")
-        
-        # Amostragem se necessário
-        if len(df) > 1000:
-            sample_size = min(500, int(len(df) * 0.2))
-            df_sample = df.sample(n=sample_size, random_state=42)
-            is_sample = True
-        else:
-            df_sample = df
-            is_sample = False
-        
-        logger.info(f"Using {'sampled' if is_sample else 'full'} data with shape: {df_sample.shape}")
-        
-        # Geração da descrição dos dados
-        data_description = generate_data_description(df)
-        logger.info("Generated data description")
-        
-        # Criação do prompt
-        prompt = f"""
-        Você é um desenvolvedor Python especialista em visualização de dados e dashboards com Streamlit.
-        Com base na seguinte descrição dos dados, gere um código completo e executável para um dashboard em Streamlit:
-
-        {data_description}
-
-        Dados{' (nota: esta é uma amostra do dataset completo)' if is_sample else ''}:
-        ```csv
-        {df_sample.to_csv(index=False)}
-        ```
-
-        O código deve:
-        1. Importar as bibliotecas necessárias (pandas, streamlit, plotly, etc.)
-        2. Carregar os dados (assuma que estão salvos como 'data.csv')
-        3. Criar visualizações apropriadas com base nos tipos de dados e possíveis relacionamentos
-        4. Organizar as visualizações em um layout claro e amigável no Streamlit
-        5. Incluir qualquer processamento ou transformação de dados necessária
-        6. Adicionar elementos interativos onde apropriado (por exemplo, dropdowns para selecionar colunas a serem visualizadas)
-        7. Garantir que o código esteja completo e possa ser executado diretamente pelo usuário
-        8. Se a descrição for baseada em uma amostra, incluir código para lidar com possíveis diferenças no dataset completo
-
-        Forneça apenas o código Python sem explicações adicionais.
-        """
-        
-        logger.info("Prompt criado para geração do dashboard")
-        logger.info("Descricao dos Dados: \n" + data_description)
-        logger.debug(f"Prompt: {prompt}")
-        
-        # Instanciar o cliente de IA apropriado
-        if model_choice == AIModelEnum.CLAUDE:
-            client = ClaudeClient()
-            logger.info("Usando ClaudeClient para gerar o código do dashboard")
-        elif model_choice == AIModelEnum.OPENAI:
-            client = OpenAIClient()
-            logger.info("Usando OpenAIClient para gerar o código do dashboard")
+
+        if frame is not None:
+            logger.info(f"Received columnar data: shape={frame.shape}, model={model_choice}")
+        elif request.dataset_id:
+            logger.info(f"Received dataset_id={request.dataset_id}, model={model_choice}")
+        elif table_data is not None:
+            logger.info(f"Received data: columns={len(table_data.columns)}, data_length={len(table_data.data)}, model={model_choice}")
+
+        # Conversão e hash do dataset são CPU-bound: rodam fora do event loop
+        df = await run_in_threadpool(_resolve_dataset, frame, request.dataset_id, table_data)
+        dataset_id = request.dataset_id or await run_in_threadpool(register_dataset, df)
+
+        # Se o cliente desconectar, a geração (e a chamada ao LLM) é cancelada
+        return await run_until_disconnected(http_request, run_generation(
+            df, model_choice, dataset_id,
+            use_cache=not request.bypass_cache,
+            user=_requester_id(http_request),
+            hedge=request.hedge,
+            hedge_delay=request.hedge_delay,
+            deadline=request.deadline,
+            sectioned=request.sectioned,
+            smoke_test=request.smoke_test
+        ))
+    except HTTPException as he:
+        logger.exception("Erro em generate_dashboard")
+        raise he
+    except ClientDisconnected as e:
+        raise _client_disconnected(e)
+    except InvalidDashboardCode as e:
+        logger.warning(f"Erro em generate_dashboard: {e}")
+        raise HTTPException(status_code=422, detail=str(e))
+    except LLMUnavailableError as e:
+        logger.warning(f"Erro em generate_dashboard: {e}")
+        raise _llm_unavailable(e)
+    except SmokeTestUnavailableError as e:
+        logger.warning(f"Erro em generate_dashboard: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.exception("Erro em generate_dashboard")
+        raise HTTPException(status_code=400, detail=str(e))
+
+@dashboard_router.post("/generate-dashboard/jobs", response_model=dict, status_code=202)
+async def create_generation_job(http_request: Request, body=Depends(generate_dashboard_body), db: Session = Depends(get_db)):
+    """
+    Variante assíncrona do /generate-dashboard: enfileira a geração e retorna o job_id
+    imediatamente. O andamento é consultado em /generate-dashboard/jobs/{job_id}.
+    """
+    try:
+        request, frame = body
+        logger.info(f"Received generation job: dataset_id={request.dataset_id}, model={request.model}")
+
+        # O job falharia só depois da fila: o sandbox indisponível é informado já na criação
+        await ensure_smoke_test_available(request.smoke_test)
+        df = await run_in_threadpool(_resolve_dataset, frame, request.dataset_id, request.table_data)
+        dataset_id = request.dataset_id or await run_in_threadpool(register_dataset, df)
+
+        job_id = await job_runner.submit(df, dataset_id, {
+            "model": request.model.value,
+            "use_cache": not request.bypass_cache,
+            "user": _requester_id(http_request),
+            "hedge": request.hedge,
+            "hedge_delay": request.hedge_delay,
+            "deadline": request.deadline,
+            "sectioned": request.sectioned,
+            "smoke_test": request.smoke_test,
+        })
+        logger.info(f"Job de geração criado: {job_id}")
+        return {"job_id": job_id, "dataset_id": dataset_id, "status": "queued"}
+    except HTTPException as he:
+        logger.exception("Erro em create_generation_job")
+        raise he
+    except (JobQueueFullError, SmokeTestUnavailableError) as e:
+        logger.warning(f"Erro em create_generation_job: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.exception("Erro em create_generation_job")
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _get_job_or_404(job_id: str) -> dict:
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or has expired.")
+    return job
+
+@dashboard_router.get("/generate-dashboard/jobs/{job_id}", response_model=dict)
+def get_generation_job(job_id: str):
+    job = _get_job_or_404(job_id)
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "dataset_id": job["dataset_id"],
+        "model": job["params"]["model"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "error": job["error"]
+    }
+
+@dashboard_router.get("/generate-dashboard/jobs/{job_id}/result", response_model=dict)
+def get_generation_job_result(job_id: str):
+    """
+    Resultado de um job concluído, no mesmo formato do /generate-dashboard. Jobs com falha
+    retornam o status HTTP do erro original; jobs ainda em andamento retornam 409.
+    """
+    job = _get_job_or_404(job_id)
+    if job["status"] == JOB_DONE:
+        return job["result"]
+    if job["status"] == JOB_FAILED:
+        raise HTTPException(status_code=job["error_status"] or 400, detail=job["error"])
+    raise HTTPException(status_code=409, detail=f"Job ainda não concluído (status: {job['status']}).")
+
+def _sse_event(event: str, data: dict) -> str:
+    # Formato Server-Sent Events; o JSON em uma única linha preserva quebras de linha do código
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@dashboard_router.post("/generate-dashboard/stream")
+async def generate_dashboard_stream(http_request: Request, body=Depends(generate_dashboard_body), db: Session = Depends(get_db)):
+    """
+    Variante do /generate-dashboard que envia o código por SSE à medida que o modelo o gera.
+
+    Eventos: `delta` ({"text": ...}, trechos já sem as cercas markdown), `replace`
+    ({"text": ...}, código final quando a validação o corrigiu), `done`
+    ({"unique_id", "dataset_id", "validation"}, após o código ser armazenado) e `error` ({"detail"}).
+    Erros nos dados da requisição são retornados antes do início do stream, com o status HTTP usual.
+    Se o cliente desconectar, o stream do provedor é interrompido e nada é armazenado.
+    """
+    try:
+        request, frame = body
+        logger.info(f"Received streaming generation request: dataset_id={request.dataset_id}, model={request.model}")
+
+        df = await run_in_threadpool(_resolve_dataset, frame, request.dataset_id, request.table_data)
+        dataset_id = request.dataset_id or await run_in_threadpool(register_dataset, df)
+    except HTTPException as he:
+        logger.exception("Erro em generate_dashboard_stream")
+        raise he
+    except Exception as e:
+        logger.exception("Erro em generate_dashboard_stream")
+        raise HTTPException(status_code=400, detail=str(e))
+
+    async def events():
+        try:
+            async for item in stream_until_disconnected(http_request, stream_dashboard(
+                df, request.model, dataset_id,
+                use_cache=not request.bypass_cache,
+                user=_requester_id(http_request)
+            )):
+                yield _sse_event(item["event"], item["data"])
+        except ClientDisconnected:
+            return
+        except LLMUnavailableError as e:
+            logger.warning(f"Erro durante o streaming do dashboard: {e}")
+            yield _sse_event("error", {"detail": str(e), "status_code": e.status_code, "retry_after": e.retry_after})
+        except InvalidDashboardCode as e:
+            logger.warning(f"Código inválido no streaming do dashboard: {e}")
+            yield _sse_event("error", {"detail": str(e), "status_code": 422})
+        except Exception as e:
+            # Com o stream já iniciado, o erro só pode ser comunicado como evento
+            logger.exception("Erro durante o streaming do dashboard")
+            yield _sse_event("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+def _register_upload(file: UploadFile):
+    """
+    Lê e registra o arquivo enviado, retornando (dataset_id, dados).
+
+    Arquivos acima de STREAMING_UPLOAD_MIN_BYTES são copiados para disco e perfilados
+    em streaming, com memória limitada; os demais viram um DataFrame.
+    """
+    if file.size is not None and file.size > settings.MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Arquivo excede o limite de {settings.MAX_UPLOAD_BYTES} bytes.")
+
+    if file.size is not None and file.size > settings.STREAMING_UPLOAD_MIN_BYTES and not is_columnar_upload(file.filename, file.content_type):
+        path, dataset_id = persist_upload(file.file, file.filename, settings.DATASET_STORAGE_DIR)
+        if get_dataset(dataset_id) is None:
+            get_profile(path, dataset_id)
+            register_dataset_file(dataset_id, path)
+        logger.info(f"Upload grande processado em streaming: {path}")
+        return dataset_id, path
+
+    # O arquivo é lido em blocos diretamente do upload (spool em disco), sem passar por JSON
+    df = read_uploaded_file(file.file, file.filename)
+    return register_dataset(df), df
+
+@dashboard_router.post("/datasets", response_model=dict)
+def upload_dataset(file: UploadFile = File(...)):
+    try:
+        logger.info(f"Received dataset upload: filename={file.filename}, size={file.size}")
+        dataset_id, source = _register_upload(file)
+        logger.info(f"Dataset registrado com dataset_id: {dataset_id}")
+
+        if isinstance(source, str):
+            # Dataset em disco: linhas e colunas vêm do perfil calculado em streaming
+            profile = get_profile(source, dataset_id)
+            rows, columns = profile.total_rows, profile.sample_pool.columns
         else:
-            raise ValueError(f"Escolha de modelo não suportada: {model_choice}")
-        
-        # Chamar o cliente de IA para gerar o código do dashboard
-        #dashboard_code = fake_code()
-        dashboard_code = client.generate_response(prompt)
-        dashboard_code = clean_dashboard_code(dashboard_code)
-        logger.info("Dashboard code gerado com sucesso")
-         
-        # Armazenar o código gerado e obter um UUID
-        unique_id = store_dashboard_code(dashboard_code, preview_data=table_data)
-        logger.info(f"Dashboard code armazenado com UUID: {unique_id}")
-
-        # Certificar-se de que o diretório 'prompts' existe
-        os.makedirs('prompts', exist_ok=True)
-        
-        # Armazenar prompt num .txt
-        with open(f"prompts/{unique_id}.txt", "w") as f:
-            f.write(prompt)
-        
-        # Retornar o código e o UUID para o frontend
+            rows, columns = len(source), source.columns
+
         return {
-            "unique_id": unique_id,
-            "dashboard_code": dashboard_code
+            "dataset_id": dataset_id,
+            "rows": rows,
+            "columns": [str(col) for col in columns]
         }
+    except HTTPException as he:
+        logger.exception("Erro em upload_dataset")
+        raise he
     except Exception as e:
-        logger.exception("Erro em generate_dashboard")
+        logger.exception("Erro em upload_dataset")
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        file.file.close()
+
+@dashboard_router.post("/generate-dashboard/upload", response_model=dict)
+async def generate_dashboard_from_upload(
+    http_request: Request,
+    file: UploadFile = File(...),
+    model: AIModelEnum = Form(AIModelEnum.CLAUDE),
+    bypass_cache: bool = Form(False),
+    hedge: bool = Form(False),
+    hedge_delay: Optional[float] = Form(None),
+    deadline: Optional[float] = Form(None),
+    sectioned: bool = Form(False),
+    smoke_test: Optional[bool] = Form(None),
+    db: Session = Depends(get_db)
+):
+    try:
+        logger.info(f"Received upload: filename={file.filename}, size={file.size}, model={model}")
+        dataset_id, source = await run_in_threadpool(_register_upload, file)
+
+        return await run_until_disconnected(http_request, run_generation(
+            source, model, dataset_id,
+            use_cache=not bypass_cache,
+            user=_requester_id(http_request),
+            hedge=hedge,
+            hedge_delay=hedge_delay,
+            deadline=deadline,
+            sectioned=sectioned,
+            smoke_test=smoke_test
+        ))
+    except HTTPException as he:
+        logger.exception("Erro em generate_dashboard_from_upload")
+        raise he
+    except ClientDisconnected as e:
+        raise _client_disconnected(e)
+    except InvalidDashboardCode as e:
+        logger.warning(f"Erro em generate_dashboard_from_upload: {e}")
+        raise HTTPException(status_code=422, detail=str(e))
+    except LLMUnavailableError as e:
+        logger.warning(f"Erro em generate_dashboard_from_upload: {e}")
+        raise _llm_unavailable(e)
+    except SmokeTestUnavailableError as e:
+        logger.warning(f"Erro em generate_dashboard_from_upload: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.exception("Erro em generate_dashboard_from_upload")
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        file.file.close()
+
+@dashboard_router.post("/edit-dashboard", response_model=dict)
+async def edit_dashboard(http_request: Request, request: EditDashboardRequest):
+    """
+    Altera um dashboard já gerado sem reenviar o dataset: o modelo recebe o código e o
+    pedido e devolve só as mudanças, aplicadas e armazenadas como nova versão (novo
+    unique_id; o anterior continua disponível até expirar).
+    """
+    try:
+        logger.info(f"Request to edit dashboard {request.unique_id}, model={request.model}")
+        if get_dashboard_code(request.unique_id) is None:
+            raise HTTPException(status_code=404, detail="Dashboard not found or has expired.")
+        return await run_until_disconnected(http_request, run_edit(
+            request.unique_id, request.instruction, request.model,
+            use_cache=not request.bypass_cache,
+            user=_requester_id(http_request),
+            smoke_test=request.smoke_test
+        ))
+    except HTTPException as he:
+        logger.exception("Erro em edit_dashboard")
+        raise he
+    except DashboardEditError as e:
+        logger.warning(f"Erro em edit_dashboard: {e}")
+        raise HTTPException(status_code=422, detail=str(e))
+    except ClientDisconnected as e:
+        raise _client_disconnected(e)
+    except LLMUnavailableError as e:
+        logger.warning(f"Erro em edit_dashboard: {e}")
+        raise _llm_unavailable(e)
+    except SmokeTestUnavailableError as e:
+        logger.warning(f"Erro em edit_dashboard: {e}")
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        logger.exception("Erro em edit_dashboard")
         raise HTTPException(status_code=400, detail=str(e))
 
 @dashboard_router.post("/download-dashboard")
@@ -134,11 +417,11 @@ def download_dashboard(
         
         # Recuperar os dados associados ao unique_id
         table_data = get_table_data(unique_id)
-        if not table_data:
+        if table_data is None:
             raise HTTPException(status_code=404, detail="Table data not found for the provided unique_id.")
         
-         # Garantir que table_data é um objeto TableData
-        if not isinstance(table_data, TableData):
+         # Garantir que table_data é um objeto TableData (ou um DataFrame / arquivo vindo de upload)
+        if isinstance(table_data, dict):
             table_data = TableData(columns=table_data['columns'], data=table_data['data'])
         
         # Definir arquivos adicionais
@@ -177,8 +460,14 @@ def download_dashboard(
 
 
 @dashboard_router.post("/create-github-repo")
-def create_github_repo(request: CreateGitHubRepoRequest, db: Session = Depends(get_db)):
+def create_github_repo(body=Depends(create_github_repo_body), db: Session = Depends(get_db)):
     try:
+        request, frame = body
+        try:
+            table_data = _resolve_dataset(frame, request.dataset_id, request.table_data)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
         github_service = GitHubService(request.access_token)
         repo_info = github_service.create_repo_with_installation_check(request.repo_name, request.description)
         
@@ -190,7 +479,7 @@ def create_github_repo(request: CreateGitHubRepoRequest, db: Session = Depends(g
                 "installation_url": repo_info["installation_url"]
             }
         
-        dashboard_files = generate_dashboard_files(request.table_data, request.generated_code)
+        dashboard_files = generate_dashboard_files(table_data, request.generated_code)
 
         # Commit files to the new repository
         commit_result = github_service.create_commit(
@@ -206,6 +495,9 @@ def create_github_repo(request: CreateGitHubRepoRequest, db: Session = Depends(g
             "repo_url": repo_info["html_url"],
             "commit_result": commit_result
         }
+    except HTTPException as he:
+        logger.exception("Error in create_github_repo")
+        raise he
     except Exception as e:
         logger.exception("Error in create_github_repo")
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
@@ -0,0 +1,8 @@
+from fastapi import APIRouter
+from ...services import metrics
+
+metrics_router = APIRouter()
+
+@metrics_router.get("/metrics", response_model=dict)
+def read_metrics():
+    return metrics.snapshot()
@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 import os
+from typing import Optional
 
 class Settings(BaseSettings):
     APP_NAME: str = "AutoDash API"
@@ -16,6 +17,76 @@ class Settings(BaseSettings):
     GH_CLIENT_SECRET: str
     GH_APP_NAME: str
     GH_APP_ID: int
+    UPLOAD_CHUNK_ROWS: int = 100_000
+    MAX_UPLOAD_BYTES: int = 1024 * 1024 * 1024
+    STREAMING_UPLOAD_MIN_BYTES: int = 256 * 1024 * 1024
+    DATASET_STORAGE_DIR: str = "datasets"
+    # None = automático, a partir dos núcleos e da memória disponíveis (ver profiler.profile_workers)
+    PROFILE_WORKERS: Optional[int] = None
+    # Limite do bloco em memória compartilhada (/dev/shm) do perfilamento paralelo
+    PROFILE_SHM_BLOCK_BYTES: int = 128 * 1024 * 1024
+    PROFILE_PARALLEL_MIN_COLUMNS: int = 500
+    CORRELATION_TOP_K: int = 10
+    CORRELATION_SAMPLE_ROWS: int = 100_000
+    PROFILE_CACHE_MAX_ENTRIES: int = 128
+    PROFILE_CACHE_MAX_BYTES: int = 256 * 1024 * 1024
+    PROMPT_TOKEN_BUDGET_CLAUDE: int = 30_000
+    PROMPT_TOKEN_BUDGET_OPENAI: int = 30_000
+    PROMPT_MAX_SAMPLE_ROWS: int = 1000
+    PROMPT_MIN_SAMPLE_ROWS: int = 10
+    PROMPT_MAX_CELL_CHARS: int = 100
+    LLM_MODEL_CLAUDE: str = "claude-3-5-sonnet-20240620"
+    LLM_MODEL_OPENAI: str = "o1-mini"
+    LLM_MAX_TOKENS_CLAUDE: int = 8000
+    LLM_MAX_TOKENS_OPENAI: Optional[int] = None
+    LLM_FALLBACK_MODEL_CLAUDE: str = "claude-3-haiku-20240307"
+    LLM_FALLBACK_MODEL_OPENAI: str = "gpt-4o-mini"
+    LLM_FALLBACK_MAX_TOKENS: int = 4000
+    LLM_FALLBACK_PROMPT_TOKEN_BUDGET: int = 8_000
+    # Prazo padrão das gerações síncronas; 0 = sem prazo (o prazo é pedido por requisição)
+    LLM_DEADLINE_SECONDS: float = 0.0
+    LLM_FALLBACK_TIMEOUT_SECONDS: float = 60.0
+    LLM_HTTP_MAX_CONNECTIONS: int = 200
+    LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 50
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = 60.0
+    LLM_HTTP_CONNECT_TIMEOUT: float = 10.0
+    LLM_HTTP_TIMEOUT: float = 600.0
+    LLM_CACHE_PATH: str = "cache/llm_responses.sqlite3"
+    LLM_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    LLM_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    LLM_MAX_CONCURRENCY_CLAUDE: int = 16
+    LLM_MAX_CONCURRENCY_OPENAI: int = 16
+    LLM_REQUESTS_PER_MINUTE_CLAUDE: int = 50
+    LLM_REQUESTS_PER_MINUTE_OPENAI: int = 500
+    LLM_INPUT_TOKENS_PER_MINUTE_CLAUDE: int = 400_000
+    LLM_INPUT_TOKENS_PER_MINUTE_OPENAI: int = 2_000_000
+    LLM_MAX_RETRIES: int = 4
+    LLM_BACKOFF_BASE_SECONDS: float = 1.0
+    LLM_BACKOFF_MAX_SECONDS: float = 30.0
+    LLM_QUEUE_TIMEOUT_SECONDS: float = 120.0
+    LLM_HEDGE_DELAY_SECONDS: float = 30.0
+    JOB_STORE_PATH: str = "cache/generation_jobs.sqlite3"
+    JOB_WORKERS: int = 8
+    JOB_MAX_QUEUED: int = 1000
+    JOB_RETENTION_SECONDS: int = 24 * 3600
+    CLIENT_DISCONNECT_POLL_SECONDS: float = 1.0
+    SECTIONED_MAX_SECTIONS: int = 6
+    SECTIONED_MAX_FILTERS: int = 3
+    SECTIONED_FILTER_MAX_VALUES: int = 30
+    EDIT_MAX_CONTEXT_LINES: int = 200
+    VALIDATION_WORKERS: int = 2
+    VALIDATION_TIMEOUT_SECONDS: float = 10.0
+    VALIDATION_MAX_REPAIRS: int = 2
+    SMOKE_TEST_ENABLED: bool = False
+    SMOKE_TEST_PYTHON: Optional[str] = None
+    SMOKE_TEST_WORKERS: int = 2
+    SMOKE_TEST_TIMEOUT_SECONDS: float = 30.0
+    SMOKE_TEST_STARTUP_SECONDS: float = 30.0
+    SMOKE_TEST_MEMORY_MB: int = 2048
+    # Usuário sem privilégios que executa o código gerado (None = mesmo usuário da API)
+    SMOKE_TEST_USER: Optional[str] = "nobody"
+    # Executa em um namespace de rede vazio (unshare --net; requer root/CAP_SYS_ADMIN)
+    SMOKE_TEST_ISOLATE_NETWORK: bool = True
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -1,8 +1,14 @@
 import logging
 import threading
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from .services.state_manager import cleanup_expired_entries
+from .services.dataset_registry import cleanup_expired_datasets
+from .services.llm_providers import provider_registry
+from .services.generation_jobs import job_runner, cleanup_expired_jobs
+from .services.code_validation import start_validation_pool, shutdown_validation_pool
+from .services.smoke_testing import check_smoke_test_environment
 from .api.v1 import router as api_v1_router
 from dotenv import load_dotenv
 from .core.config import settings
@@ -22,7 +28,23 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 logger.info("Iniciando a aplicação AutoDash API")
 
-app = FastAPI(title=settings.APP_NAME)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Clientes de LLM de longa duração, compartilhados entre requisições
+    provider_registry.start()
+    # Processos da validação do código gerado
+    await start_validation_pool()
+    if settings.SMOKE_TEST_ENABLED:
+        # Falha na inicialização se o sandbox não puder ser montado, em vez de a cada geração
+        await check_smoke_test_environment()
+    # Workers dos jobs de geração; jobs pendentes de execuções anteriores são retomados
+    await job_runner.start()
+    yield
+    await job_runner.stop()
+    await provider_registry.close()
+    shutdown_validation_pool()
+
+app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -37,6 +59,12 @@ app.add_middleware(
 cleanup_thread = threading.Thread(target=cleanup_expired_entries, daemon=True)
 cleanup_thread.start()
 
+dataset_cleanup_thread = threading.Thread(target=cleanup_expired_datasets, daemon=True)
+dataset_cleanup_thread.start()
+
+job_cleanup_thread = threading.Thread(target=cleanup_expired_jobs, daemon=True)
+job_cleanup_thread.start()
+
 # Include the v1 API router
 app.include_router(api_v1_router, prefix="/api/v1")
 
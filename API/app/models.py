@@ -53,8 +53,33 @@ class GitHubCallbackRequest(BaseModel):
     code: str
 
 class GenerateDashboardRequest(BaseModel):
-    table_data: 'TableData'
+    # Opcional quando a tabela é enviada em formato colunar (Arrow IPC / Parquet) via multipart
+    table_data: Optional['TableData'] = None
+    # Alternativa a table_data: dataset previamente enviado em /datasets
+    dataset_id: Optional[str] = None
     model: AIModelEnum = AIModelEnum.CLAUDE # Default set to Claude
+    # Ignora respostas em cache e força uma nova chamada ao LLM
+    bypass_cache: bool = False
+    # Geração "hedged": após hedge_delay segundos (padrão LLM_HEDGE_DELAY_SECONDS; 0 = imediato)
+    # o mesmo pedido é enviado ao outro provedor, e vale a primeira resposta válida
+    hedge: bool = False
+    hedge_delay: Optional[float] = None
+    # Prazo em segundos (padrão LLM_DEADLINE_SECONDS, desligado; 0 = sem prazo); esgotado, a
+    # geração segue em um modelo mais rápido, e a resposta informa o nível usado em "tier".
+    # Em jobs, só o prazo informado aqui é aplicado
+    deadline: Optional[float] = None
+    # Geração por seções: plano curto do layout e seções geradas em paralelo (ignora hedge)
+    sectioned: bool = False
+    # Executa o dashboard gerado em modo headless e o rejeita se falhar (padrão SMOKE_TEST_ENABLED)
+    smoke_test: Optional[bool] = None
+
+class EditDashboardRequest(BaseModel):
+    unique_id: str
+    # Alteração pedida em linguagem natural (ex.: "troque o gráfico de barras por um de pizza")
+    instruction: str
+    model: AIModelEnum = AIModelEnum.CLAUDE
+    bypass_cache: bool = False
+    smoke_test: Optional[bool] = None
 
 class DownloadDashboardRequest(BaseModel):
     unique_id: str
@@ -63,5 +88,6 @@ class CreateGitHubRepoRequest(BaseModel):
     access_token: str
     repo_name: str
     description: Optional[str] = ""
-    table_data: TableData
+    table_data: Optional[TableData] = None
+    dataset_id: Optional[str] = None
     generated_code: str
\ No newline at end of file
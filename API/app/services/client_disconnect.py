@@ -0,0 +1,101 @@
+"""
+Cancelamento de gerações quando o cliente desconecta.
+
+Se o usuário fecha a aba, a geração em andamento não tem mais quem receba o resultado.
+Um watcher verifica periodicamente `Request.is_disconnected()` e, ao detectar a
+desconexão, cancela a task da geração: o cancelamento chega à chamada ao provedor
+(que fecha a conexão HTTP e libera a vaga no agendador), a menos que outra requisição
+idêntica ainda aguarde a mesma chamada (ver `SingleFlight`).
+"""
+import asyncio
+import logging
+from typing import AsyncIterator, Awaitable
+
+from fastapi import Request
+
+from ..core.config import settings
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Marca o fim do gerador na fila entre a task produtora e o consumidor
+_END = object()
+
+
+class ClientDisconnected(Exception):
+    pass
+
+
+async def _wait_disconnect(request: Request):
+    while not await request.is_disconnected():
+        await asyncio.sleep(settings.CLIENT_DISCONNECT_POLL_SECONDS)
+
+
+def _cancelled(kind: str) -> ClientDisconnected:
+    metrics.increment(f"generations_cancelled.{kind}")
+    logger.info(f"Cliente desconectado; geração cancelada ({kind})")
+    return ClientDisconnected("Cliente desconectado durante a geração.")
+
+
+async def run_until_disconnected(request: Request, awaitable: Awaitable):
+    """
+    Aguarda `awaitable`, cancelando-o se o cliente desconectar antes do fim
+    (nesse caso levanta ClientDisconnected).
+    """
+    work = asyncio.ensure_future(awaitable)
+    watcher = asyncio.ensure_future(_wait_disconnect(request))
+    try:
+        await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        if work.done():
+            return work.result()
+        work.cancel()
+        raise _cancelled("request")
+    finally:
+        work.cancel()
+        watcher.cancel()
+
+
+async def stream_until_disconnected(request: Request, events: AsyncIterator) -> AsyncIterator:
+    """
+    Repassa os itens de um gerador assíncrono, cancelando-o se o cliente desconectar.
+
+    O gerador é consumido por uma task própria, de modo que o cancelamento o interrompe
+    também enquanto ele aguarda o provedor, e não só quando um item é enviado.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+
+    async def produce():
+        try:
+            async for item in events:
+                await queue.put(item)
+        except Exception as e:
+            await queue.put(e)
+            return
+        await queue.put(_END)
+
+    producer = asyncio.ensure_future(produce())
+    watcher = asyncio.ensure_future(_wait_disconnect(request))
+    getter = None
+    finished = False
+    try:
+        while True:
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait({getter, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if not getter.done():
+                finished = True
+                raise _cancelled("stream")
+            item = getter.result()
+            if item is _END or isinstance(item, Exception):
+                finished = True
+                if item is _END:
+                    return
+                raise item
+            yield item
+    finally:
+        if not finished:
+            # Resposta interrompida pelo servidor (ex.: desconexão detectada no envio)
+            metrics.increment("generations_cancelled.stream")
+        if getter is not None:
+            getter.cancel()
+        producer.cancel()
+        watcher.cancel()
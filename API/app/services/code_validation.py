@@ -0,0 +1,233 @@
+"""
+Validação do código gerado antes do armazenamento.
+
+A análise (parse da AST, compilação e verificação das colunas referenciadas) roda em um
+pool de processos, fora do event loop e sem disputar o GIL com as requisições. Erros de
+sintaxe ou de compilação tornam o código inválido; colunas que não existem no dataset nem
+são criadas pelo código são registradas como avisos: motivam uma correção, mas não
+invalidam o código, já que ele pode criar colunas de formas que a análise estática não
+acompanha.
+"""
+import ast
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Argumentos das funções do plotly express que recebem nomes de colunas
+PLOTLY_COLUMN_KEYWORDS = {
+    "x", "y", "z", "color", "size", "symbol", "names", "values", "hover_name", "text",
+    "facet_row", "facet_col", "animation_frame", "line_group", "lat", "lon", "locations",
+}
+# Argumentos que nomeiam colunas criadas pelo próprio código (reset_index, melt, to_frame)
+CREATING_KEYWORDS = {"name", "value_name", "var_name"}
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+
+@dataclass
+class ValidationResult:
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+    @property
+    def problems(self) -> List[str]:
+        return self.errors + self.warnings
+
+
+def _string(node) -> Optional[str]:
+    return node.value if isinstance(node, ast.Constant) and isinstance(node.value, str) else None
+
+
+def _strings(node) -> List[str]:
+    # Constante de texto ou lista/tupla de constantes (ex.: df[["a", "b"]])
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return [value for value in map(_string, node.elts) if value is not None]
+    value = _string(node)
+    return [value] if value is not None else []
+
+
+def _frame_names(tree: ast.AST) -> set:
+    """
+    Nomes de variáveis que contêm DataFrames: os que começam com "df", os que recebem
+    `read_csv`/`load_data` e, por propagação, os derivados deles.
+    """
+    names = {
+        node.id for node in ast.walk(tree)
+        if isinstance(node, ast.Name) and node.id.startswith("df")
+    }
+    names |= {
+        arg.arg for node in ast.walk(tree) if isinstance(node, (ast.FunctionDef, ast.Lambda))
+        for arg in node.args.args if arg.arg.startswith("df")
+    }
+    assignments = [node for node in ast.walk(tree) if isinstance(node, ast.Assign)]
+    changed = True
+    while changed:
+        changed = False
+        for node in assignments:
+            sources = {
+                sub.id for sub in ast.walk(node.value) if isinstance(sub, ast.Name)
+            } | {
+                sub.attr for sub in ast.walk(node.value) if isinstance(sub, ast.Attribute)
+            }
+            if not (sources & names or sources & {"read_csv", "load_data"}):
+                continue
+            for target in node.targets:
+                for name in (n.id for n in ast.walk(target) if isinstance(n, ast.Name)):
+                    if name not in names:
+                        names.add(name)
+                        changed = True
+    return names
+
+
+def _created_columns(tree: ast.AST) -> set:
+    created = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Subscript) and isinstance(node.ctx, ast.Store):
+            created.update(_strings(node.slice))
+        elif isinstance(node, ast.Call):
+            method = node.func.attr if isinstance(node.func, ast.Attribute) else None
+            for keyword in node.keywords:
+                if method in ("assign", "agg", "aggregate") and keyword.arg:
+                    created.add(keyword.arg)
+                if keyword.arg in CREATING_KEYWORDS:
+                    created.update(_strings(keyword.value))
+                if method == "rename" and keyword.arg == "columns" and isinstance(keyword.value, ast.Dict):
+                    created.update(value for value in map(_string, keyword.value.values) if value)
+            if method == "melt":
+                created.update({"variable", "value"})
+            elif method == "value_counts":
+                # Nomes gerados por value_counts().reset_index() (pandas 1.x e 2.x)
+                created.update({"index", "count", "proportion"})
+    return created
+
+
+def _referenced_columns(tree: ast.AST, frames: set) -> List[tuple]:
+    references = []
+    for node in ast.walk(tree):
+        if (isinstance(node, ast.Subscript) and isinstance(node.ctx, ast.Load)
+                and isinstance(node.value, ast.Name) and node.value.id in frames):
+            references.extend((node.lineno, column) for column in _strings(node.slice))
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute):
+            base = node.func.value
+            if isinstance(base, ast.Name) and base.id == "px":
+                for keyword in node.keywords:
+                    if keyword.arg in PLOTLY_COLUMN_KEYWORDS:
+                        references.extend((node.lineno, column) for column in _strings(keyword.value))
+            elif (node.func.attr in ("groupby", "sort_values", "value_counts", "dropna", "drop_duplicates")
+                  and isinstance(base, ast.Name) and base.id in frames):
+                for arg in node.args[:1]:
+                    references.extend((node.lineno, column) for column in _strings(arg))
+                for keyword in node.keywords:
+                    if keyword.arg in ("by", "subset"):
+                        references.extend((node.lineno, column) for column in _strings(keyword.value))
+    return references
+
+
+def analyze_code(code: str, columns: Iterable[str]) -> ValidationResult:
+    """
+    Análise estática do código (executada nos processos do pool).
+    """
+    result = ValidationResult()
+    if not code or not code.strip():
+        result.errors.append("O código está vazio.")
+        return result
+    try:
+        tree = ast.parse(code, "app.py")
+        compile(tree, "app.py", "exec")
+    except SyntaxError as e:
+        result.errors.append(f"Linha {e.lineno}: erro de sintaxe: {e.msg}")
+        return result
+    except ValueError as e:
+        result.errors.append(f"Erro de compilação: {e}")
+        return result
+
+    imported = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imported.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module:
+            imported.add(node.module.split(".")[0])
+    if "streamlit" not in imported:
+        result.errors.append("O código não importa o streamlit.")
+
+    existing = set(columns)
+    created = _created_columns(tree)
+    missing = {}
+    for lineno, column in _referenced_columns(tree, _frame_names(tree)):
+        if column not in existing and column not in created:
+            missing.setdefault(column, lineno)
+    for column, lineno in sorted(missing.items(), key=lambda item: item[1]):
+        result.warnings.append(f"Linha {lineno}: coluna '{column}' não existe nos dados")
+    return result
+
+
+def repair_instruction(result: ValidationResult, columns: Iterable[str]) -> str:
+    """
+    Pedido de correção pontual com os problemas encontrados, no formato de uma edição
+    (ver dashboard_edit).
+    """
+    problems = "\n".join(f"- {problem}" for problem in result.problems)
+    return f"""Corrija apenas os problemas abaixo, encontrados na validação do código, sem alterar o restante do dashboard:
+{problems}
+
+Colunas existentes nos dados: {", ".join(str(col) for col in columns)}"""
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn: o processo da API tem threads (limpeza, threadpool), e fork com threads pode travar
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.VALIDATION_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+async def validate_code(code: str, columns: Iterable[str]) -> ValidationResult:
+    global _executor
+    loop = asyncio.get_running_loop()
+    columns = [str(col) for col in columns]
+    try:
+        return await asyncio.wait_for(
+            loop.run_in_executor(_get_executor(), analyze_code, code, columns),
+            settings.VALIDATION_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        return ValidationResult(errors=["A validação do código excedeu o tempo limite."])
+    except BrokenProcessPool:
+        # Um processo do pool morreu: o pool é recriado na próxima validação e esta roda no threadpool
+        logger.exception("Pool de validação indisponível; validando no threadpool")
+        shutdown_validation_pool()
+        return await loop.run_in_executor(None, analyze_code, code, columns)
+
+
+async def start_validation_pool():
+    """
+    Inicia os processos do pool (chamado na inicialização da aplicação), para que a
+    primeira geração não pague o custo de criá-los.
+    """
+    loop = asyncio.get_running_loop()
+    executor = _get_executor()
+    await asyncio.gather(*[
+        loop.run_in_executor(executor, analyze_code, "import streamlit", [])
+        for _ in range(settings.VALIDATION_WORKERS)
+    ])
+
+
+def shutdown_validation_pool():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,165 @@
+"""
+Edição incremental de dashboards gerados.
+
+O modelo recebe apenas o código existente (sem o dataset nem o perfil) e o pedido de
+alteração, e responde com blocos de busca/substituição (ver EDIT_INSTRUCTIONS), aplicados
+aqui ao código completo. Em arquivos maiores que EDIT_MAX_CONTEXT_LINES, só os trechos de
+nível superior mais relacionados ao pedido são enviados, junto com um sumário do restante.
+"""
+import ast
+import difflib
+import logging
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import List, Tuple
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_EDIT_BLOCK = re.compile(
+    r"<<<<<<< BUSCAR\n(.*?)\n?=======\n(.*?)\n?>>>>>>> SUBSTITUIR",
+    re.DOTALL
+)
+_WORD = re.compile(r"[a-z0-9_]{3,}")
+
+
+class DashboardEditError(Exception):
+    pass
+
+
+@dataclass
+class EditBlock:
+    search: str
+    replace: str
+
+
+def _words(text: str) -> set:
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().lower()
+    return set(_WORD.findall(text))
+
+
+def _top_level_blocks(code: str) -> List[Tuple[int, int]]:
+    """
+    Intervalos de linhas (base 1, inclusivos) dos comandos de nível superior do código,
+    incluindo decorators e as linhas que os separam do comando anterior.
+    """
+    tree = ast.parse(code)
+    blocks = []
+    previous_end = 0
+    for node in tree.body:
+        end = node.end_lineno
+        blocks.append((previous_end + 1, end))
+        previous_end = end
+    total = len(code.split("\n"))
+    if blocks and previous_end < total:
+        blocks[-1] = (blocks[-1][0], total)
+    return blocks
+
+
+def relevant_region(code: str, instruction: str) -> str:
+    """
+    Trecho do código enviado ao modelo: o código inteiro quando cabe em
+    EDIT_MAX_CONTEXT_LINES; senão, os comandos de nível superior com mais palavras em comum
+    com o pedido, na ordem do arquivo, e a primeira linha dos demais como sumário.
+    """
+    lines = code.split("\n")
+    if len(lines) <= settings.EDIT_MAX_CONTEXT_LINES:
+        return code
+    try:
+        blocks = _top_level_blocks(code)
+    except SyntaxError:
+        # Sem a estrutura do código, o recorte seria arbitrário: envia o código inteiro
+        return code
+
+    wanted = _words(instruction)
+    scored = sorted(
+        range(len(blocks)),
+        key=lambda i: len(wanted & _words("\n".join(lines[blocks[i][0] - 1:blocks[i][1]]))),
+        reverse=True
+    )
+    selected, used = set(), 0
+    for i in scored:
+        start, end = blocks[i]
+        if used and used + end - start + 1 > settings.EDIT_MAX_CONTEXT_LINES:
+            continue
+        selected.add(i)
+        used += end - start + 1
+
+    parts = []
+    for i, (start, end) in enumerate(blocks):
+        if i in selected:
+            parts.append("\n".join(lines[start - 1:end]))
+        else:
+            first = next((line for line in lines[start - 1:end] if line.strip()), "")
+            parts.append(f"# [linhas {start}-{end} omitidas] {first.strip()}")
+    return "\n".join(parts)
+
+
+def render_edit_prompt(code: str, instruction: str) -> str:
+    region = relevant_region(code, instruction)
+    note = "" if region == code else " (trechos relevantes; as linhas omitidas não podem ser buscadas)"
+    return f"""Código atual do dashboard{note}:
+```python
+{region}
+```
+
+Alteração pedida:
+{instruction}"""
+
+
+def parse_edit_blocks(response: str) -> List[EditBlock]:
+    blocks = [EditBlock(search, replace) for search, replace in _EDIT_BLOCK.findall(response.replace("\r\n", "\n"))]
+    if not blocks:
+        raise DashboardEditError("O modelo não retornou blocos de edição no formato esperado.")
+    return blocks
+
+
+def _find_lines(lines: List[str], search: List[str], normalize) -> List[int]:
+    wanted = [normalize(line) for line in search]
+    return [
+        i for i in range(len(lines) - len(search) + 1)
+        if [normalize(line) for line in lines[i:i + len(search)]] == wanted
+    ]
+
+
+def _apply_block(code: str, block: EditBlock) -> str:
+    if not block.search.strip():
+        raise DashboardEditError("Bloco de edição com trecho de busca vazio.")
+    lines = code.split("\n")
+    search = block.search.split("\n")
+    matches = _find_lines(lines, search, str.rstrip)
+    if not matches:
+        # O modelo pode ter alterado a indentação: compara sem ela e reindenta a substituição
+        matches = _find_lines(lines, search, str.strip)
+    if len(matches) > 1:
+        raise DashboardEditError(f"Trecho de busca ambíguo ({len(matches)} ocorrências): {search[0]!r}")
+    if not matches:
+        raise DashboardEditError(f"Trecho de busca não encontrado no código: {search[0]!r}")
+
+    start = matches[0]
+    shift = (len(lines[start]) - len(lines[start].lstrip())) - (len(search[0]) - len(search[0].lstrip()))
+    replacement = block.replace.split("\n") if block.replace else []
+    if shift > 0:
+        replacement = [" " * shift + line if line.strip() else line for line in replacement]
+    elif shift < 0:
+        replacement = [line[min(-shift, len(line) - len(line.lstrip())):] for line in replacement]
+    return "\n".join(lines[:start] + replacement + lines[start + len(search):])
+
+
+def apply_edit_blocks(code: str, blocks: List[EditBlock]) -> str:
+    """
+    Aplica os blocos em sequência; qualquer bloco que não case exatamente uma vez invalida
+    a edição inteira.
+    """
+    for block in blocks:
+        code = _apply_block(code, block)
+    return code
+
+
+def unified_diff(old: str, new: str) -> str:
+    old, new = old.rstrip("\n") + "\n", new.rstrip("\n") + "\n"
+    return "".join(difflib.unified_diff(
+        old.splitlines(keepends=True), new.splitlines(keepends=True), "app.py", "app.py"
+    ))
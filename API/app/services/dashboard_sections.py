@@ -0,0 +1,199 @@
+"""
+Geração de dashboards por seções.
+
+Os tokens de saída de uma resposta são gerados em série, de modo que um único código
+longo domina a latência da geração. Neste modo o modelo recebe primeiro um pedido curto
+de plano do layout e, em seguida, gera as seções do plano em paralelo. O preâmbulo
+(imports, `load_data` e filtros da barra lateral) é montado aqui de forma determinística
+e as seções são costuradas na ordem do plano, em um único app.
+"""
+import json
+import logging
+import re
+import textwrap
+import unicodedata
+from dataclasses import dataclass, field
+from typing import List
+
+import pandas as pd
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Corpo usado quando o código de uma seção não é Python válido: o restante do app continua funcionando
+UNAVAILABLE_SECTION_BODY = 'st.warning("Não foi possível gerar esta seção.")'
+
+
+@dataclass
+class Section:
+    id: str
+    title: str
+    description: str
+    columns: List[str] = field(default_factory=list)
+
+    @property
+    def function_name(self) -> str:
+        return f"secao_{self.id}"
+
+
+@dataclass
+class SectionPlan:
+    title: str
+    sections: List[Section]
+
+
+def _identifier(text: str, used: set) -> str:
+    # Identificador Python em ASCII, único dentro do plano
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode()
+    base = re.sub(r"\W+", "_", text.lower()).strip("_") or "secao"
+    identifier, suffix = base, 2
+    while identifier in used:
+        identifier = f"{base}_{suffix}"
+        suffix += 1
+    used.add(identifier)
+    return identifier
+
+
+def default_plan(pool: pd.DataFrame) -> SectionPlan:
+    """
+    Plano usado quando a resposta do modelo não é um plano válido, a partir dos tipos das colunas.
+    """
+    numeric = [str(col) for col in pool.select_dtypes(include="number").columns]
+    categorical = [str(col) for col in pool.columns if str(col) not in numeric]
+    dates = [str(col) for col in pool.select_dtypes(include="datetime").columns]
+
+    sections = []
+    if numeric:
+        sections.append(Section("kpis", "Indicadores", "Métricas principais (totais, médias) das colunas numéricas", numeric))
+    sections.append(Section("distribuicoes", "Distribuições", "Distribuição das principais colunas", numeric + categorical))
+    if dates:
+        sections.append(Section("series_temporais", "Evolução no tempo", "Séries temporais das métricas por data", dates + numeric))
+    if categorical and numeric:
+        sections.append(Section("comparacoes", "Comparações", "Métricas numéricas por categoria", categorical + numeric))
+    sections.append(Section("tabela", "Dados detalhados", "Tabela com os dados filtrados", []))
+    return SectionPlan(title="Dashboard", sections=sections[:settings.SECTIONED_MAX_SECTIONS])
+
+
+def parse_plan(text: str, pool: pd.DataFrame) -> SectionPlan:
+    """
+    Lê o plano em JSON retornado pelo modelo. Colunas inexistentes são descartadas e o
+    número de seções é limitado a SECTIONED_MAX_SECTIONS.
+    """
+    try:
+        data = json.loads(text[text.index("{"):text.rindex("}") + 1])
+        existing = {str(col) for col in pool.columns}
+        used = set()
+        sections = []
+        for item in data["sections"][:settings.SECTIONED_MAX_SECTIONS]:
+            title = str(item.get("title") or item.get("id") or "Seção")
+            sections.append(Section(
+                id=_identifier(item.get("id") or title, used),
+                title=title,
+                description=str(item.get("description", "")),
+                columns=[str(col) for col in item.get("columns", []) if str(col) in existing]
+            ))
+        if not sections:
+            raise ValueError("plano sem seções")
+        return SectionPlan(title=str(data.get("title") or "Dashboard"), sections=sections)
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        logger.warning(f"Plano de seções inválido ({e}); usando o plano padrão")
+        return default_plan(pool)
+
+
+def filter_columns(pool: pd.DataFrame) -> List[str]:
+    """
+    Colunas categóricas com poucos valores distintos, usadas nos filtros da barra lateral.
+    """
+    columns = []
+    for col in pool.select_dtypes(exclude=["number", "datetime"]).columns:
+        distinct = pool[col].nunique(dropna=True)
+        if 2 <= distinct <= settings.SECTIONED_FILTER_MAX_VALUES:
+            columns.append(str(col))
+        if len(columns) == settings.SECTIONED_MAX_FILTERS:
+            break
+    return columns
+
+
+def render_section_prompt(data_prompt: str, plan: SectionPlan, section: Section) -> str:
+    """
+    Prompt de uma seção: a parte variável do prompt de geração (descrição e amostra dos
+    dados) seguida da seção a implementar e das demais seções do plano.
+    """
+    others = [f"- {other.title}" for other in plan.sections if other is not section]
+    columns = ", ".join(section.columns) or "a critério"
+    return f"""{data_prompt}
+
+Dashboard: {plan.title}
+Seção a implementar: {section.title}
+O que mostrar: {section.description}
+Colunas sugeridas: {columns}
+
+Outras seções do dashboard (geradas separadamente; não as implemente):
+{chr(10).join(others) or "- nenhuma"}"""
+
+
+def render_preamble(plan: SectionPlan, pool: pd.DataFrame) -> str:
+    filters = filter_columns(pool)
+    return f'''import numpy as np
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+st.set_page_config(page_title={plan.title!r}, layout="wide")
+st.title({plan.title!r})
+
+
+@st.cache_data
+def load_data():
+    return pd.read_csv("data.csv")
+
+
+df = load_data()
+
+# Filtros da barra lateral, aplicados a todas as seções
+st.sidebar.header("Filtros")
+df_filtrado = df
+for coluna in {filters!r}:
+    opcoes = sorted(df[coluna].dropna().astype(str).unique())
+    selecionadas = st.sidebar.multiselect(coluna, opcoes, default=opcoes)
+    # Sem alteração na seleção, nada é filtrado: linhas com valores nulos continuam nos totais
+    if set(selecionadas) != set(opcoes):
+        df_filtrado = df_filtrado[df_filtrado[coluna].astype(str).isin(selecionadas)]
+'''
+
+
+def _section_function(section: Section, body: str) -> str:
+    body = textwrap.dedent(body).strip() or UNAVAILABLE_SECTION_BODY
+    return f"def {section.function_name}(df):\n{textwrap.indent(body, '    ')}\n"
+
+
+def section_compiles(section: Section, body: str) -> bool:
+    try:
+        compile(_section_function(section, body), section.function_name, "exec")
+    except (SyntaxError, ValueError):
+        return False
+    return bool(body.strip())
+
+
+def render_section(section: Section, body: str) -> str:
+    """
+    Função da seção com o corpo gerado pelo modelo; corpos vazios ou inválidos são
+    substituídos por um aviso.
+    """
+    if not section_compiles(section, body):
+        logger.warning(f"Seção '{section.id}' com código vazio ou inválido; substituída por um aviso")
+        body = UNAVAILABLE_SECTION_BODY
+    return _section_function(section, body)
+
+
+def stitch(plan: SectionPlan, pool: pd.DataFrame, bodies: List[str]) -> str:
+    """
+    Costura o preâmbulo, as funções das seções e as chamadas, na ordem do plano.
+    """
+    functions = [render_section(section, body) for section, body in zip(plan.sections, bodies)]
+    calls = [
+        f"st.header({section.title!r})\n{section.function_name}(df_filtrado)\n"
+        for section in plan.sections
+    ]
+    return "\n\n".join([render_preamble(plan, pool), *functions, "\n".join(calls)])
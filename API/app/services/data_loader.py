@@ -0,0 +1,234 @@
+import logging
+import os
+import shutil
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Union
+
+import pandas as pd
+import xxhash
+
+from ..core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CSV_EXTENSIONS = {".csv", ".txt"}
+EXCEL_EXTENSIONS = {".xlsx", ".xlsm"}
+COLUMNAR_EXTENSIONS = {".arrow", ".arrows", ".parquet"}
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+ARROW_FILE_MEDIA_TYPE = "application/vnd.apache.arrow.file"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+COLUMNAR_MEDIA_TYPES = {ARROW_STREAM_MEDIA_TYPE, ARROW_FILE_MEDIA_TYPE, PARQUET_MEDIA_TYPE}
+
+_PARQUET_MAGIC = b"PAR1"
+_ARROW_FILE_MAGIC = b"ARROW1"
+
+
+def iter_csv_chunks(file: BinaryIO, chunk_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Lê um CSV de forma incremental, produzindo DataFrames de até `chunk_rows` linhas.
+    """
+    chunk_rows = chunk_rows or settings.UPLOAD_CHUNK_ROWS
+    with pd.read_csv(file, chunksize=chunk_rows) as reader:
+        for chunk in reader:
+            yield chunk
+
+
+def iter_excel_chunks(file: BinaryIO, chunk_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Lê a primeira planilha de um arquivo XLSX em modo read-only, linha a linha,
+    produzindo DataFrames de até `chunk_rows` linhas.
+    """
+    from openpyxl import load_workbook
+
+    chunk_rows = chunk_rows or settings.UPLOAD_CHUNK_ROWS
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [str(col) if col is not None else f"Unnamed: {i}" for i, col in enumerate(header)]
+
+        buffer: List[tuple] = []
+        for row in rows:
+            if all(value is None for value in row):
+                continue
+            buffer.append(row)
+            if len(buffer) >= chunk_rows:
+                yield pd.DataFrame(buffer, columns=columns).infer_objects()
+                buffer = []
+        if buffer:
+            yield pd.DataFrame(buffer, columns=columns).infer_objects()
+    finally:
+        workbook.close()
+
+
+def iter_file_chunks(file: BinaryIO, filename: str, chunk_rows: Optional[int] = None) -> Iterator[pd.DataFrame]:
+    """
+    Escolhe o leitor incremental de acordo com a extensão do arquivo enviado.
+    """
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension in EXCEL_EXTENSIONS:
+        return iter_excel_chunks(file, chunk_rows)
+    if extension in CSV_EXTENSIONS or not extension:
+        return iter_csv_chunks(file, chunk_rows)
+    raise ValueError(f"Formato de arquivo não suportado: {extension}")
+
+
+def is_columnar_upload(filename: Optional[str], media_type: Optional[str] = None) -> bool:
+    """
+    Indica se o arquivo enviado está em formato colunar binário (Arrow IPC ou Parquet).
+    """
+    media_type = (media_type or "").split(";")[0].strip().lower()
+    extension = os.path.splitext(filename or "")[1].lower()
+    return media_type in COLUMNAR_MEDIA_TYPES or extension in COLUMNAR_EXTENSIONS
+
+
+def read_columnar_table(payload: Union[bytes, BinaryIO]) -> pd.DataFrame:
+    """
+    Constrói um DataFrame a partir de um payload Arrow IPC (stream ou file) ou Parquet.
+
+    O formato é detectado pelos bytes mágicos. Os buffers Arrow são repassados ao pandas
+    sem cópia sempre que o tipo permite (colunas numéricas sem nulos).
+    """
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+
+    if isinstance(payload, (bytes, bytearray, memoryview)):
+        source = pa.py_buffer(payload)
+        header = bytes(payload[:6])
+        reader_source = pa.BufferReader(source)
+    else:
+        position = payload.tell()
+        header = payload.read(6)
+        payload.seek(position)
+        source = reader_source = payload
+
+    if header[:4] == _PARQUET_MAGIC:
+        table = pq.read_table(reader_source)
+    elif header == _ARROW_FILE_MAGIC:
+        table = ipc.open_file(source).read_all()
+    else:
+        table = ipc.open_stream(source).read_all()
+
+    # split_blocks evita consolidar colunas em um único bloco (que exigiria cópia)
+    # e self_destruct libera cada buffer Arrow assim que convertido
+    df = table.to_pandas(split_blocks=True, self_destruct=True)
+    del table
+    return df
+
+
+def concat_chunks_by_column(chunks: Iterable[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """
+    Concatena blocos de linhas coluna a coluna, liberando a memória à medida que avança.
+
+    Cada bloco é separado em colunas assim que lido (e então descartado), e cada coluna é
+    concatenada e liberada antes da próxima; o pico fica próximo do tamanho final do
+    DataFrame mais uma coluna, em vez do dobro de `pd.concat(list(chunks))`. A promoção de
+    tipos entre blocos é a mesma do `pd.concat`. Retorna None se não houver blocos.
+    """
+    columns = None
+    parts: List[List[pd.Series]] = []
+    for chunk in chunks:
+        if columns is None:
+            columns = chunk.columns
+            parts = [[] for _ in columns]
+        for position in range(chunk.shape[1]):
+            # Cópia da coluna: o bloco consolidado do chunk é liberado ao fim da iteração
+            parts[position].append(chunk.iloc[:, position].copy())
+        del chunk
+    if columns is None:
+        return None
+
+    merged = {}
+    for position in range(len(parts)):
+        column_parts, parts[position] = parts[position], None
+        merged[position] = pd.concat(column_parts, ignore_index=True) if len(column_parts) > 1 else column_parts[0]
+        del column_parts
+    # Sem consolidar as colunas em blocos por tipo, o que exigiria outra cópia
+    df = pd.DataFrame(merged, copy=False)
+    df.columns = columns
+    return df
+
+
+def read_uploaded_file(file: BinaryIO, filename: str, chunk_rows: Optional[int] = None) -> pd.DataFrame:
+    """
+    Converte o arquivo enviado em um DataFrame, lendo-o em blocos para que o pico
+    de memória fique próximo do tamanho final do DataFrame.
+    """
+    if is_columnar_upload(filename):
+        df = read_columnar_table(file)
+    else:
+        # O JSON intermediário nunca existe e os blocos são liberados à medida que concatenados
+        df = concat_chunks_by_column(iter_file_chunks(file, filename, chunk_rows))
+        if df is None:
+            raise ValueError("O arquivo enviado não contém dados.")
+
+    logger.info(
+        f"Arquivo {filename} lido com shape {df.shape} "
+        f"({df.memory_usage(deep=False).sum() / 1024 ** 2:.1f} MiB)"
+    )
+    return df
+
+
+def table_data_to_dataframe(table_data) -> pd.DataFrame:
+    """
+    Converte o corpo JSON `TableData` em DataFrame, validando o número de colunas.
+    """
+    row_lengths = {len(row) for row in table_data.data}
+    if len(row_lengths) > 1:
+        raise ValueError(f"Inconsistent number of columns in rows. Found lengths: {row_lengths}")
+
+    if row_lengths and len(table_data.columns) != next(iter(row_lengths)):
+        raise ValueError(f"Mismatch between number of columns ({len(table_data.columns)}) and data ({next(iter(row_lengths))})")
+
+    return pd.DataFrame(table_data.data, columns=table_data.columns)
+
+
+def persist_upload(file: BinaryIO, filename: str, directory: str) -> tuple:
+    """
+    Copia o upload para `directory` em blocos, calculando o hash do conteúdo durante a cópia.
+
+    O hash é dos bytes do arquivo, e não dos dados lidos (como em `compute_dataset_id`): o
+    mesmo dataset enviado por outro caminho recebe outro dataset_id.
+
+    :return: Tupla (caminho do arquivo, hash do conteúdo).
+    """
+    os.makedirs(directory, exist_ok=True)
+    extension = os.path.splitext(filename or "")[1].lower() or ".csv"
+    digest = xxhash.xxh3_128()
+    temp_path = os.path.join(directory, f".upload-{os.getpid()}-{id(file)}{extension}")
+    with open(temp_path, "wb") as output:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+            output.write(block)
+
+    content_hash = digest.hexdigest()
+    path = os.path.join(directory, f"{content_hash}{extension}")
+    os.replace(temp_path, path)
+    return path, content_hash
+
+
+def write_dataset_csv(source, output):
+    """
+    Escreve os dados em CSV no caminho ou buffer `output`.
+
+    :param source: DataFrame, objeto TableData ou caminho de um arquivo de dataset em disco.
+    """
+    if isinstance(source, pd.DataFrame):
+        source.to_csv(output, index=False)
+    elif isinstance(source, str):
+        if os.path.splitext(source)[1].lower() in CSV_EXTENSIONS:
+            if isinstance(output, str):
+                shutil.copyfile(source, output)
+            else:
+                with open(source, "r", encoding="utf-8") as f:
+                    shutil.copyfileobj(f, output)
+            return
+        # Conversão em blocos para não materializar o arquivo inteiro
+        with open(source, "rb") as f:
+            for i, chunk in enumerate(iter_file_chunks(f, source)):
+                chunk.to_csv(output, index=False, header=(i == 0), mode="w" if i == 0 else "a")
+    else:
+        pd.DataFrame(source.data, columns=source.columns).to_csv(output, index=False)
@@ -0,0 +1,133 @@
+import logging
+import os
+import threading
+import time
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+import xxhash
+
+logger = logging.getLogger(__name__)
+
+# Registro de datasets: {dataset_id: {'frame': DataFrame, 'path': ..., 'timestamp': ...}}
+# Datasets grandes processados em streaming não são materializados: ficam apenas em disco ('path')
+dataset_store = {}
+lock = threading.Lock()
+
+# Referências aos arquivos dos datasets em streaming: {path: contagem}. O registro do dataset,
+# as entradas do state_store (dashboards e suas edições) e os jobs que usam o arquivo contam
+# como referências; o arquivo só é removido quando a última delas é liberada
+file_references = {}
+
+# Tempo de expiração em segundos (mesmo horizonte do state_store)
+EXPIRATION_TIME = 3600
+
+
+def compute_dataset_id(df: pd.DataFrame) -> str:
+    """
+    Calcula um identificador de conteúdo para o DataFrame com xxhash (XXH3-128).
+
+    Colunas com dtype NumPy são hasheadas diretamente sobre o buffer da coluna; as demais
+    (texto, categorias, tipos de extensão) pelo hash vetorizado de valores do pandas.
+    Nomes e tipos das colunas entram no hash, de modo que os mesmos dados enviados como
+    JSON, Arrow/Parquet ou upload lido em memória resultem no mesmo dataset_id, desde que
+    os tipos inferidos coincidam. Uploads grandes processados em streaming nunca viram um
+    DataFrame: são identificados pelo hash dos bytes do arquivo (ver `persist_upload`) e
+    não coincidem com os demais caminhos.
+    """
+    digest = xxhash.xxh3_128()
+    digest.update("\x1f".join(map(str, df.columns)).encode("utf-8"))
+    digest.update("\x1f".join(map(str, df.dtypes)).encode("utf-8"))
+    for _, series in df.items():
+        values = series.to_numpy() if isinstance(series.dtype, np.dtype) and series.dtype.kind in "biufcmM" else None
+        if values is not None:
+            digest.update(np.ascontiguousarray(values).view(np.uint8))
+        else:
+            digest.update(pd.util.hash_array(series.to_numpy(dtype=object, na_value=None)))
+    return digest.hexdigest()
+
+
+def register_dataset(df: pd.DataFrame) -> str:
+    """
+    Registra o DataFrame e retorna o dataset_id. Se o conteúdo já estiver registrado,
+    a entrada existente é reaproveitada e sua expiração renovada.
+    """
+    dataset_id = compute_dataset_id(df)
+    with lock:
+        entry = dataset_store.get(dataset_id)
+        if entry:
+            entry['timestamp'] = time.time()
+        else:
+            dataset_store[dataset_id] = {'frame': df, 'path': None, 'timestamp': time.time()}
+    return dataset_id
+
+
+def register_dataset_file(dataset_id: str, path: str):
+    """
+    Registra um dataset mantido apenas em disco (upload processado em streaming).
+    """
+    with lock:
+        entry = dataset_store.get(dataset_id)
+        if entry and entry['path'] == path:
+            entry['timestamp'] = time.time()
+            return
+        dataset_store[dataset_id] = {'frame': None, 'path': path, 'timestamp': time.time()}
+        file_references[path] = file_references.get(path, 0) + 1
+        if entry and entry['path']:
+            _release_locked(entry['path'])
+
+
+def retain_dataset_file(path: str):
+    """
+    Registra mais uma referência ao arquivo de um dataset em streaming, que não será
+    removido na expiração do registro enquanto ela não for liberada.
+    """
+    with lock:
+        file_references[path] = file_references.get(path, 0) + 1
+
+
+def release_dataset_file(path: str):
+    with lock:
+        _release_locked(path)
+
+
+def _release_locked(path: str):
+    count = file_references.get(path, 0) - 1
+    if count > 0:
+        file_references[path] = count
+        return
+    file_references.pop(path, None)
+    # Removido sob o lock, para não concorrer com um novo registro do mesmo arquivo
+    if os.path.exists(path):
+        os.remove(path)
+        logger.info(f"Arquivo de dataset sem referências removido: {path}")
+
+
+def get_dataset(dataset_id: str) -> Optional[Union[pd.DataFrame, str]]:
+    """
+    Retorna o DataFrame registrado ou, para datasets em streaming, o caminho do arquivo.
+    """
+    with lock:
+        entry = dataset_store.get(dataset_id)
+        if entry:
+            entry['timestamp'] = time.time()
+            return entry['frame'] if entry['frame'] is not None else entry['path']
+        return None
+
+
+def remove_expired_datasets():
+    current_time = time.time()
+    with lock:
+        expired_keys = [key for key, value in dataset_store.items() if current_time - value['timestamp'] > EXPIRATION_TIME]
+        for key in expired_keys:
+            entry = dataset_store.pop(key)
+            if entry['path']:
+                # Dashboards e jobs que ainda usam o arquivo mantêm-no em disco
+                _release_locked(entry['path'])
+
+
+def cleanup_expired_datasets():
+    while True:
+        time.sleep(600)  # Verifica a cada 10 minutos
+        remove_expired_datasets()
@@ -0,0 +1,667 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from ..core.config import settings
+from ..models import AIModelEnum
+from .llm_models import AsyncAIModel
+from .llm_providers import provider_registry, tier_model, MODEL_TIER_PRIMARY, MODEL_TIER_FALLBACK
+from .llm_cache import llm_cache, cache_key
+from .single_flight import llm_single_flight
+from .llm_scheduler import llm_scheduler, LLMUnavailableError
+from .utils import generate_data_description, clean_dashboard_code, fake_code, DashboardCodeCleaner, is_valid_dashboard_code
+from . import metrics
+from .data_loader import iter_file_chunks
+from .state_manager import store_dashboard_code, get_dashboard_entry
+from .profile_cache import profile_cache, CachedProfile
+from .prompt_builder import (
+    build_dashboard_prompt, estimate_tokens, DASHBOARD_INSTRUCTIONS, SECTION_PLAN_INSTRUCTIONS, SECTION_INSTRUCTIONS,
+    EDIT_INSTRUCTIONS
+)
+from .dashboard_edit import DashboardEditError, render_edit_prompt, parse_edit_blocks, apply_edit_blocks, unified_diff
+from .code_validation import ValidationResult, validate_code, repair_instruction
+from .smoke_testing import smoke_test_dashboard, check_smoke_test_environment, SmokeTestUnavailableError
+from .dashboard_sections import parse_plan, render_section_prompt, section_compiles, stitch
+from .profiler import StreamingProfiler, render_profile
+from .sampling import representative_sample, StreamingSampler
+
+logger = logging.getLogger(__name__)
+
+# Identificador usado na fila justa do agendador quando o chamador não se identifica
+ANONYMOUS_USER = "anonymous"
+
+
+def profile_file_in_stream(path: str) -> CachedProfile:
+    """
+    Perfil e amostra de um dataset em disco em uma única passada por blocos, sem
+    materializar o DataFrame (sketches + amostragem por reservatório).
+    """
+    profiler = StreamingProfiler()
+    sampler = StreamingSampler(settings.PROMPT_MAX_SAMPLE_ROWS)
+    with open(path, "rb") as f:
+        for chunk in iter_file_chunks(f, path):
+            profiler.update(chunk)
+            sampler.update(chunk)
+    return CachedProfile(
+        description=render_profile(profiler.to_profile()),
+        sample_pool=sampler.result(),
+        total_rows=profiler.rows
+    )
+
+
+def get_profile(source, dataset_id: str) -> CachedProfile:
+    # Perfil e amostra são reaproveitados entre gerações do mesmo dataset
+    cached = profile_cache.get(dataset_id)
+    if cached is not None:
+        logger.info(f"Perfil do dataset {dataset_id} obtido do cache")
+        return cached
+
+    if isinstance(source, str):
+        cached = profile_file_in_stream(source)
+    else:
+        # Pool de linhas candidatas à amostra; o tamanho final depende do orçamento de tokens
+        cached = CachedProfile(
+            description=generate_data_description(source),
+            sample_pool=representative_sample(source, settings.PROMPT_MAX_SAMPLE_ROWS),
+            total_rows=len(source)
+        )
+    profile_cache.put(dataset_id, cached)
+    logger.info("Generated data description")
+    return cached
+
+
+def prepare_prompt(source, model_choice: AIModelEnum, dataset_id: str, token_budget: Optional[int] = None) -> str:
+    """
+    Etapa CPU-bound da geração: perfil do dataset, amostragem e montagem do prompt.
+    Retorna a parte variável do prompt; as instruções fixas são DASHBOARD_INSTRUCTIONS.
+
+    :param token_budget: orçamento de tokens de entrada (padrão: o do provedor).
+    """
+    cached = get_profile(source, dataset_id)
+
+    data_description = cached.description
+
+    # Criação do prompt dentro do orçamento de tokens do modelo
+    plan = build_dashboard_prompt(
+        data_description, cached.sample_pool, cached.total_rows, model_choice, token_budget=token_budget
+    )
+
+    logger.info(
+        f"Prompt criado para geração do dashboard: {plan.sample_rows}/{plan.total_rows} linhas, "
+        f"~{plan.estimated_tokens} tokens (orçamento {plan.token_budget}), "
+        f"{plan.truncated_cells} células truncadas"
+    )
+    logger.info("Descricao dos Dados: \n" + data_description)
+    logger.debug(f"Prompt: {plan.prompt}")
+    return plan.prompt
+
+
+def create_ai_client(model_choice: AIModelEnum, tier: str = MODEL_TIER_PRIMARY) -> AsyncAIModel:
+    # Clientes compartilhados pelo processo, com pool de conexões keep-alive
+    client = provider_registry.get(model_choice, tier)
+    logger.info(f"Usando {type(client).__name__} para gerar o código do dashboard")
+    return client
+
+
+def store_generation(
+    dashboard_code: str,
+    source,
+    dataset_id: str,
+    prompt: str,
+    model_choice: AIModelEnum,
+    tier: str = MODEL_TIER_PRIMARY,
+    parent_id: Optional[str] = None,
+    system: str = DASHBOARD_INSTRUCTIONS
+) -> dict:
+    # Armazenar o código gerado e obter um UUID
+    unique_id = store_dashboard_code(dashboard_code, preview_data=source, dataset_id=dataset_id, parent_id=parent_id)
+    logger.info(f"Dashboard code armazenado com UUID: {unique_id}")
+
+    # Certificar-se de que o diretório 'prompts' existe
+    os.makedirs('prompts', exist_ok=True)
+
+    # Armazenar prompt num .txt
+    with open(f"prompts/{unique_id}.txt", "w") as f:
+        f.write(f"{system}\n\n{prompt}")
+
+    # Retornar o código e o UUID para o frontend
+    return {
+        "unique_id": unique_id,
+        "dataset_id": dataset_id,
+        "dashboard_code": dashboard_code,
+        "model": model_choice.value,
+        # Nível que atendeu a geração: "primary" ou "fallback" (prazo esgotado)
+        "tier": tier,
+        "model_name": tier_model(model_choice, tier)[0]
+    }
+
+
+async def complete_prompt(
+    model_choice: AIModelEnum,
+    prompt: str,
+    use_cache: bool = True,
+    user: str = ANONYMOUS_USER,
+    system: Optional[str] = DASHBOARD_INSTRUCTIONS,
+    tier: str = MODEL_TIER_PRIMARY,
+    store: bool = True
+) -> str:
+    """
+    Resposta do LLM para o prompt, consultando antes o cache persistente de respostas.
+    Com use_cache=False a consulta é ignorada, mas a nova resposta atualiza o cache.
+    Chamadas concorrentes com o mesmo prompt são agrupadas em uma única chamada, que
+    passa pelo agendador do provedor (limites de concorrência e de taxa, repetições).
+
+    :param system: prefixo estável do prompt (por padrão, as instruções de geração do dashboard).
+    :param tier: nível do modelo (MODEL_TIER_PRIMARY ou MODEL_TIER_FALLBACK).
+    :param store: armazena a resposta no cache. Com False, o chamador a armazena depois de
+        validá-la (ver `cache_response`), para que respostas inválidas não sejam repetidas.
+    """
+    client = create_ai_client(model_choice, tier)
+    key = cache_key(client, prompt, system)
+    if use_cache:
+        cached = await run_in_threadpool(llm_cache.get, key)
+        if cached is not None:
+            logger.info(f"Resposta do LLM obtida do cache ({key[:12]})")
+            return cached
+    else:
+        llm_cache.record_bypass()
+
+    async def call_provider():
+        response = await llm_scheduler.run(
+            model_choice, user, estimate_tokens((system or "") + prompt),
+            lambda: client.generate_response(prompt, system)
+        )
+        if store:
+            await run_in_threadpool(llm_cache.put, key, client.model, response)
+        return response
+
+    # Prompts idênticos em andamento compartilham a mesma chamada ao provedor
+    return await llm_single_flight.do(key, call_provider)
+
+
+async def cache_response(
+    model_choice: AIModelEnum,
+    prompt: str,
+    response: str,
+    system: Optional[str] = DASHBOARD_INSTRUCTIONS,
+    tier: str = MODEL_TIER_PRIMARY
+):
+    """
+    Armazena no cache, sob a chave do prompt, uma resposta já validada (por exemplo, o
+    código corrigido em vez da resposta original do modelo).
+    """
+    client = create_ai_client(model_choice, tier)
+    await run_in_threadpool(llm_cache.put, cache_key(client, prompt, system), client.model, response)
+
+
+async def discard_cached_response(
+    model_choice: AIModelEnum,
+    prompt: str,
+    system: Optional[str] = DASHBOARD_INSTRUCTIONS,
+    tier: str = MODEL_TIER_PRIMARY
+):
+    # Resposta do cache rejeitada na validação: a próxima tentativa chama o modelo de novo
+    client = create_ai_client(model_choice, tier)
+    await run_in_threadpool(llm_cache.delete, cache_key(client, prompt, system))
+
+
+class InvalidDashboardCode(Exception):
+    pass
+
+
+def other_provider(model_choice: AIModelEnum) -> AIModelEnum:
+    return AIModelEnum.OPENAI if model_choice == AIModelEnum.CLAUDE else AIModelEnum.CLAUDE
+
+
+async def complete_hedged(
+    source,
+    primary: AIModelEnum,
+    dataset_id: str,
+    prompt: str,
+    use_cache: bool = True,
+    user: str = ANONYMOUS_USER,
+    delay: Optional[float] = None
+):
+    """
+    Geração "hedged": envia o prompt ao provedor principal e, se não houver resposta
+    válida em `delay` segundos (ou se ele falhar antes), também ao outro provedor. Vale a
+    primeira resposta que passa em `is_valid_dashboard_code`; a chamada perdedora é
+    cancelada. Retorna (provedor vencedor, prompt usado, código limpo).
+    """
+    delay = settings.LLM_HEDGE_DELAY_SECONDS if delay is None else delay
+    started = time.monotonic()
+
+    async def attempt(model_choice: AIModelEnum, model_prompt: Optional[str]):
+        if model_prompt is None:
+            # O prompt depende do orçamento de tokens do modelo; o perfil vem do cache
+            model_prompt = await run_in_threadpool(prepare_prompt, source, model_choice, dataset_id)
+        code = clean_dashboard_code(await complete_prompt(model_choice, model_prompt, use_cache, user, store=False))
+        metrics.observe(f"llm_hedge_latency_seconds.{model_choice.value}", time.monotonic() - started)
+        if not is_valid_dashboard_code(code):
+            raise InvalidDashboardCode(f"Código inválido gerado por {model_choice.value}")
+        return model_choice, model_prompt, code
+
+    pending = {asyncio.ensure_future(attempt(primary, prompt))}
+    hedged = False
+    last_error = None
+    try:
+        while pending:
+            timeout = None if hedged else max(0.0, delay - (time.monotonic() - started))
+            done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    winner, winner_prompt, code = task.result()
+                    metrics.increment(f"llm_hedge_wins.{winner.value}")
+                    logger.info(
+                        f"Geração hedged vencida por {winner.value} em {time.monotonic() - started:.1f}s"
+                        f"{' (hedge disparado)' if hedged else ''}"
+                    )
+                    return winner, winner_prompt, code
+                last_error = task.exception()
+                logger.warning(f"Tentativa da geração hedged falhou: {last_error}")
+            if not hedged:
+                # Atraso esgotado ou falha do principal: dispara o outro provedor
+                hedged = True
+                metrics.increment("llm_hedges_fired")
+                secondary = other_provider(primary)
+                logger.info(f"Disparando hedge para {secondary.value}")
+                pending.add(asyncio.ensure_future(attempt(secondary, None)))
+        raise last_error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def validate_and_repair(
+    dashboard_code: str,
+    columns,
+    model_choice: AIModelEnum,
+    use_cache: bool = True,
+    user: str = ANONYMOUS_USER
+):
+    """
+    Valida o código gerado (ver code_validation) e, havendo problemas, pede ao modelo uma
+    correção pontual, com os problemas encontrados e em blocos de busca/substituição, em
+    vez de uma nova geração completa. São feitas até VALIDATION_MAX_REPAIRS tentativas.
+
+    Erros (sintaxe, compilação, streamlit ausente) e colunas inexistentes (nem nos dados,
+    nem criadas pelo código) motivam correções, mas só os erros invalidam o código: as
+    colunas vêm de uma heurística sujeita a falsos positivos e, se persistirem, são
+    devolvidas como avisos. Uma correção que introduz erros em um código válido é descartada.
+
+    Retorna (código, relatório com erros, avisos, correções e o tempo de cada etapa).
+    Levanta InvalidDashboardCode se o código continuar inválido.
+    """
+    timings = {"validation": 0.0, "repair": 0.0}
+
+    async def validate(code: str) -> ValidationResult:
+        started = time.monotonic()
+        result = await validate_code(code, columns)
+        timings["validation"] += time.monotonic() - started
+        return result
+
+    result = await validate(dashboard_code)
+    repairs = 0
+    while result.problems and repairs < settings.VALIDATION_MAX_REPAIRS:
+        repairs += 1
+        metrics.increment("code_repairs")
+        logger.info(f"Código gerado com problemas ({'; '.join(result.problems)}); correção {repairs}")
+        started = time.monotonic()
+        try:
+            # Só a primeira tentativa consulta o cache: as seguintes repetiriam a mesma resposta
+            repair_prompt = render_edit_prompt(dashboard_code, repair_instruction(result, columns))
+            response = await complete_prompt(
+                model_choice, repair_prompt, use_cache and repairs == 1, user, system=EDIT_INSTRUCTIONS, store=False
+            )
+            repaired = apply_edit_blocks(dashboard_code, parse_edit_blocks(response))
+        except DashboardEditError as e:
+            logger.warning(f"Correção {repairs} não aplicada: {e}")
+            continue
+        finally:
+            timings["repair"] += time.monotonic() - started
+        repaired_result = await validate(repaired)
+        if result.ok and not repaired_result.ok:
+            logger.warning(f"Correção {repairs} descartada: introduziu erros ({'; '.join(repaired_result.errors)})")
+            continue
+        dashboard_code, result = repaired, repaired_result
+        if result.ok:
+            # Só correções que resolvem os erros são reaproveitadas
+            await cache_response(model_choice, repair_prompt, response, system=EDIT_INSTRUCTIONS)
+
+    metrics.observe("generation_stage_seconds.validation", timings["validation"])
+    if repairs:
+        metrics.observe("generation_stage_seconds.repair", timings["repair"])
+    if not result.ok:
+        metrics.increment("code_validation_failures")
+        raise InvalidDashboardCode(f"Código gerado inválido: {'; '.join(result.errors)}")
+    return dashboard_code, {
+        "errors": result.errors,
+        "warnings": result.warnings,
+        "repairs": repairs,
+        "validation_seconds": timings["validation"],
+        "repair_seconds": timings["repair"],
+    }
+
+
+def smoke_test_requested(smoke_test: Optional[bool] = None) -> bool:
+    return settings.SMOKE_TEST_ENABLED if smoke_test is None else smoke_test
+
+
+async def ensure_smoke_test_available(smoke_test: Optional[bool] = None):
+    # Sandbox indisponível: a requisição falha antes de gastar uma chamada ao LLM
+    if smoke_test_requested(smoke_test):
+        await check_smoke_test_environment()
+
+
+async def smoke_test_or_reject(dashboard_code: str, source, smoke_test: Optional[bool] = None) -> Optional[dict]:
+    """
+    Execução headless opcional do dashboard (ver smoke_testing; padrão SMOKE_TEST_ENABLED).
+    Retorna o relatório (status, exceções, tempo e pico de memória) ou None se desativada;
+    levanta InvalidDashboardCode se o dashboard falhar e SmokeTestUnavailableError se o
+    sandbox não estiver disponível.
+    """
+    if not smoke_test_requested(smoke_test):
+        return None
+    result = await smoke_test_dashboard(dashboard_code, source)
+    if result.rejected:
+        detail = result.exceptions[0] if result.exceptions else ""
+        raise InvalidDashboardCode(f"Dashboard rejeitado na execução de teste ({result.status}): {detail}")
+    return result.to_dict()
+
+
+async def complete_sectioned(
+    source,
+    model_choice: AIModelEnum,
+    dataset_id: str,
+    prompt: str,
+    use_cache: bool = True,
+    user: str = ANONYMOUS_USER
+) -> str:
+    """
+    Geração por seções (ver dashboard_sections): um plano curto do layout, pedido ao
+    modelo de fallback (mais rápido), e as seções do plano geradas em paralelo pelo modelo
+    principal. O tempo total fica limitado pela seção mais longa, e não pela soma.
+    Retorna o código costurado.
+    """
+    started = time.monotonic()
+    pool = (await run_in_threadpool(get_profile, source, dataset_id)).sample_pool
+    plan_text = await complete_prompt(
+        model_choice, prompt, use_cache, user, system=SECTION_PLAN_INSTRUCTIONS, tier=MODEL_TIER_FALLBACK
+    )
+    plan = parse_plan(plan_text, pool)
+    plan_seconds = time.monotonic() - started
+    metrics.observe("sectioned_plan_seconds", plan_seconds)
+    logger.info(f"Plano com {len(plan.sections)} seções: {', '.join(section.id for section in plan.sections)}")
+
+    async def generate_section(section):
+        section_started = time.monotonic()
+        section_prompt = render_section_prompt(prompt, plan, section)
+        body = clean_dashboard_code(await complete_prompt(
+            model_choice, section_prompt, use_cache, user, system=SECTION_INSTRUCTIONS, store=False
+        ))
+        elapsed = time.monotonic() - section_started
+        metrics.observe("sectioned_section_seconds", elapsed)
+        # Seções inválidas viram um aviso no app e não são reaproveitadas do cache
+        if section_compiles(section, body):
+            await cache_response(model_choice, section_prompt, body, system=SECTION_INSTRUCTIONS)
+        return body, elapsed
+
+    tasks = [asyncio.ensure_future(generate_section(section)) for section in plan.sections]
+    try:
+        results = await asyncio.gather(*tasks)
+    finally:
+        # Se uma seção falhar, as demais deixam de ser necessárias
+        for task in tasks:
+            task.cancel()
+
+    code = await run_in_threadpool(stitch, plan, pool, [body for body, _ in results])
+    durations = [elapsed for _, elapsed in results]
+    metrics.observe("sectioned_generation_seconds", time.monotonic() - started)
+    logger.info(
+        f"Dashboard gerado por seções em {time.monotonic() - started:.1f}s: plano {plan_seconds:.1f}s, "
+        f"seção mais longa {max(durations):.1f}s, soma das seções {sum(durations):.1f}s"
+    )
+    return code
+
+
+async def complete_fallback(
+    source,
+    model_choice: AIModelEnum,
+    dataset_id: str,
+    use_cache: bool = True,
+    user: str = ANONYMOUS_USER
+):
+    """
+    Geração no nível de fallback: modelo mais rápido do mesmo provedor, com orçamento de
+    saída menor e prompt reduzido (LLM_FALLBACK_PROMPT_TOKEN_BUDGET), limitada a
+    LLM_FALLBACK_TIMEOUT_SECONDS. Retorna (prompt usado, código limpo).
+    """
+    prompt = await run_in_threadpool(
+        prepare_prompt, source, model_choice, dataset_id, settings.LLM_FALLBACK_PROMPT_TOKEN_BUDGET
+    )
+    try:
+        response = await asyncio.wait_for(
+            complete_prompt(model_choice, prompt, use_cache, user, tier=MODEL_TIER_FALLBACK, store=False),
+            settings.LLM_FALLBACK_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        metrics.increment(f"llm_fallback_timeouts.{model_choice.value}")
+        raise LLMUnavailableError(
+            504, f"Provedor {model_choice.value} não respondeu dentro do prazo, nem no modelo de fallback."
+        )
+    return prompt, clean_dashboard_code(response)
+
+
+async def generate_dashboard(
+    source,
+    model_choice: AIModelEnum,
+    dataset_id: str,
+    use_cache: bool = True,
+    user: str = ANONYMOUS_USER,
+    hedge: bool = False,
+    hedge_delay: Optional[float] = None,
+    deadline: Optional[float] = None,
+    sectioned: bool = False,
+    smoke_test: Optional[bool] = None
+) -> dict:
+    """
+    Pipeline comum de geração: amostragem, descrição dos dados, prompt, LLM e armazenamento.
+
+    As etapas CPU-bound e de disco rodam no threadpool; a chamada ao LLM é assíncrona,
+    de modo que gerações em andamento não ocupam threads enquanto aguardam o provedor.
+
+    :param source: DataFrame ou caminho de um dataset em disco (upload processado em streaming).
+    :param hedge: dispara o outro provedor após `hedge_delay` segundos (ver `complete_hedged`).
+    :param deadline: prazo em segundos (padrão LLM_DEADLINE_SECONDS; 0 = sem prazo). Esgotado,
+        a chamada ao modelo principal é abandonada e a geração segue no nível de fallback
+        (ver `complete_fallback`); o nível que atendeu é informado em "tier".
+    :param sectioned: gera o dashboard por seções, em paralelo (ver `complete_sectioned`).
+    :param smoke_test: executa o dashboard antes de armazená-lo (ver `smoke_test_or_reject`).
+    """
+    deadline = settings.LLM_DEADLINE_SECONDS if deadline is None else deadline
+    started = time.monotonic()
+    await ensure_smoke_test_available(smoke_test)
+    prompt = await run_in_threadpool(prepare_prompt, source, model_choice, dataset_id)
+
+    async def complete_primary():
+        if sectioned:
+            return model_choice, prompt, await complete_sectioned(source, model_choice, dataset_id, prompt, use_cache, user)
+        if hedge:
+            return await complete_hedged(source, model_choice, dataset_id, prompt, use_cache, user, hedge_delay)
+        code = await complete_prompt(model_choice, prompt, use_cache, user, store=False)
+        return model_choice, prompt, clean_dashboard_code(code)
+
+    # Chamar o cliente de IA para gerar o código do dashboard
+    #dashboard_code = fake_code()
+    tier = MODEL_TIER_PRIMARY
+    try:
+        if deadline:
+            # O prazo conta desde o início da requisição, incluindo a montagem do prompt
+            remaining = max(0.0, deadline - (time.monotonic() - started))
+            model_choice, prompt, dashboard_code = await asyncio.wait_for(complete_primary(), remaining)
+        else:
+            model_choice, prompt, dashboard_code = await complete_primary()
+    except asyncio.TimeoutError:
+        tier = MODEL_TIER_FALLBACK
+        metrics.increment(f"llm_deadline_exceeded.{model_choice.value}")
+        logger.warning(f"Prazo de {deadline:g}s esgotado em {model_choice.value}; usando o modelo de fallback")
+        prompt, dashboard_code = await complete_fallback(source, model_choice, dataset_id, use_cache, user)
+    metrics.increment(f"generations_served.{tier}")
+    metrics.observe(f"generation_latency_seconds.{tier}", time.monotonic() - started)
+    logger.info("Dashboard code gerado com sucesso")
+
+    # Código quebrado é corrigido antes de ser armazenado (e baixado)
+    columns = (await run_in_threadpool(get_profile, source, dataset_id)).sample_pool.columns
+    try:
+        dashboard_code, validation = await validate_and_repair(dashboard_code, columns, model_choice, use_cache, user)
+        smoke = await smoke_test_or_reject(dashboard_code, source, smoke_test)
+    except InvalidDashboardCode:
+        if not sectioned:
+            await discard_cached_response(model_choice, prompt, tier=tier)
+        raise
+    if not sectioned:
+        # O cache guarda o código validado (e corrigido), não a resposta original do modelo
+        await cache_response(model_choice, prompt, dashboard_code, tier=tier)
+
+    result = await run_in_threadpool(store_generation, dashboard_code, source, dataset_id, prompt, model_choice, tier)
+    return {**result, "validation": validation, "smoke_test": smoke}
+
+
+async def edit_dashboard(
+    unique_id: str,
+    instruction: str,
+    model_choice: AIModelEnum,
+    use_cache: bool = True,
+    user: str = ANONYMOUS_USER,
+    smoke_test: Optional[bool] = None
+) -> dict:
+    """
+    Edição incremental de um dashboard armazenado: envia ao modelo só o código (ou os
+    trechos relevantes) e o pedido, aplica os blocos de busca/substituição retornados e
+    armazena o resultado como nova versão, apontando para a anterior.
+
+    Retorna o mesmo formato de `generate_dashboard`, com o novo unique_id, a versão, o
+    unique_id de origem e o diff aplicado. Levanta DashboardEditError se a edição não
+    puder ser aplicada.
+    """
+    entry = get_dashboard_entry(unique_id)
+    if entry is None:
+        raise ValueError("Dashboard não encontrado ou expirado.")
+    await ensure_smoke_test_available(smoke_test)
+
+    started = time.monotonic()
+    prompt = render_edit_prompt(entry["code"], instruction)
+    response = await complete_prompt(model_choice, prompt, use_cache, user, system=EDIT_INSTRUCTIONS, store=False)
+    blocks = parse_edit_blocks(response)
+    dashboard_code = apply_edit_blocks(entry["code"], blocks)
+    columns = (await run_in_threadpool(get_profile, entry["table_data"], entry["dataset_id"])).sample_pool.columns
+    validation = await validate_code(dashboard_code, columns)
+    if not validation.ok:
+        raise DashboardEditError(f"A edição gerou um código inválido: {'; '.join(validation.errors)}")
+    try:
+        smoke = await smoke_test_or_reject(dashboard_code, entry["table_data"], smoke_test)
+    except InvalidDashboardCode as e:
+        raise DashboardEditError(str(e))
+    await cache_response(model_choice, prompt, response, system=EDIT_INSTRUCTIONS)
+    metrics.observe("dashboard_edit_seconds", time.monotonic() - started)
+    metrics.observe("dashboard_edit_output_chars", len(response))
+    logger.info(
+        f"Dashboard {unique_id} editado: {len(blocks)} blocos, resposta de {len(response)} caracteres "
+        f"para um código de {len(dashboard_code)}"
+    )
+
+    result = await run_in_threadpool(
+        store_generation, dashboard_code, entry["table_data"], entry["dataset_id"], prompt, model_choice,
+        parent_id=unique_id, system=EDIT_INSTRUCTIONS
+    )
+    stored = get_dashboard_entry(result["unique_id"])
+    return {
+        **result,
+        "parent_id": unique_id,
+        "version": stored["version"] if stored else None,
+        "diff": unified_diff(entry["code"], dashboard_code),
+        "validation": {"errors": validation.errors, "warnings": validation.warnings},
+        "smoke_test": smoke
+    }
+
+
+async def stream_dashboard(
+    source,
+    model_choice: AIModelEnum,
+    dataset_id: str,
+    use_cache: bool = True,
+    user: str = ANONYMOUS_USER
+):
+    """
+    Variante em streaming de `generate_dashboard`: gerador assíncrono de eventos
+    ("delta" com o código já limpo, à medida que chega, e "done" ao final).
+
+    O código completo só é validado (e corrigido, ver `validate_and_repair`) quando o
+    modelo termina a resposta; se a correção alterar o código já enviado, o código final
+    segue em um evento "replace". Código que continua inválido não é armazenado
+    (InvalidDashboardCode). Em um acerto do cache de respostas, o código é enviado em um
+    único evento.
+    """
+    prompt = await run_in_threadpool(prepare_prompt, source, model_choice, dataset_id)
+
+    cleaner = DashboardCodeCleaner()
+    parts = []
+    client = create_ai_client(model_choice)
+    key = cache_key(client, prompt, DASHBOARD_INSTRUCTIONS)
+    cached = await run_in_threadpool(llm_cache.get, key) if use_cache else None
+    if not use_cache:
+        llm_cache.record_bypass()
+
+    if cached is not None:
+        logger.info(f"Resposta do LLM obtida do cache ({key[:12]})")
+        cleaned = cleaner.feed(cached)
+        if cleaned:
+            parts.append(cleaned)
+            yield {"event": "delta", "data": {"text": cleaned}}
+    else:
+        # O stream ocupa uma vaga do provedor até terminar; não há repetição após o início
+        async with llm_scheduler.slot(model_choice, user, estimate_tokens(DASHBOARD_INSTRUCTIONS + prompt)):
+            try:
+                async for text in client.stream_response(prompt, DASHBOARD_INSTRUCTIONS):
+                    cleaned = cleaner.feed(text)
+                    if cleaned:
+                        parts.append(cleaned)
+                        yield {"event": "delta", "data": {"text": cleaned}}
+            except (asyncio.CancelledError, GeneratorExit):
+                # Stream interrompido (cliente desconectado): a conexão com o provedor é fechada
+                metrics.increment("llm_calls_cancelled")
+                raise
+
+    cleaned = cleaner.finish()
+    if cleaned:
+        parts.append(cleaned)
+        yield {"event": "delta", "data": {"text": cleaned}}
+    logger.info("Dashboard code gerado com sucesso (streaming)")
+
+    streamed_code = ''.join(parts)
+    # O código enviado pode estar quebrado: é corrigido antes de ser armazenado (e baixado)
+    columns = (await run_in_threadpool(get_profile, source, dataset_id)).sample_pool.columns
+    try:
+        dashboard_code, validation = await validate_and_repair(streamed_code, columns, model_choice, use_cache, user)
+    except InvalidDashboardCode:
+        await run_in_threadpool(llm_cache.delete, key)
+        raise
+    if dashboard_code != streamed_code:
+        yield {"event": "replace", "data": {"text": dashboard_code}}
+    if cached is None or dashboard_code != streamed_code:
+        await run_in_threadpool(llm_cache.put, key, client.model, dashboard_code)
+    result = await run_in_threadpool(store_generation, dashboard_code, source, dataset_id, prompt, model_choice)
+    yield {
+        "event": "done",
+        "data": {
+            "unique_id": result["unique_id"],
+            "dataset_id": dataset_id,
+            "validation": validation
+        }
+    }
+
+
@@ -0,0 +1,340 @@
+"""
+Gerações assíncronas (jobs) com fila persistente.
+
+`POST /generate-dashboard/jobs` registra o job e retorna imediatamente; um pool limitado
+de workers no event loop executa o pipeline de geração (perfil → prompt → LLM →
+armazenamento). Jobs e seus estados (queued/running/done/failed) ficam em SQLite, e o
+dataset de cada job é gravado em disco: após um reinício, jobs na fila ou interrompidos
+durante a execução voltam para a fila.
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import List, Optional
+
+import pandas as pd
+from starlette.concurrency import run_in_threadpool
+
+from ..core.config import settings
+from ..models import AIModelEnum
+from . import metrics
+from .dataset_registry import get_dataset, retain_dataset_file, release_dataset_file
+from .generation import generate_dashboard, InvalidDashboardCode
+from .smoke_testing import SmokeTestUnavailableError
+from .llm_scheduler import LLMUnavailableError
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+JOB_DATASET_DIR = os.path.join(settings.DATASET_STORAGE_DIR, "jobs")
+
+
+class JobQueueFullError(Exception):
+    pass
+
+
+class JobStore:
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        # Conexão única, aberta sob demanda e protegida pelo lock (chamadas vêm do threadpool)
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS generation_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    dataset_id TEXT NOT NULL,
+                    dataset_path TEXT,
+                    owns_dataset INTEGER NOT NULL,
+                    params TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    error_status INTEGER,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_generation_jobs_status ON generation_jobs (status, created_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _execute(self, query: str, args=()):
+        with self._lock:
+            conn = self._connection()
+            cursor = conn.execute(query, args)
+            conn.commit()
+            return cursor
+
+    def create(self, job_id: str, dataset_id: str, dataset_path: Optional[str], owns_dataset: bool, params: dict):
+        self._execute(
+            "INSERT INTO generation_jobs (job_id, status, dataset_id, dataset_path, owns_dataset, params, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, JOB_QUEUED, dataset_id, dataset_path, int(owns_dataset), json.dumps(params), time.time())
+        )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._connection().execute("SELECT * FROM generation_jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def mark_running(self, job_id: str):
+        self._execute(
+            "UPDATE generation_jobs SET status = ?, started_at = ?, attempts = attempts + 1 WHERE job_id = ?",
+            (JOB_RUNNING, time.time(), job_id)
+        )
+
+    def mark_done(self, job_id: str, result: dict):
+        self._execute(
+            "UPDATE generation_jobs SET status = ?, result = ?, finished_at = ? WHERE job_id = ?",
+            (JOB_DONE, json.dumps(result), time.time(), job_id)
+        )
+
+    def mark_failed(self, job_id: str, error: str, error_status: int):
+        self._execute(
+            "UPDATE generation_jobs SET status = ?, error = ?, error_status = ?, finished_at = ? WHERE job_id = ?",
+            (JOB_FAILED, error, error_status, time.time(), job_id)
+        )
+
+    def recover(self) -> List[str]:
+        """
+        Devolve à fila os jobs interrompidos por um reinício e retorna os ids na fila,
+        em ordem de criação.
+        """
+        self._execute("UPDATE generation_jobs SET status = ? WHERE status = ?", (JOB_QUEUED, JOB_RUNNING))
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT job_id FROM generation_jobs WHERE status = ? ORDER BY created_at", (JOB_QUEUED,)
+            ).fetchall()
+        return [row["job_id"] for row in rows]
+
+    def delete_finished_before(self, timestamp: float) -> int:
+        return self._execute(
+            "DELETE FROM generation_jobs WHERE status IN (?, ?) AND finished_at < ?",
+            (JOB_DONE, JOB_FAILED, timestamp)
+        ).rowcount
+
+    def count_by_status(self) -> dict:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT status, COUNT(*) AS total FROM generation_jobs GROUP BY status"
+            ).fetchall()
+        return {row["status"]: row["total"] for row in rows}
+
+
+def _persist_job_dataset(job_id: str, df: pd.DataFrame) -> str:
+    """
+    Grava a cópia do dataset do job e retorna o caminho. Parquet não aceita colunas object
+    com tipos misturados (comuns em planilhas, ex.: códigos numéricos e textuais); nesse
+    caso o DataFrame é gravado com pickle, que preserva os dados como recebidos.
+    """
+    os.makedirs(JOB_DATASET_DIR, exist_ok=True)
+    path = os.path.join(JOB_DATASET_DIR, f"{job_id}.parquet")
+    try:
+        df.to_parquet(path, index=False)
+        return path
+    except (TypeError, ValueError) as e:
+        # Erros do pyarrow (ArrowTypeError, ArrowInvalid) derivam de TypeError/ValueError
+        logger.info(f"Dataset do job {job_id} não cabe em Parquet ({e}); gravando com pickle")
+        if os.path.exists(path):
+            os.remove(path)
+    path = os.path.join(JOB_DATASET_DIR, f"{job_id}.pkl")
+    df.to_pickle(path)
+    return path
+
+
+def _remove_job_dataset(job: dict):
+    if job["owns_dataset"] and job["dataset_path"] and os.path.exists(job["dataset_path"]):
+        os.remove(job["dataset_path"])
+
+
+def _load_job_source(job: dict):
+    # O registro em memória é preferido; após um reinício, usa a cópia em disco do job
+    source = get_dataset(job["dataset_id"])
+    if source is not None:
+        return source
+    path = job["dataset_path"]
+    if path and os.path.exists(path):
+        if path.endswith(".parquet"):
+            return pd.read_parquet(path)
+        if path.endswith(".pkl"):
+            return pd.read_pickle(path)
+        return path
+    raise ValueError("Dataset do job não está mais disponível.")
+
+
+class JobRunner:
+    def __init__(self, store: JobStore, workers: int, max_queued: int):
+        self.store = store
+        self.workers = workers
+        self.max_queued = max_queued
+        self.running = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # Jobs com referência ao arquivo de um dataset em streaming (ver dataset_registry)
+        self._retained = set()
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        for job_id in await run_in_threadpool(self.store.recover):
+            self._queue.put_nowait(job_id)
+        if self._queue.qsize():
+            logger.info(f"{self._queue.qsize()} jobs de geração recuperados da fila persistente")
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self):
+        # Jobs em execução são interrompidos e voltam para a fila no próximo start
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, source, dataset_id: str, params: dict) -> str:
+        if self._queue is None:
+            raise RuntimeError("Fila de jobs não iniciada.")
+        if self._queue.qsize() >= self.max_queued:
+            raise JobQueueFullError("Fila de jobs de geração cheia; tente novamente em instantes.")
+
+        job_id = uuid.uuid4().hex
+        if isinstance(source, str):
+            # Dataset processado em streaming: o arquivo já está em disco, sob o registro de datasets,
+            # e é mantido até o fim do job mesmo que o registro expire antes
+            retain_dataset_file(source)
+            try:
+                await run_in_threadpool(self.store.create, job_id, dataset_id, source, False, params)
+            except Exception:
+                release_dataset_file(source)
+                raise
+            self._retained.add(job_id)
+        else:
+            # Cópia própria do job, para que ele possa ser retomado após um reinício. O job só é
+            # registrado depois da gravação, para que uma falha não deixe na fila um job sem dados
+            path = await run_in_threadpool(_persist_job_dataset, job_id, source)
+            try:
+                await run_in_threadpool(self.store.create, job_id, dataset_id, path, True, params)
+            except Exception:
+                os.remove(path)
+                raise
+        self._queue.put_nowait(job_id)
+        metrics.increment("generation_jobs_submitted")
+        return job_id
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            self.running += 1
+            try:
+                await self._run(job_id)
+            except Exception as e:
+                # Falhas fora da geração (ex.: SQLite travado ou corrompido) não podem encerrar o worker
+                logger.exception(f"Erro ao executar o job {job_id}")
+                metrics.increment("generation_jobs_failed")
+                try:
+                    await run_in_threadpool(self.store.mark_failed, job_id, str(e), 500)
+                except Exception:
+                    logger.exception(f"Não foi possível registrar a falha do job {job_id}")
+            finally:
+                self.running -= 1
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        job = await run_in_threadpool(self.store.get, job_id)
+        if job is None or job["status"] != JOB_QUEUED:
+            return
+        if not job["owns_dataset"] and job["dataset_path"] and job_id not in self._retained:
+            # Job retomado após um reinício
+            retain_dataset_file(job["dataset_path"])
+            self._retained.add(job_id)
+        await run_in_threadpool(self.store.mark_running, job_id)
+        metrics.observe("generation_job_queue_seconds", time.time() - job["created_at"])
+        params = job["params"]
+        started = time.monotonic()
+        try:
+            source = await run_in_threadpool(_load_job_source, job)
+            result = await generate_dashboard(
+                source,
+                AIModelEnum(params["model"]),
+                job["dataset_id"],
+                use_cache=params["use_cache"],
+                user=params["user"],
+                hedge=params["hedge"],
+                hedge_delay=params["hedge_delay"],
+                # Em jobs a latência não é a restrição: só vale o prazo pedido no próprio job
+                # (jobs criados antes da opção existir não têm o campo)
+                deadline=params.get("deadline") or 0,
+                sectioned=params.get("sectioned", False),
+                smoke_test=params.get("smoke_test")
+            )
+            await run_in_threadpool(self.store.mark_done, job_id, result)
+            metrics.increment("generation_jobs_done")
+            logger.info(f"Job {job_id} concluído em {time.monotonic() - started:.1f}s")
+        except LLMUnavailableError as e:
+            logger.warning(f"Job {job_id} falhou: {e}")
+            await run_in_threadpool(self.store.mark_failed, job_id, str(e), e.status_code)
+            metrics.increment("generation_jobs_failed")
+        except InvalidDashboardCode as e:
+            logger.warning(f"Job {job_id} falhou: {e}")
+            await run_in_threadpool(self.store.mark_failed, job_id, str(e), 422)
+            metrics.increment("generation_jobs_failed")
+        except SmokeTestUnavailableError as e:
+            logger.warning(f"Job {job_id} falhou: {e}")
+            await run_in_threadpool(self.store.mark_failed, job_id, str(e), 503)
+            metrics.increment("generation_jobs_failed")
+        except Exception as e:
+            logger.exception(f"Job {job_id} falhou")
+            await run_in_threadpool(self.store.mark_failed, job_id, str(e), 400)
+            metrics.increment("generation_jobs_failed")
+        # Job finalizado: a cópia do dataset não é mais necessária (o state_store mantém o
+        # DataFrame). Se o worker for interrompido, a cópia fica para a retomada.
+        await run_in_threadpool(_remove_job_dataset, job)
+        if job_id in self._retained:
+            self._retained.discard(job_id)
+            await run_in_threadpool(release_dataset_file, job["dataset_path"])
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "running": self.running,
+            "workers": self.workers,
+            "by_status": self.store.count_by_status(),
+        }
+
+
+def cleanup_expired_jobs():
+    while True:
+        time.sleep(600)  # Verifica a cada 10 minutos
+        removed = job_store.delete_finished_before(time.time() - settings.JOB_RETENTION_SECONDS)
+        if removed:
+            logger.info(f"{removed} jobs de geração expirados removidos")
+
+
+job_store = JobStore(settings.JOB_STORE_PATH)
+job_runner = JobRunner(job_store, settings.JOB_WORKERS, settings.JOB_MAX_QUEUED)
+metrics.register_gauge("generation_jobs", job_runner.stats)
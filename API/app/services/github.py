@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 from ..models import UserCreate, UserUpdate, UserInDB, TableData
 from ..core.config import settings
 from . import crud
+from .data_loader import write_dataset_csv
 import logging
 
 logger = logging.getLogger(__name__)
@@ -93,12 +94,9 @@ def github_oauth_callback(code: str, db: Session):
 
 def generate_dashboard_files(table_data: TableData, generated_code: str):
     try:        
-        # Criar DataFrame a partir dos dados da tabela
-        df = pd.DataFrame(table_data.data, columns=table_data.columns)
-        
-        # Criar conteúdo CSV usando um buffer de memória
+        # Criar conteúdo CSV usando um buffer de memória (TableData, DataFrame ou dataset em disco)
         csv_buffer = io.StringIO()
-        df.to_csv(csv_buffer, index=False)
+        write_dataset_csv(table_data, csv_buffer)
         csv_content = csv_buffer.getvalue()
 
         # Create the content of the files
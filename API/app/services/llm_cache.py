@@ -0,0 +1,163 @@
+"""
+Cache persistente de respostas do LLM em SQLite.
+
+A chave é o hash SHA-256 do provedor, do modelo, dos parâmetros da chamada, das
+instruções e do prompt normalizado: o mesmo dataset enviado de novo (ou por outra
+pessoa) reaproveita a resposta sem nova chamada ao provedor. Entradas expiram após LLM_CACHE_TTL_SECONDS e,
+acima de LLM_CACHE_MAX_BYTES, as menos recentemente usadas são removidas.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import textwrap
+import threading
+import time
+from typing import Optional
+
+from ..core.config import settings
+from . import metrics
+from .llm_models import AsyncAIModel
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt(prompt: str) -> str:
+    """
+    Remove diferenças que não mudam o conteúdo do prompt: quebras de linha CRLF,
+    indentação comum, espaços no fim das linhas e nas extremidades.
+    """
+    prompt = prompt.replace("\r\n", "\n")
+    lines = [line.rstrip() for line in textwrap.dedent(prompt).split("\n")]
+    return "\n".join(lines).strip()
+
+
+def cache_key(client: AsyncAIModel, prompt: str, system: Optional[str] = None) -> str:
+    payload = {
+        "provider": type(client).__name__,
+        "model": client.model,
+        "params": client.params,
+        "system": normalize_prompt(system or ""),
+        "prompt": normalize_prompt(prompt),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    def __init__(self, path: str, ttl_seconds: int, max_bytes: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._conn = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Conexão única, aberta sob demanda e protegida pelo lock (chamadas vêm do threadpool)
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS llm_responses (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    response TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_accessed_at ON llm_responses (accessed_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute("UPDATE llm_responses SET accessed_at = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, model: str, response: str):
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, model, response, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, now, now)
+            )
+            self._evict(conn, now)
+            conn.commit()
+
+    def delete(self, key: str):
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        expired = conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl_seconds,)).rowcount
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        evicted = 0
+        if total > self.max_bytes:
+            # Remove as entradas menos recentemente usadas até voltar ao limite
+            rows = conn.execute("SELECT key, size FROM llm_responses ORDER BY accessed_at").fetchall()
+            keys = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                keys.append((key,))
+                total -= size
+            conn.executemany("DELETE FROM llm_responses WHERE key = ?", keys)
+            evicted = len(keys)
+        self.evictions += expired + evicted
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypasses += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "entries": entries,
+                "bytes": size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypasses": self.bypasses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+llm_cache = LLMResponseCache(settings.LLM_CACHE_PATH, settings.LLM_CACHE_TTL_SECONDS, settings.LLM_CACHE_MAX_BYTES)
+metrics.register_gauge("llm_cache", llm_cache.stats)
@@ -1,11 +1,15 @@
 import anthropic
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI
+import logging
 import os
 from dotenv import load_dotenv
 from abc import ABC, abstractmethod
+from . import metrics
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 class AIModel(ABC):
     @abstractmethod
     def generate_response(self, prompt):
@@ -38,4 +42,131 @@ class OpenAIClient(AIModel):
                 {"role": "user", "content": prompt}
             ]
         )
-        return response.choices[0].message.content
\ No newline at end of file
+        return response.choices[0].message.content
+
+def record_usage(provider, input_tokens, cached_tokens, cache_write_tokens=0):
+    """
+    Registra o uso de tokens de entrada, incluindo os servidos pelo cache de prompt do provedor.
+    """
+    input_tokens, cached_tokens, cache_write_tokens = input_tokens or 0, cached_tokens or 0, cache_write_tokens or 0
+    metrics.increment(f"llm_input_tokens.{provider}", input_tokens)
+    metrics.increment(f"llm_cached_input_tokens.{provider}", cached_tokens)
+    metrics.increment(f"llm_cache_write_tokens.{provider}", cache_write_tokens)
+    logger.info(
+        f"Uso de tokens ({provider}): entrada={input_tokens}, do cache de prompt={cached_tokens}, "
+        f"gravados no cache={cache_write_tokens}"
+    )
+
+class AsyncAIModel(ABC):
+    """
+    Variante assíncrona de AIModel: a chamada ao provedor não ocupa uma thread
+    enquanto aguarda a resposta.
+
+    `system` é o prefixo estável do prompt (instruções); `prompt` é a parte variável.
+    """
+    @abstractmethod
+    async def generate_response(self, prompt, system=None):
+        pass
+
+    @abstractmethod
+    def stream_response(self, prompt, system=None):
+        """
+        Gerador assíncrono com os trechos de texto da resposta, à medida que chegam.
+        """
+        pass
+
+    async def close(self):
+        # Libera as conexões HTTP do cliente do provedor
+        await self.client.close()
+
+class AsyncClaudeClient(AsyncAIModel):
+    def __init__(self, http_client=None, model="claude-3-5-sonnet-20240620", max_tokens=8000, max_retries=2):
+        # http_client permite compartilhar um pool de conexões configurado (ver llm_providers)
+        self.client = anthropic.AsyncAnthropic(
+            api_key=os.getenv("CLAUDE_API_KEY"),
+            http_client=http_client,
+            max_retries=max_retries,
+        )
+        self.model = model
+        self.params = {"max_tokens": max_tokens}
+
+    def _request(self, prompt, system):
+        # Pontos de cache (cache_control) no fim das instruções e no fim dos dados: as
+        # instruções são comuns a todas as chamadas e os dados se repetem em novas gerações
+        # do mesmo dataset
+        request = {
+            "model": self.model,
+            "messages": [
+                {"role": "user", "content": [
+                    {"type": "text", "text": prompt, "cache_control": {"type": "ephemeral"}}
+                ]}
+            ],
+            **self.params
+        }
+        if system:
+            request["system"] = [{"type": "text", "text": system, "cache_control": {"type": "ephemeral"}}]
+        return request
+
+    def _record_usage(self, usage):
+        record_usage(
+            "claude",
+            usage.input_tokens + (getattr(usage, "cache_read_input_tokens", 0) or 0)
+            + (getattr(usage, "cache_creation_input_tokens", 0) or 0),
+            getattr(usage, "cache_read_input_tokens", 0),
+            getattr(usage, "cache_creation_input_tokens", 0),
+        )
+
+    async def generate_response(self, prompt, system=None):
+        response = await self.client.messages.create(**self._request(prompt, system))
+        self._record_usage(response.usage)
+        return ''.join(block.text for block in response.content)
+
+    async def stream_response(self, prompt, system=None):
+        async with self.client.messages.stream(**self._request(prompt, system)) as stream:
+            async for text in stream.text_stream:
+                yield text
+            self._record_usage((await stream.get_final_message()).usage)
+
+class AsyncOpenAIClient(AsyncAIModel):
+    def __init__(self, http_client=None, model="o1-mini", max_tokens=None, max_retries=2):
+        self.client = AsyncOpenAI(
+            api_key=os.environ.get("OPENAI_API_KEY"),
+            http_client=http_client,
+            max_retries=max_retries,
+        )
+        self.model = model
+        self.params = {"max_completion_tokens": max_tokens} if max_tokens else {}
+
+    def _messages(self, prompt, system):
+        # O o1-mini não aceita mensagens de sistema: as instruções vão no início da mensagem,
+        # formando o prefixo estável usado pelo cache automático de prompt da OpenAI
+        content = f"{system}\n\n{prompt}" if system else prompt
+        return [{"role": "user", "content": content}]
+
+    def _record_usage(self, usage):
+        details = getattr(usage, "prompt_tokens_details", None)
+        record_usage("openai", usage.prompt_tokens, getattr(details, "cached_tokens", 0))
+
+    async def generate_response(self, prompt, system=None):
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(prompt, system),
+            **self.params
+        )
+        if response.usage:
+            self._record_usage(response.usage)
+        return response.choices[0].message.content
+
+    async def stream_response(self, prompt, system=None):
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(prompt, system),
+            stream=True,
+            stream_options={"include_usage": True},
+            **self.params
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+            if chunk.usage:
+                self._record_usage(chunk.usage)
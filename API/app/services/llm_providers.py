@@ -0,0 +1,148 @@
+"""
+Registro de clientes de LLM compartilhados pelo processo.
+
+Cada provedor tem um único cliente assíncrono, criado na inicialização da aplicação,
+com um pool de conexões keep-alive próprio. Requisições reaproveitam conexões TLS já
+abertas em vez de criar um cliente (e um handshake) por geração.
+
+Há dois níveis (tiers) de modelo por provedor: o principal e um modelo mais rápido e
+barato, com orçamento de saída menor, usado quando o prazo da requisição se esgota.
+Os dois compartilham o pool de conexões do provedor.
+"""
+import logging
+from typing import Dict, Tuple
+
+import anthropic
+import httpx
+import openai
+
+from ..core.config import settings
+from ..models import AIModelEnum
+from . import metrics
+from .llm_models import AsyncAIModel, AsyncClaudeClient, AsyncOpenAIClient
+from .llm_scheduler import llm_scheduler
+
+logger = logging.getLogger(__name__)
+
+MODEL_TIER_PRIMARY = "primary"
+MODEL_TIER_FALLBACK = "fallback"
+
+
+def _http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def _http_timeout(sdk):
+    # Usa a classe Timeout reexportada pelo SDK, compatível com o httpx que ele utiliza
+    return sdk.Timeout(settings.LLM_HTTP_TIMEOUT, connect=settings.LLM_HTTP_CONNECT_TIMEOUT)
+
+
+def tier_model(model_choice: AIModelEnum, tier: str) -> Tuple[str, int]:
+    """
+    Modelo e limite de tokens de saída de um provedor no nível (tier) informado.
+    """
+    if tier == MODEL_TIER_FALLBACK:
+        if model_choice == AIModelEnum.OPENAI:
+            return settings.LLM_FALLBACK_MODEL_OPENAI, settings.LLM_FALLBACK_MAX_TOKENS
+        return settings.LLM_FALLBACK_MODEL_CLAUDE, settings.LLM_FALLBACK_MAX_TOKENS
+    if model_choice == AIModelEnum.OPENAI:
+        return settings.LLM_MODEL_OPENAI, settings.LLM_MAX_TOKENS_OPENAI
+    return settings.LLM_MODEL_CLAUDE, settings.LLM_MAX_TOKENS_CLAUDE
+
+
+class ProviderRegistry:
+    def __init__(self):
+        self._clients: Dict[Tuple[AIModelEnum, str], AsyncAIModel] = {}
+        self._http_clients: Dict[AIModelEnum, httpx.AsyncClient] = {}
+        self._requests: Dict[AIModelEnum, int] = {}
+
+    def _sdk(self, model_choice: AIModelEnum):
+        if model_choice == AIModelEnum.CLAUDE:
+            return anthropic, AsyncClaudeClient
+        elif model_choice == AIModelEnum.OPENAI:
+            return openai, AsyncOpenAIClient
+        raise ValueError(f"Escolha de modelo não suportada: {model_choice}")
+
+    def _http_client(self, model_choice: AIModelEnum) -> httpx.AsyncClient:
+        http_client = self._http_clients.get(model_choice)
+        if http_client is not None:
+            return http_client
+
+        sdk, _ = self._sdk(model_choice)
+        self._requests[model_choice] = 0
+
+        async def count_request(request):
+            self._requests[model_choice] += 1
+
+        async def read_rate_limits(response):
+            llm_scheduler.observe_headers(model_choice, response.headers)
+
+        # Os clientes HTTP padrão de cada SDK mantêm os defaults do provedor (redirects, headers)
+        http_client = sdk.DefaultAsyncHttpxClient(
+            limits=_http_limits(),
+            timeout=_http_timeout(sdk),
+            event_hooks={"request": [count_request], "response": [read_rate_limits]},
+        )
+        self._http_clients[model_choice] = http_client
+        return http_client
+
+    def _build(self, model_choice: AIModelEnum, tier: str) -> AsyncAIModel:
+        _, client_cls = self._sdk(model_choice)
+        model, max_tokens = tier_model(model_choice, tier)
+        logger.info(f"Cliente de LLM criado para {model_choice.value} ({tier}: {model})")
+        # As repetições ficam a cargo do llm_scheduler, que conhece os limites de cada provedor
+        return client_cls(
+            http_client=self._http_client(model_choice), model=model, max_tokens=max_tokens, max_retries=0
+        )
+
+    def start(self):
+        """
+        Cria os clientes de todos os provedores e níveis (chamado na inicialização da aplicação).
+        """
+        for model_choice in AIModelEnum:
+            for tier in (MODEL_TIER_PRIMARY, MODEL_TIER_FALLBACK):
+                if (model_choice, tier) not in self._clients:
+                    self._clients[model_choice, tier] = self._build(model_choice, tier)
+
+    def get(self, model_choice: AIModelEnum, tier: str = MODEL_TIER_PRIMARY) -> AsyncAIModel:
+        client = self._clients.get((model_choice, tier))
+        if client is None:
+            # Fora do ciclo de vida da aplicação (scripts, testes) o cliente é criado sob demanda
+            client = self._clients[model_choice, tier] = self._build(model_choice, tier)
+        return client
+
+    async def close(self):
+        # Os níveis de um provedor compartilham o cliente HTTP, fechado uma única vez
+        for http_client in list(self._http_clients.values()):
+            await http_client.aclose()
+        self._clients.clear()
+        self._http_clients.clear()
+
+    def stats(self) -> dict:
+        """
+        Estatísticas do pool de cada provedor: conexões abertas, ociosas e em uso, e
+        total de requisições HTTP enviadas.
+        """
+        stats = {}
+        for model_choice, http_client in self._http_clients.items():
+            # httpx não expõe o pool publicamente; acessa o pool do httpcore quando disponível
+            pool = getattr(getattr(http_client, "_transport", None), "_pool", None)
+            connections = list(getattr(pool, "connections", []))
+            idle = sum(1 for conn in connections if conn.is_idle())
+            stats[model_choice.value] = {
+                "connections": len(connections),
+                "idle_connections": idle,
+                "active_connections": len(connections) - idle,
+                "requests": self._requests.get(model_choice, 0),
+                "max_connections": settings.LLM_HTTP_MAX_CONNECTIONS,
+                "max_keepalive_connections": settings.LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            }
+        return stats
+
+
+provider_registry = ProviderRegistry()
+metrics.register_gauge("llm_pools", provider_registry.stats)
@@ -0,0 +1,328 @@
+"""
+Agendador de chamadas aos provedores de LLM.
+
+Cada provedor tem um limite de chamadas simultâneas, com fila justa entre usuários
+(round-robin: um usuário com muitas gerações não bloqueia os demais), e token buckets
+de requisições e de tokens de entrada por minuto. Os cabeçalhos de rate limit das
+respostas pausam o provedor até o reset quando a cota se esgota, e erros transitórios
+(429, 5xx, falhas de conexão) são repetidos com backoff exponencial e jitter. Quando
+as tentativas se esgotam, `LLMUnavailableError` carrega o status HTTP (429 ou 503) a
+ser devolvido ao cliente.
+"""
+import asyncio
+import logging
+import random
+import re
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+
+import anthropic
+import openai
+
+from ..core.config import settings
+from ..models import AIModelEnum
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ERRORS = (anthropic.RateLimitError, openai.RateLimitError)
+CONNECTION_ERRORS = (anthropic.APIConnectionError, openai.APIConnectionError)
+STATUS_ERRORS = (anthropic.APIStatusError, openai.APIStatusError)
+
+# Cabeçalhos de rate limit: (restantes, reset) de requisições e de tokens, por provedor
+RATE_LIMIT_HEADERS = {
+    AIModelEnum.CLAUDE: [
+        ("anthropic-ratelimit-requests-remaining", "anthropic-ratelimit-requests-reset"),
+        ("anthropic-ratelimit-input-tokens-remaining", "anthropic-ratelimit-input-tokens-reset"),
+        ("anthropic-ratelimit-tokens-remaining", "anthropic-ratelimit-tokens-reset"),
+    ],
+    AIModelEnum.OPENAI: [
+        ("x-ratelimit-remaining-requests", "x-ratelimit-reset-requests"),
+        ("x-ratelimit-remaining-tokens", "x-ratelimit-reset-tokens"),
+    ],
+}
+
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+class LLMUnavailableError(Exception):
+    """
+    O provedor não atendeu a chamada dentro das tentativas permitidas.
+    """
+
+    def __init__(self, status_code: int, detail: str, retry_after: Optional[float] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def parse_reset(value: str) -> Optional[float]:
+    """
+    Segundos até o reset de um cabeçalho de rate limit: timestamp RFC 3339 (Anthropic)
+    ou duração como "1s", "6m0s", "20ms" (OpenAI).
+    """
+    value = value.strip()
+    parts = _DURATION_PART.findall(value)
+    if parts and "".join(number + unit for number, unit in parts) == value:
+        return sum(float(number) * _DURATION_UNITS[unit] for number, unit in parts)
+    try:
+        return max(0.0, datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() - time.time())
+    except ValueError:
+        return None
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+
+def classify_error(error: Exception):
+    """
+    Retorna o status HTTP para erros transitórios do provedor (429 ou 503), ou None
+    para erros que não devem ser repetidos.
+    """
+    if isinstance(error, RATE_LIMIT_ERRORS):
+        return 429
+    if isinstance(error, CONNECTION_ERRORS):
+        return 503
+    if isinstance(error, STATUS_ERRORS) and error.status_code >= 500:
+        return 503
+    return None
+
+
+class TokenBucket:
+    """
+    Token bucket com reabastecimento contínuo. Reservas podem deixar o saldo negativo:
+    quem reserva depois espera proporcionalmente mais, o que mantém a ordem de chegada.
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        Reserva `amount` e retorna quantos segundos esperar até que a reserva seja válida.
+        """
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    @property
+    def available(self) -> float:
+        self._refill()
+        return self.tokens
+
+
+class FairQueue:
+    """
+    Semáforo com fila por usuário: ao liberar uma vaga, os usuários em espera são
+    atendidos em round-robin, cada um na ordem de chegada das próprias chamadas.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.active = 0
+        self._queues: "OrderedDict[str, deque]" = OrderedDict()
+
+    async def acquire(self, user: str):
+        if self.active < self.capacity and not self.depth:
+            self.active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(user, deque()).append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            # A vaga pode ter sido concedida no mesmo instante do cancelamento
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        self.active -= 1
+        while self.active < self.capacity and self._queues:
+            user, queue = next(iter(self._queues.items()))
+            future = queue.popleft()
+            if queue:
+                self._queues.move_to_end(user)
+            else:
+                del self._queues[user]
+            if future.done():
+                # Chamador cancelado enquanto aguardava
+                continue
+            self.active += 1
+            future.set_result(None)
+
+    @property
+    def depth(self) -> int:
+        return sum(1 for queue in self._queues.values() for future in queue if not future.done())
+
+    @property
+    def users_waiting(self) -> int:
+        return sum(1 for queue in self._queues.values() if any(not future.done() for future in queue))
+
+
+class ProviderLimiter:
+    def __init__(self, max_concurrency: int, requests_per_minute: int, input_tokens_per_minute: int):
+        self.slots = FairQueue(max_concurrency)
+        self.requests = TokenBucket(requests_per_minute)
+        self.input_tokens = TokenBucket(input_tokens_per_minute)
+        self.paused_until = 0.0
+        self.remaining = {}
+
+    def pause(self, seconds: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    async def acquire(self, user: str, input_tokens: int):
+        await self.slots.acquire(user)
+        try:
+            delay = max(self.requests.reserve(1), self.input_tokens.reserve(input_tokens))
+            delay = max(delay, self.paused_until - time.monotonic())
+            if delay > 0:
+                await asyncio.sleep(delay)
+        except BaseException:
+            self.slots.release()
+            raise
+
+    def release(self):
+        self.slots.release()
+
+
+class LLMScheduler:
+    def __init__(self):
+        self._limiters: Dict[AIModelEnum, ProviderLimiter] = {
+            AIModelEnum.CLAUDE: ProviderLimiter(
+                settings.LLM_MAX_CONCURRENCY_CLAUDE,
+                settings.LLM_REQUESTS_PER_MINUTE_CLAUDE,
+                settings.LLM_INPUT_TOKENS_PER_MINUTE_CLAUDE,
+            ),
+            AIModelEnum.OPENAI: ProviderLimiter(
+                settings.LLM_MAX_CONCURRENCY_OPENAI,
+                settings.LLM_REQUESTS_PER_MINUTE_OPENAI,
+                settings.LLM_INPUT_TOKENS_PER_MINUTE_OPENAI,
+            ),
+        }
+
+    async def _acquire(self, provider: AIModelEnum, user: str, input_tokens: int) -> ProviderLimiter:
+        limiter = self._limiters[provider]
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(limiter.acquire(user, input_tokens), settings.LLM_QUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            metrics.increment("llm_queue_timeouts")
+            raise LLMUnavailableError(
+                503, f"Fila do provedor {provider.value} cheia; tente novamente em instantes.",
+                retry_after=settings.LLM_BACKOFF_MAX_SECONDS
+            )
+        metrics.observe(f"llm_queue_wait_seconds.{provider.value}", time.monotonic() - started)
+        return limiter
+
+    @asynccontextmanager
+    async def slot(self, provider: AIModelEnum, user: str, input_tokens: int):
+        """
+        Ocupa uma vaga do provedor durante o bloco (usado no streaming, sem repetição).
+        """
+        limiter = await self._acquire(provider, user, input_tokens)
+        try:
+            yield
+        except Exception as e:
+            raise self._unavailable(provider, limiter, e) from e
+        finally:
+            limiter.release()
+
+    def _unavailable(self, provider: AIModelEnum, limiter: ProviderLimiter, error: Exception) -> Exception:
+        status = classify_error(error)
+        if status is None:
+            return error
+        retry_after = _retry_after(error)
+        if status == 429:
+            metrics.increment(f"llm_rate_limited.{provider.value}")
+            limiter.pause(retry_after or settings.LLM_BACKOFF_BASE_SECONDS)
+        return LLMUnavailableError(status, f"Provedor {provider.value} indisponível: {error}", retry_after)
+
+    async def run(self, provider: AIModelEnum, user: str, input_tokens: int, func: Callable[[], Awaitable]):
+        """
+        Executa `func` respeitando os limites do provedor, repetindo erros transitórios
+        com backoff exponencial e jitter.
+        """
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            limiter = await self._acquire(provider, user, input_tokens)
+            try:
+                return await func()
+            except Exception as e:
+                error = self._unavailable(provider, limiter, e)
+                if not isinstance(error, LLMUnavailableError):
+                    raise
+                if attempt == settings.LLM_MAX_RETRIES:
+                    raise error from e
+            finally:
+                limiter.release()
+
+            # Full jitter; o Retry-After do provedor, quando presente, é o mínimo
+            backoff = min(settings.LLM_BACKOFF_MAX_SECONDS, settings.LLM_BACKOFF_BASE_SECONDS * 2 ** attempt)
+            delay = max(error.retry_after or 0.0, random.uniform(0, backoff))
+            metrics.increment(f"llm_retries.{provider.value}")
+            logger.warning(f"{error}; nova tentativa {attempt + 1}/{settings.LLM_MAX_RETRIES} em {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    def observe_headers(self, provider: AIModelEnum, headers):
+        """
+        Lê os cabeçalhos de rate limit de uma resposta; com a cota esgotada, pausa o
+        provedor até o reset informado.
+        """
+        limiter = self._limiters[provider]
+        for remaining_header, reset_header in RATE_LIMIT_HEADERS[provider]:
+            remaining = headers.get(remaining_header)
+            if remaining is None:
+                continue
+            try:
+                remaining = int(remaining)
+            except ValueError:
+                continue
+            limiter.remaining[remaining_header] = remaining
+            reset = parse_reset(headers.get(reset_header, ""))
+            if remaining == 0 and reset:
+                logger.warning(f"Cota do provedor {provider.value} esgotada ({remaining_header}); pausando por {reset:.1f}s")
+                limiter.pause(reset)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            provider.value: {
+                "active": limiter.slots.active,
+                "max_concurrency": limiter.slots.capacity,
+                "queue_depth": limiter.slots.depth,
+                "users_waiting": limiter.slots.users_waiting,
+                "paused_for_seconds": max(0.0, limiter.paused_until - now),
+                "requests_available": limiter.requests.available,
+                "input_tokens_available": limiter.input_tokens.available,
+                "provider_remaining": dict(limiter.remaining),
+            }
+            for provider, limiter in self._limiters.items()
+        }
+
+
+llm_scheduler = LLMScheduler()
+metrics.register_gauge("llm_scheduler", llm_scheduler.stats)
@@ -0,0 +1,48 @@
+import threading
+from collections import defaultdict
+
+# Métricas em memória do processo: contadores e observações (contagem/soma/mín/máx)
+_counters = defaultdict(float)
+_observations = {}
+_gauges = {}
+lock = threading.Lock()
+
+
+def increment(name: str, value: float = 1):
+    with lock:
+        _counters[name] += value
+
+
+def observe(name: str, value: float):
+    with lock:
+        stats = _observations.get(name)
+        if stats is None:
+            _observations[name] = {"count": 1, "sum": value, "min": value, "max": value}
+        else:
+            stats["count"] += 1
+            stats["sum"] += value
+            stats["min"] = min(stats["min"], value)
+            stats["max"] = max(stats["max"], value)
+
+
+def register_gauge(name: str, func):
+    """
+    Registra uma função chamada a cada snapshot (ex.: tamanho de cache, profundidade de fila).
+    """
+    with lock:
+        _gauges[name] = func
+
+
+def snapshot() -> dict:
+    with lock:
+        counters = dict(_counters)
+        observations = {
+            name: {**stats, "avg": stats["sum"] / stats["count"]}
+            for name, stats in _observations.items()
+        }
+        gauges = dict(_gauges)
+    return {
+        "counters": counters,
+        "observations": observations,
+        "gauges": {name: func() for name, func in gauges.items()},
+    }
@@ -0,0 +1,85 @@
+import logging
+import sys
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+import pandas as pd
+
+from ..core.config import settings
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CachedProfile:
+    description: str
+    # Linhas candidatas (embaralhadas) para a amostra do prompt
+    sample_pool: pd.DataFrame
+    total_rows: int
+
+    @property
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.description) + int(self.sample_pool.memory_usage(deep=True).sum())
+
+
+class ProfileCache:
+    """
+    Cache LRU de perfis e amostras do prompt, indexado pelo hash de conteúdo do dataset.
+
+    Limitado por número de entradas e por bytes; as entradas menos recentemente usadas
+    são descartadas primeiro.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[CachedProfile]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: CachedProfile):
+        if entry.nbytes > self.max_bytes:
+            logger.info(f"Perfil do dataset {key} excede o limite do cache ({entry.nbytes} bytes); não armazenado")
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes
+            self._entries[key] = entry
+            self._bytes += entry.nbytes
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+profile_cache = ProfileCache(settings.PROFILE_CACHE_MAX_ENTRIES, settings.PROFILE_CACHE_MAX_BYTES)
+metrics.register_gauge("profile_cache", profile_cache.stats)
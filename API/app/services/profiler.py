@@ -0,0 +1,565 @@
+import logging
+import math
+import multiprocessing
+import os
+import threading
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from ..core.config import settings
+from .sketches import HyperLogLog, KLLSketch, MomentsSketch
+
+logger = logging.getLogger(__name__)
+
+# Limite de memória (bytes) para cada bloco de colunas convertido em matriz NumPy
+BLOCK_BYTES = 256 * 1024 * 1024
+# Memória estimada por processo do pool (interpretador com NumPy e pandas e sua fatia do bloco)
+WORKER_MEMORY_BYTES = 256 * 1024 * 1024
+SHM_PATH = "/dev/shm"
+CGROUP_MEMORY_FILES = ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory.current")
+
+NUMERIC_DTYPES = ["number"]
+# "number" inclui timedelta64, cujos NaT viram -9.2e18 na conversão para float; como na
+# descrição original, essas colunas só aparecem na lista de tipos
+NUMERIC_EXCLUDED_DTYPES = ["timedelta"]
+CATEGORICAL_DTYPES = ["object", "category", "string"]
+
+_profile_executor: Optional[ProcessPoolExecutor] = None
+_profile_executor_lock = threading.Lock()
+
+
+@dataclass
+class NumericColumnProfile:
+    name: str
+    dtype: str
+    min: Optional[float]
+    max: Optional[float]
+    mean: Optional[float]
+    median: Optional[float]
+    std: Optional[float]
+    missing: int
+
+
+@dataclass
+class CategoricalColumnProfile:
+    name: str
+    dtype: str
+    unique: int
+    missing: int
+
+
+@dataclass
+class CorrelationPair:
+    left: str
+    right: str
+    value: float
+
+
+@dataclass
+class DatasetProfile:
+    rows: int
+    dtypes: List[tuple] = field(default_factory=list)
+    numeric: List[NumericColumnProfile] = field(default_factory=list)
+    categorical: List[CategoricalColumnProfile] = field(default_factory=list)
+    correlations: List[CorrelationPair] = field(default_factory=list)
+    total_missing: int = 0
+
+    @property
+    def column_count(self) -> int:
+        return len(self.dtypes)
+
+
+def _column_batches(columns: List[str], rows: int, itemsize: int = 8, max_bytes: int = BLOCK_BYTES) -> List[List[str]]:
+    """
+    Divide as colunas em lotes cuja matriz NumPy não ultrapassa `max_bytes`.
+    """
+    per_batch = max(1, max_bytes // max(1, rows * itemsize))
+    return [columns[i:i + per_batch] for i in range(0, len(columns), per_batch)]
+
+
+def _numeric_block_stats(block: np.ndarray, has_nan: bool) -> dict:
+    """
+    Calcula todas as estatísticas de um bloco 2D (linhas x colunas) de uma vez,
+    vetorizado ao longo do eixo das linhas.
+    """
+    if block.shape[0] == 0:
+        empty = np.full(block.shape[1], np.nan)
+        return {"min": empty, "max": empty, "mean": empty, "median": empty, "std": empty}
+
+    if not has_nan:
+        return {
+            "min": block.min(axis=0),
+            "max": block.max(axis=0),
+            "mean": block.mean(axis=0, dtype=np.float64),
+            "median": np.median(block, axis=0),
+            "std": block.std(axis=0, ddof=1, dtype=np.float64) if block.shape[0] > 1 else np.full(block.shape[1], np.nan),
+        }
+
+    # Colunas inteiramente nulas geram RuntimeWarning nas funções nan*; o resultado (NaN) já é o esperado
+    with np.errstate(all="ignore"), warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        return {
+            "min": np.nanmin(block, axis=0),
+            "max": np.nanmax(block, axis=0),
+            "mean": np.nanmean(block, axis=0, dtype=np.float64),
+            "median": np.nanmedian(block, axis=0),
+            "std": np.nanstd(block, axis=0, ddof=1, dtype=np.float64),
+        }
+
+
+def _as_scalar(value, integer: bool):
+    if value is None or pd.isna(value):
+        return None
+    return int(value) if integer else float(value)
+
+
+def _group_by_dtype(df: pd.DataFrame, columns: List[str]) -> dict:
+    groups = {}
+    for col in columns:
+        groups.setdefault(df[col].dtype, []).append(col)
+    return groups
+
+
+def _block_dtype(dtype, has_nan: bool):
+    """
+    Tipo da matriz NumPy de um bloco: o próprio dtype quando possível, float64 quando
+    há nulos ou o dtype é de extensão (Int64, Float32 nullable, etc.).
+    """
+    return np.dtype(np.float64) if (has_nan or not isinstance(dtype, np.dtype)) else dtype
+
+
+def _numeric_profiles(batch: List[str], dtype, stats: dict, null_counts: pd.Series) -> dict:
+    is_integer = pd.api.types.is_integer_dtype(dtype)
+    return {
+        col: NumericColumnProfile(
+            name=str(col),
+            dtype=str(dtype),
+            min=_as_scalar(stats["min"][i], is_integer),
+            max=_as_scalar(stats["max"][i], is_integer),
+            mean=_as_scalar(stats["mean"][i], False),
+            median=_as_scalar(stats["median"][i], False),
+            std=_as_scalar(stats["std"][i], False),
+            missing=int(null_counts[col]),
+        )
+        for i, col in enumerate(batch)
+    }
+
+
+def profile_numeric_columns(df: pd.DataFrame, columns: List[str], null_counts: pd.Series) -> List[NumericColumnProfile]:
+    """
+    Agrupa as colunas numéricas por dtype e calcula as estatísticas de cada grupo em
+    blocos 2D, em vez de uma varredura por estatística por coluna.
+    """
+    profiles = {}
+    for dtype, group in _group_by_dtype(df, columns).items():
+        for batch in _column_batches(group, len(df)):
+            has_nan = bool(null_counts[batch].any())
+            target = _block_dtype(dtype, has_nan)
+            block = df[batch].to_numpy(dtype=target, na_value=np.nan) if has_nan else df[batch].to_numpy(dtype=target)
+            stats = _numeric_block_stats(block, has_nan)
+            del block
+            profiles.update(_numeric_profiles(batch, dtype, stats, null_counts))
+
+    # Mantém a ordem original das colunas
+    return [profiles[col] for col in columns]
+
+
+def _available_memory() -> Optional[int]:
+    """
+    Memória livre em bytes, limitada pela cota do cgroup (containers) quando houver.
+    """
+    try:
+        available = os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+    try:
+        with open(CGROUP_MEMORY_FILES[0]) as f:
+            limit = f.read().strip()
+        with open(CGROUP_MEMORY_FILES[1]) as f:
+            used = int(f.read().strip())
+        if limit != "max":
+            available = min(available, int(limit) - used)
+    except (OSError, ValueError):
+        pass
+    return max(0, available)
+
+
+def profile_workers() -> int:
+    """
+    Número de processos do perfilamento paralelo: PROFILE_WORKERS ou, se não definido, o
+    menor entre os núcleos disponíveis e quantos processos cabem na memória livre. Com 1,
+    o perfil é calculado no próprio processo.
+    """
+    if settings.PROFILE_WORKERS is not None:
+        return settings.PROFILE_WORKERS
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    available = _available_memory()
+    if available is None:
+        return 1
+    return max(1, min(cpus, available // WORKER_MEMORY_BYTES))
+
+
+def shm_block_bytes() -> int:
+    """
+    Tamanho máximo de cada bloco em memória compartilhada: PROFILE_SHM_BLOCK_BYTES, sem
+    passar da metade do espaço livre em /dev/shm (64 MB por padrão no Docker). Escrever
+    além do espaço do tmpfs derruba o processo com SIGBUS.
+    """
+    try:
+        stats = os.statvfs(SHM_PATH)
+    except OSError:
+        return 0
+    return min(settings.PROFILE_SHM_BLOCK_BYTES, stats.f_bavail * stats.f_frsize // 2)
+
+
+def _get_profile_executor(workers: int) -> ProcessPoolExecutor:
+    """
+    Pool de processos compartilhado entre requisições, criado sob demanda.
+    Usa 'spawn' para não herdar threads e locks do servidor via fork.
+    """
+    global _profile_executor
+    with _profile_executor_lock:
+        if _profile_executor is None:
+            _profile_executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            logger.info(f"Pool de perfilamento iniciado com {workers} processos")
+        return _profile_executor
+
+
+def _profile_numeric_shard(shm_name: str, shape: tuple, dtype: str, start: int, stop: int, has_nan: bool) -> dict:
+    """
+    Executado no worker: anexa o bloco em memória compartilhada (sem cópia nem pickle
+    dos dados) e calcula as estatísticas das colunas [start, stop).
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        block = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, order="F")
+        stats = _numeric_block_stats(block[:, start:stop], has_nan)
+        del block
+        return {key: np.array(value) for key, value in stats.items()}
+    finally:
+        shm.close()
+
+
+def profile_numeric_columns_parallel(
+    df: pd.DataFrame,
+    columns: List[str],
+    null_counts: pd.Series,
+    workers: int,
+    block_bytes: Optional[int] = None
+) -> List[NumericColumnProfile]:
+    """
+    Variante de profile_numeric_columns para tabelas muito largas: cada bloco de colunas
+    (até `block_bytes`, padrão `shm_block_bytes()`) é copiado uma vez para memória
+    compartilhada (em ordem Fortran, colunas contíguas) e os workers do pool processam
+    fatias de colunas diretamente desse buffer.
+    """
+    block_bytes = shm_block_bytes() if block_bytes is None else block_bytes
+    executor = _get_profile_executor(workers)
+    profiles = {}
+    for dtype, group in _group_by_dtype(df, columns).items():
+        for batch in _column_batches(group, len(df), max_bytes=block_bytes):
+            has_nan_by_col = null_counts[batch].to_numpy() > 0
+            target = _block_dtype(dtype, bool(has_nan_by_col.any()))
+            shape = (len(df), len(batch))
+            shm = shared_memory.SharedMemory(create=True, size=max(1, shape[0] * shape[1] * target.itemsize))
+            try:
+                block = np.ndarray(shape, dtype=target, buffer=shm.buf, order="F")
+                for j, col in enumerate(batch):
+                    block[:, j] = df[col].to_numpy(dtype=target, na_value=np.nan) if has_nan_by_col[j] else df[col].to_numpy(dtype=target)
+                del block
+
+                shard_size = max(1, math.ceil(len(batch) / workers))
+                futures = [
+                    (start, executor.submit(
+                        _profile_numeric_shard, shm.name, shape, target.str, start, min(start + shard_size, len(batch)),
+                        bool(has_nan_by_col[start:start + shard_size].any())
+                    ))
+                    for start in range(0, len(batch), shard_size)
+                ]
+                for start, future in futures:
+                    shard = batch[start:start + shard_size]
+                    profiles.update(_numeric_profiles(shard, dtype, future.result(), null_counts))
+            finally:
+                shm.close()
+                shm.unlink()
+
+    return [profiles[col] for col in columns]
+
+
+def profile_categorical_columns(df: pd.DataFrame, columns: List[str], null_counts: pd.Series) -> List[CategoricalColumnProfile]:
+    if not columns:
+        return []
+    unique_counts = df[columns].nunique()
+    return [
+        CategoricalColumnProfile(
+            name=str(col),
+            dtype=str(df[col].dtype),
+            unique=int(unique_counts[col]),
+            missing=int(null_counts[col]),
+        )
+        for col in columns
+    ]
+
+
+def _correlation_matrix(block: np.ndarray) -> np.ndarray:
+    """
+    Matriz de correlação de Pearson com exclusão de nulos par a par (como `DataFrame.corr`),
+    calculada com produtos matriciais em vez de um laço por par de colunas.
+    """
+    mask = ~np.isnan(block)
+    if mask.all():
+        with np.errstate(all="ignore"):
+            return np.corrcoef(block, rowvar=False)
+
+    valid = mask.astype(np.float64)
+    # Centralizar pela média de cada coluna reduz o cancelamento numérico das somas abaixo
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        centers = np.nan_to_num(np.nanmean(block, axis=0))
+    filled = np.where(mask, block - centers, 0.0)
+    counts = valid.T @ valid
+    sums = filled.T @ valid          # soma de x_i nas linhas onde x_j também é válido
+    squares = (filled * filled).T @ valid
+    products = filled.T @ filled
+
+    with np.errstate(all="ignore"):
+        cov = products - sums * sums.T / counts
+        var_i = squares - sums * sums / counts
+        corr = cov / np.sqrt(var_i * var_i.T)
+    corr[counts < 2] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def compute_correlations(df: pd.DataFrame, columns: List[str], top_k: Optional[int] = None, sample_rows: Optional[int] = None) -> List[CorrelationPair]:
+    """
+    Retorna os `top_k` pares de colunas numéricas com maior correlação absoluta.
+
+    Acima de `sample_rows` linhas a correlação é estimada em uma amostra aleatória
+    de linhas. Os pares são extraídos do triângulo superior da matriz com argpartition.
+    """
+    top_k = settings.CORRELATION_TOP_K if top_k is None else top_k
+    sample_rows = settings.CORRELATION_SAMPLE_ROWS if sample_rows is None else sample_rows
+    if len(columns) < 2 or top_k <= 0 or len(df) < 2:
+        return []
+
+    frame = df[columns]
+    if sample_rows and len(frame) > sample_rows:
+        rows = np.random.default_rng(42).choice(len(frame), size=sample_rows, replace=False)
+        frame = frame.iloc[np.sort(rows)]
+    block = frame.to_numpy(dtype=np.float64, na_value=np.nan)
+    corr = _correlation_matrix(block)
+    del block
+
+    upper_i, upper_j = np.triu_indices(len(columns), k=1)
+    values = corr[upper_i, upper_j]
+    strength = np.abs(values)
+    strength[np.isnan(strength)] = -1.0
+
+    k = min(top_k, strength.size)
+    candidates = np.argpartition(-strength, k - 1)[:k] if k < strength.size else np.arange(strength.size)
+    candidates = candidates[np.argsort(-strength[candidates], kind="stable")]
+
+    return [
+        CorrelationPair(left=str(columns[upper_i[idx]]), right=str(columns[upper_j[idx]]), value=float(values[idx]))
+        for idx in candidates
+        if strength[idx] >= 0
+    ]
+
+
+def profile_dataframe(df: pd.DataFrame) -> DatasetProfile:
+    """
+    Gera o perfil estruturado do dataset: tipos, estatísticas numéricas, cardinalidade
+    das colunas categóricas, correlações e total de valores ausentes.
+
+    A contagem de nulos é feita uma única vez para o DataFrame inteiro e reaproveitada.
+    Acima de PROFILE_PARALLEL_MIN_COLUMNS colunas numéricas, as estatísticas são
+    calculadas em um pool de processos (ver profile_numeric_columns_parallel).
+    """
+    null_counts = df.isna().sum()
+    numeric_columns = list(df.select_dtypes(include=NUMERIC_DTYPES, exclude=NUMERIC_EXCLUDED_DTYPES).columns)
+    categorical_columns = list(df.select_dtypes(include=CATEGORICAL_DTYPES).columns)
+
+    workers = profile_workers() if len(numeric_columns) >= settings.PROFILE_PARALLEL_MIN_COLUMNS else 1
+    block_bytes = shm_block_bytes() if workers > 1 else 0
+    if workers > 1 and block_bytes >= len(df) * 8:
+        logger.info(f"Perfilando {len(numeric_columns)} colunas numéricas em paralelo ({workers} processos)")
+        numeric = profile_numeric_columns_parallel(df, numeric_columns, null_counts, workers, block_bytes)
+    else:
+        if workers > 1:
+            logger.info(f"Espaço em {SHM_PATH} insuficiente para o perfilamento paralelo; perfilando no processo")
+        numeric = profile_numeric_columns(df, numeric_columns, null_counts)
+
+    return DatasetProfile(
+        rows=int(df.shape[0]),
+        dtypes=[(str(col), str(dtype)) for col, dtype in df.dtypes.items()],
+        numeric=numeric,
+        categorical=profile_categorical_columns(df, categorical_columns, null_counts),
+        correlations=compute_correlations(df, numeric_columns),
+        total_missing=int(null_counts.sum()),
+    )
+
+
+def _fmt(value, spec: str = "") -> str:
+    if value is None:
+        return "nan"
+    return format(value, spec)
+
+
+def render_profile(profile: DatasetProfile) -> str:
+    """
+    Converte o perfil no texto de descrição dos dados usado no prompt.
+    """
+    description = []
+    description.append(f"O dataset contém {profile.rows} linhas e {profile.column_count} colunas.")
+    description.append("\nColunas e seus tipos de dados:")
+    for name, dtype in profile.dtypes:
+        description.append(f"- {name}: {dtype}")
+
+    if profile.numeric:
+        description.append("\nColunas Numéricas:")
+        for col in profile.numeric:
+            description.append(
+                f"- {col.name}: min={_fmt(col.min)}, max={_fmt(col.max)}, média={_fmt(col.mean, '.2f')}, "
+                f"mediana={_fmt(col.median)}, desvio padrão={_fmt(col.std, '.2f')}, "
+                f"valores ausentes={col.missing}"
+            )
+
+    if profile.categorical:
+        description.append("\nColunas Categóricas:")
+        for col in profile.categorical:
+            description.append(
+                f"- {col.name}: {col.unique} valores únicos, "
+                f"valores ausentes={col.missing}"
+            )
+
+    if profile.correlations:
+        description.append("\nCorrelações mais fortes entre colunas numéricas:")
+        for pair in profile.correlations:
+            description.append(f"- Correlação entre {pair.left} e {pair.right}: {pair.value:.2f}")
+
+    # Informações adicionais
+    description.append("\nResumo geral:")
+    description.append(f"- Total de valores ausentes no dataset: {profile.total_missing}")
+
+    return "\n".join(description)
+
+
+class StreamingProfiler:
+    """
+    Perfilamento aproximado em streaming, para datasets que não cabem em memória.
+
+    Consome blocos de linhas (`update`) mantendo, por coluna, sketches de memória
+    limitada: momentos de Welford (média/desvio/min/max), KLL (mediana), HyperLogLog
+    (valores únicos) e contagem de nulos. Profilers alimentados por blocos diferentes
+    podem ser combinados com `merge`. Correlações não são calculadas neste modo.
+    """
+
+    def __init__(self, quantile_k: int = 200, hll_precision: int = 14, seed: Optional[int] = 42):
+        self.quantile_k = quantile_k
+        self.hll_precision = hll_precision
+        self.seed = seed
+        self.rows = 0
+        self.columns = {}
+
+    def _column_state(self, name, dtype) -> dict:
+        state = self.columns.get(name)
+        if state is None:
+            numeric = pd.api.types.is_numeric_dtype(dtype) and not pd.api.types.is_bool_dtype(dtype)
+            state = {
+                "dtype": dtype,
+                "numeric": numeric,
+                "missing": 0,
+                "moments": MomentsSketch() if numeric else None,
+                "quantiles": KLLSketch(self.quantile_k, seed=self.seed) if numeric else None,
+                "distinct": None if numeric else HyperLogLog(self.hll_precision),
+            }
+            self.columns[name] = state
+        elif state["dtype"] != dtype and state["numeric"] and pd.api.types.is_numeric_dtype(dtype):
+            # Ex.: coluna inteira em um bloco e com nulos (float) em outro
+            state["dtype"] = np.result_type(state["dtype"], dtype)
+        return state
+
+    def update(self, chunk: pd.DataFrame) -> "StreamingProfiler":
+        self.rows += len(chunk)
+        null_counts = chunk.isna().sum()
+        for col, dtype in chunk.dtypes.items():
+            state = self._column_state(col, dtype)
+            state["missing"] += int(null_counts[col])
+            series = chunk[col].dropna()
+            if state["numeric"]:
+                values = pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+                state["moments"].update(values)
+                state["quantiles"].update(values)
+            else:
+                state["distinct"].update(series.to_numpy())
+        return self
+
+    def merge(self, other: "StreamingProfiler") -> "StreamingProfiler":
+        self.rows += other.rows
+        for col, other_state in other.columns.items():
+            state = self._column_state(col, other_state["dtype"])
+            state["missing"] += other_state["missing"]
+            if state["numeric"]:
+                state["moments"].merge(other_state["moments"])
+                state["quantiles"].merge(other_state["quantiles"])
+            else:
+                state["distinct"].merge(other_state["distinct"])
+        return self
+
+    def to_profile(self) -> DatasetProfile:
+        profile = DatasetProfile(rows=self.rows)
+        for col, state in self.columns.items():
+            dtype = state["dtype"]
+            profile.dtypes.append((str(col), str(dtype)))
+            profile.total_missing += state["missing"]
+            if state["numeric"]:
+                moments = state["moments"]
+                is_integer = pd.api.types.is_integer_dtype(dtype)
+                profile.numeric.append(NumericColumnProfile(
+                    name=str(col),
+                    dtype=str(dtype),
+                    min=_as_scalar(moments.min, is_integer),
+                    max=_as_scalar(moments.max, is_integer),
+                    mean=moments.mean if moments.count else None,
+                    median=state["quantiles"].quantile(0.5),
+                    std=moments.std,
+                    missing=state["missing"],
+                ))
+            elif pd.api.types.is_object_dtype(dtype) or isinstance(dtype, (pd.CategoricalDtype, pd.StringDtype)):
+                profile.categorical.append(CategoricalColumnProfile(
+                    name=str(col),
+                    dtype=str(dtype),
+                    unique=state["distinct"].estimate(),
+                    missing=state["missing"],
+                ))
+        return profile
+
+
+def profile_chunks(chunks: Iterable[pd.DataFrame], **kwargs) -> DatasetProfile:
+    """
+    Perfila um iterável de blocos de linhas sem materializar o dataset completo.
+    """
+    profiler = StreamingProfiler(**kwargs)
+    for chunk in chunks:
+        profiler.update(chunk)
+    return profiler.to_profile()
+
+
+def merge_profilers(profilers: Iterable[StreamingProfiler]) -> StreamingProfiler:
+    """
+    Combina profilers alimentados em paralelo (ex.: um por worker) em um único resultado.
+    """
+    profilers = iter(profilers)
+    merged = next(profilers)
+    for profiler in profilers:
+        merged.merge(profiler)
+    return merged
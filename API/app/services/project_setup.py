@@ -8,6 +8,7 @@ import io
 from fastapi import HTTPException
 from fastapi.responses import FileResponse
 from ..models import TableData  
+from .data_loader import write_dataset_csv
 
 # Configuração de logging
 logging.basicConfig(level=logging.INFO)
@@ -68,10 +69,11 @@ def generate_requirements():
 def save_data_csv(table_data: TableData, output_path):
     """
     Salva os dados do usuário em um arquivo CSV.
+
+    :param table_data: Objeto TableData, DataFrame já carregado ou caminho de um dataset em disco.
     """
     try:
-        df = pd.DataFrame(table_data.data, columns=table_data.columns)
-        df.to_csv(output_path, index=False)
+        write_dataset_csv(table_data, output_path)
         logger.info(f"Dados salvos em {output_path}")
     except Exception as e:
         logger.exception(f"Erro ao salvar dados em {output_path}")
@@ -247,7 +249,7 @@ def organize_project(table_data, dashboard_code, additional_files=None, project_
     """
     Organiza os arquivos do projeto criando a estrutura de diretórios e adicionando os arquivos.
 
-    :param table_data: Objeto TableData contendo 'columns' e 'data' para o CSV.
+    :param table_data: Objeto TableData contendo 'columns' e 'data' (ou DataFrame) para o CSV.
     :param dashboard_code: Código do dashboard gerado pelo AI.
     :param additional_files: Dicionário opcional com caminhos e conteúdos de arquivos adicionais.
     :param project_dir: Nome do diretório do projeto.
@@ -0,0 +1,201 @@
+import logging
+import math
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+import pandas as pd
+
+from ..core.config import settings
+from ..models import AIModelEnum
+
+logger = logging.getLogger(__name__)
+
+# Aproximação de caracteres por token para texto misto (português + CSV)
+CHARS_PER_TOKEN = 3.5
+
+# Linhas usadas para estimar o custo médio de uma linha do CSV
+PROBE_ROWS = 50
+
+
+@dataclass
+class PromptPlan:
+    prompt: str
+    sample_rows: int
+    total_rows: int
+    estimated_tokens: int
+    token_budget: int
+    truncated_cells: int
+
+    @property
+    def is_sample(self) -> bool:
+        return self.sample_rows < self.total_rows
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimativa barata do número de tokens de um texto (sem chamar o tokenizer do provedor).
+    """
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def token_budget_for(model: AIModelEnum) -> int:
+    if model == AIModelEnum.OPENAI:
+        return settings.PROMPT_TOKEN_BUDGET_OPENAI
+    return settings.PROMPT_TOKEN_BUDGET_CLAUDE
+
+
+def truncate_text_cells(df: pd.DataFrame, max_chars: int) -> Tuple[pd.DataFrame, int]:
+    """
+    Trunca células de texto maiores que `max_chars`, retornando o DataFrame e quantas
+    células foram truncadas.
+    """
+    truncated = 0
+    result = df
+    for col in df.select_dtypes(include=["object", "string"]).columns:
+        # Colunas object podem conter valores que não são texto (decimais, booleanos, nulos),
+        # onde o acessor .str falha
+        mask = df[col].map(lambda value: isinstance(value, str) and len(value) > max_chars).astype(bool)
+        count = int(mask.sum())
+        if count:
+            if result is df:
+                result = df.copy()
+            result.loc[mask, col] = df.loc[mask, col].map(lambda value: value[:max_chars - 1] + "…")
+            truncated += count
+    return result, truncated
+
+
+# Instruções fixas do gerador, enviadas como prefixo estável (system prompt) antes dos
+# dados: idênticas em todas as chamadas, podem ser reaproveitadas pelo cache de prompt
+# dos provedores
+DASHBOARD_INSTRUCTIONS = """Você é um desenvolvedor Python especialista em visualização de dados e dashboards com Streamlit.
+Com base na descrição dos dados e nos dados enviados pelo usuário, gere um código completo e executável para um dashboard em Streamlit.
+
+O código deve:
+1. Importar as bibliotecas necessárias (pandas, streamlit, plotly, etc.)
+2. Carregar os dados (assuma que estão salvos como 'data.csv')
+3. Criar visualizações apropriadas com base nos tipos de dados e possíveis relacionamentos
+4. Organizar as visualizações em um layout claro e amigável no Streamlit
+5. Incluir qualquer processamento ou transformação de dados necessária
+6. Adicionar elementos interativos onde apropriado (por exemplo, dropdowns para selecionar colunas a serem visualizadas)
+7. Garantir que o código esteja completo e possa ser executado diretamente pelo usuário
+8. Se a descrição for baseada em uma amostra, incluir código para lidar com possíveis diferenças no dataset completo
+
+Forneça apenas o código Python sem explicações adicionais."""
+
+
+# Geração por seções (ver dashboard_sections): um plano curto do layout e, em seguida,
+# o código de cada seção, gerado em paralelo
+SECTION_PLAN_INSTRUCTIONS = """Você é um especialista em visualização de dados planejando um dashboard em Streamlit.
+Com base na descrição dos dados e nos dados enviados pelo usuário, proponha de 2 a {max_sections} seções independentes para o dashboard (por exemplo: indicadores (KPIs), distribuições, séries temporais, comparações entre categorias, tabela detalhada).
+
+Responda apenas com um objeto JSON, sem explicações, no formato:
+{{"title": "título do dashboard", "sections": [{{"id": "identificador_curto", "title": "título da seção", "description": "o que a seção deve mostrar", "columns": ["coluna", "..."]}}]}}""".format(max_sections=settings.SECTIONED_MAX_SECTIONS)
+
+SECTION_INSTRUCTIONS = """Você é um desenvolvedor Python especialista em visualização de dados e dashboards com Streamlit.
+Você vai escrever UMA seção de um dashboard em Streamlit. O restante do app já existe: as bibliotecas já foram importadas (pandas as pd, numpy as np, streamlit as st, plotly.express as px), os dados já foram carregados de 'data.csv' e os filtros da barra lateral já foram aplicados.
+
+Escreva apenas o corpo de uma função que recebe o DataFrame filtrado na variável `df` e desenha a seção:
+1. Não escreva imports, a linha `def`, nem código para carregar os dados
+2. Não repita o título da seção (ele já é exibido)
+3. Use somente as colunas existentes nos dados e trate DataFrames vazios
+4. Converta tipos quando necessário (por exemplo, datas com pd.to_datetime) sem alterar o `df` original
+
+Forneça apenas o código Python sem explicações adicionais."""
+
+
+# Edição incremental (ver dashboard_edit): o modelo recebe o código existente e devolve
+# apenas blocos de busca/substituição, de modo que a saída cresce com o tamanho da mudança
+EDIT_INSTRUCTIONS = """Você é um desenvolvedor Python especialista em dashboards com Streamlit.
+Você vai alterar um dashboard existente conforme o pedido do usuário. O código (ou os trechos relevantes dele) é enviado com o pedido.
+
+Responda apenas com blocos de busca/substituição, sem explicações e sem reescrever o arquivo inteiro, no formato:
+<<<<<<< BUSCAR
+linhas copiadas exatamente do código atual
+=======
+linhas novas
+>>>>>>> SUBSTITUIR
+
+Regras:
+1. O trecho em BUSCAR deve ser copiado do código enviado, caractere por caractere, incluindo a indentação, e aparecer uma única vez
+2. Use trechos curtos, apenas com as linhas que mudam e o mínimo de contexto para torná-los únicos
+3. Para inserir código, busque a linha vizinha e repita-a na substituição junto com as linhas novas
+4. Para remover código, deixe a substituição vazia
+5. Use vários blocos para mudanças em pontos diferentes"""
+
+
+def render_prompt(data_description: str, sample_csv: str, is_sample: bool) -> str:
+    """
+    Parte variável do prompt (descrição e amostra dos dados), enviada após DASHBOARD_INSTRUCTIONS.
+    """
+    return f"""Descrição dos dados:
+
+{data_description}
+
+Dados{' (nota: esta é uma amostra do dataset completo)' if is_sample else ''}:
+```csv
+{sample_csv}
+```"""
+
+
+def _sample_csv(pool: pd.DataFrame, rows: int) -> str:
+    # As primeiras linhas do pool (embaralhado) formam a amostra, exibida na ordem original
+    return pool.head(rows).sort_index().to_csv(index=False)
+
+
+def build_dashboard_prompt(
+    data_description: str,
+    sample_pool: pd.DataFrame,
+    total_rows: int,
+    model: AIModelEnum,
+    token_budget: Optional[int] = None
+) -> PromptPlan:
+    """
+    Monta o prompt de geração respeitando um orçamento de tokens de entrada.
+
+    O prompt retornado é apenas a parte variável; as instruções fixas (DASHBOARD_INSTRUCTIONS)
+    são enviadas separadamente, mas entram na conta do orçamento.
+
+    O custo fixo (instruções + descrição) é descontado do orçamento; o restante define
+    quantas linhas de `sample_pool` (já embaralhado) entram no CSV, a partir do custo
+    médio por linha medido em uma pequena amostra. Células de texto longas são truncadas
+    antes da estimativa, para que tabelas largas ou com textos extensos caibam no orçamento.
+    """
+    token_budget = token_budget or token_budget_for(model)
+    pool, truncated_cells = truncate_text_cells(sample_pool, settings.PROMPT_MAX_CELL_CHARS)
+
+    instruction_tokens = estimate_tokens(DASHBOARD_INSTRUCTIONS)
+    fixed_tokens = instruction_tokens + estimate_tokens(render_prompt(data_description, "", True))
+    available = token_budget - fixed_tokens
+    if available <= 0:
+        logger.warning(f"Descrição dos dados ({fixed_tokens} tokens) excede o orçamento de {token_budget} tokens")
+
+    min_rows = min(settings.PROMPT_MIN_SAMPLE_ROWS, len(pool))
+    if len(pool) and available > 0:
+        header_tokens = estimate_tokens(pool.head(0).to_csv(index=False))
+        probe = pool.head(PROBE_ROWS)
+        per_row = max(1e-6, (estimate_tokens(probe.to_csv(index=False)) - header_tokens) / len(probe))
+        rows = int((available - header_tokens) / per_row)
+        rows = max(min_rows, min(rows, len(pool)))
+    else:
+        rows = min_rows
+
+    sample_csv = _sample_csv(pool, rows)
+    prompt = render_prompt(data_description, sample_csv, rows < total_rows)
+    estimated = instruction_tokens + estimate_tokens(prompt)
+
+    # A linha média da sonda pode subestimar linhas posteriores; ajusta uma vez proporcionalmente
+    if estimated > token_budget and rows > min_rows:
+        overflow_ratio = (estimated - token_budget) / max(1, estimate_tokens(sample_csv))
+        rows = max(min_rows, int(rows * (1 - overflow_ratio)) - 1)
+        sample_csv = _sample_csv(pool, rows)
+        prompt = render_prompt(data_description, sample_csv, rows < total_rows)
+        estimated = instruction_tokens + estimate_tokens(prompt)
+
+    return PromptPlan(
+        prompt=prompt,
+        sample_rows=rows,
+        total_rows=total_rows,
+        estimated_tokens=estimated,
+        token_budget=token_budget,
+        truncated_cells=truncated_cells,
+    )
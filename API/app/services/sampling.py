@@ -0,0 +1,193 @@
+"""
+Amostragem representativa para o prompt de geração.
+
+A amostra prioriza as linhas que mais informam o modelo: as linhas com mínimo e máximo
+de cada coluna numérica e ao menos uma linha por categoria das colunas de baixa
+cardinalidade. O restante é preenchido aleatoriamente. `StreamingSampler` faz o mesmo
+em uma única passada sobre blocos de linhas, com memória limitada (reservoir sampling).
+"""
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Colunas categóricas com até este número de valores distintos são estratificadas
+MAX_STRATA_CARDINALITY = 20
+
+CATEGORICAL_DTYPES = ["object", "category", "string", "bool"]
+
+
+def _numeric_columns(df: pd.DataFrame) -> List:
+    return list(df.select_dtypes(include=["number"]).columns)
+
+
+def _categorical_columns(df: pd.DataFrame) -> List:
+    return list(df.select_dtypes(include=CATEGORICAL_DTYPES).columns)
+
+
+def extreme_rows(df: pd.DataFrame) -> pd.Index:
+    """
+    Índices das linhas com mínimo e máximo de cada coluna numérica.
+    """
+    numeric = df[_numeric_columns(df)]
+    if numeric.empty:
+        return df.index[:0]
+    numeric = numeric.loc[:, numeric.notna().any()]
+    return pd.Index(pd.concat([numeric.idxmin(), numeric.idxmax()]).unique())
+
+
+def stratum_rows(df: pd.DataFrame, seed: int = 42, max_cardinality: int = MAX_STRATA_CARDINALITY) -> pd.Index:
+    """
+    Índices de uma linha aleatória por categoria de cada coluna de baixa cardinalidade.
+    """
+    columns = [col for col in _categorical_columns(df) if df[col].nunique() <= max_cardinality]
+    if not columns:
+        return df.index[:0]
+    shuffled = df[columns].sample(frac=1, random_state=seed)
+    picked = [shuffled[col].dropna().drop_duplicates().index for col in columns]
+    return pd.Index(np.concatenate(picked)).unique()
+
+
+def representative_sample(df: pd.DataFrame, size: int, seed: int = 42) -> pd.DataFrame:
+    """
+    Amostra de até `size` linhas: extremos numéricos e estratos primeiro, depois
+    linhas aleatórias. A ordem do resultado reflete essa prioridade, de modo que
+    qualquer prefixo (`head(n)`) continua representativo.
+    """
+    # Mesmo quando o dataset inteiro cabe na amostra, a ordem importa: o prompt usa só o
+    # prefixo que cabe no orçamento de tokens
+    priority = extreme_rows(df).append(stratum_rows(df, seed)).unique()[:size]
+    remaining = df.index.difference(priority, sort=False)
+    fill_size = min(size - len(priority), len(remaining))
+    fill = remaining.to_series().sample(n=fill_size, random_state=seed).index
+    return df.loc[priority.append(fill)]
+
+
+class ReservoirSampler:
+    """
+    Amostra aleatória uniforme de `size` linhas em uma única passada (Algoritmo R),
+    vetorizada por bloco.
+    """
+
+    def __init__(self, size: int, seed: Optional[int] = 42):
+        self.size = size
+        self.seen = 0
+        self.reservoir: Optional[pd.DataFrame] = None
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, chunk: pd.DataFrame) -> "ReservoirSampler":
+        n = len(chunk)
+        if n == 0:
+            return self
+        chunk = chunk.set_axis(pd.RangeIndex(self.seen, self.seen + n))
+
+        filled = 0 if self.reservoir is None else len(self.reservoir)
+        take = min(self.size - filled, n)
+        if take > 0:
+            head = chunk.iloc[:take]
+            self.reservoir = head if self.reservoir is None else pd.concat([self.reservoir, head])
+
+        if take < n:
+            # A linha de posição global t (1-based) substitui um slot com probabilidade size/t;
+            # entre escolhas do mesmo slot, vale a última (mesmo resultado do algoritmo sequencial)
+            positions = np.arange(self.seen + take + 1, self.seen + n + 1)
+            draws = self._rng.integers(0, positions)
+            accepted = np.flatnonzero(draws < self.size)
+            if accepted.size:
+                slots = draws[accepted]
+                _, last = np.unique(slots[::-1], return_index=True)
+                keep = accepted[::-1][last]
+                replaced = slots[::-1][last]
+                survivors = np.setdiff1d(np.arange(len(self.reservoir)), replaced, assume_unique=True)
+                self.reservoir = pd.concat([self.reservoir.iloc[survivors], chunk.iloc[take + keep]])
+
+        self.seen += n
+        return self
+
+
+class StreamingSampler:
+    """
+    Versão em streaming de `representative_sample`: mantém um reservatório uniforme,
+    a linha de mínimo e de máximo de cada coluna numérica e a primeira linha vista de
+    cada categoria das colunas de baixa cardinalidade (colunas que ultrapassam
+    MAX_STRATA_CARDINALITY deixam de ser acompanhadas).
+
+    Extremos e estratos guardam apenas o rótulo (posição global) da linha; as linhas
+    referenciadas são copiadas de cada bloco de uma só vez, em `_rows`.
+    """
+
+    def __init__(self, size: int, seed: Optional[int] = 42, max_cardinality: int = MAX_STRATA_CARDINALITY):
+        self.size = size
+        self.max_cardinality = max_cardinality
+        self.reservoir = ReservoirSampler(size, seed)
+        self.extremes = {}
+        self.strata = {}
+        self._dropped_strata = set()
+        self._rows: Optional[pd.DataFrame] = None
+
+    def update(self, chunk: pd.DataFrame) -> "StreamingSampler":
+        start = self.reservoir.seen
+        chunk = chunk.set_axis(pd.RangeIndex(start, start + len(chunk)))
+        self.reservoir.update(chunk)
+
+        wanted = set()
+        for col in _numeric_columns(chunk):
+            values = chunk[col]
+            if values.notna().any():
+                for label, idx in (("min", values.idxmin()), ("max", values.idxmax())):
+                    current = self.extremes.get((col, label))
+                    value = values[idx]
+                    if current is None or (value < current[0] if label == "min" else value > current[0]):
+                        self.extremes[(col, label)] = (value, idx)
+                        wanted.add(idx)
+
+        for col in _categorical_columns(chunk):
+            if col in self._dropped_strata:
+                continue
+            seen = self.strata.setdefault(col, {})
+            values = chunk[col]
+            # Colunas de alta cardinalidade são descartadas antes de percorrer seus valores
+            if values.nunique() > self.max_cardinality:
+                self._drop_stratum(col)
+                continue
+            for idx, value in values.dropna().drop_duplicates().items():
+                if value not in seen:
+                    seen[value] = idx
+                    wanted.add(idx)
+            if len(seen) > self.max_cardinality:
+                self._drop_stratum(col)
+
+        if wanted:
+            rows = chunk.loc[sorted(wanted)]
+            self._rows = rows if self._rows is None else pd.concat([self._rows, rows])
+            # Descarta as linhas que deixaram de ser referenciadas (extremos superados, estratos descartados)
+            self._rows = self._rows[self._rows.index.isin(self._priority_labels())]
+        return self
+
+    def _drop_stratum(self, col):
+        self._dropped_strata.add(col)
+        self.strata.pop(col, None)
+
+    def _priority_labels(self) -> pd.Index:
+        labels = [idx for _, idx in self.extremes.values()]
+        labels += [idx for seen in self.strata.values() for idx in seen.values()]
+        return pd.Index(labels).unique()
+
+    def result(self) -> pd.DataFrame:
+        parts = []
+        if self._rows is not None:
+            parts.append(self._rows.loc[self._priority_labels().intersection(self._rows.index, sort=False)])
+        if self.reservoir.reservoir is not None:
+            parts.append(self.reservoir.reservoir)
+        if not parts:
+            return pd.DataFrame()
+        combined = pd.concat(parts)
+        combined = combined[~combined.index.duplicated()]
+        return combined.head(self.size)
+
+
+def sample_chunks(chunks: Iterable[pd.DataFrame], size: int, seed: Optional[int] = 42) -> pd.DataFrame:
+    sampler = StreamingSampler(size, seed)
+    for chunk in chunks:
+        sampler.update(chunk)
+    return sampler.result()
@@ -0,0 +1,61 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Agrupa chamadas concorrentes com a mesma chave: a primeira executa a função e as
+    demais aguardam o mesmo resultado (ou a mesma exceção).
+
+    A função roda em uma task própria, de modo que o cancelamento de um dos chamadores
+    não afeta os outros; a task só é cancelada quando nenhum chamador resta aguardando.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+
+    async def do(self, key: str, func: Callable[[], Awaitable]):
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._forget(key, task))
+        else:
+            metrics.increment("llm_requests_coalesced")
+            logger.info(f"Chamada ao LLM agrupada com outra idêntica em andamento ({key[:12]})")
+
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[task] == 1 and not task.done():
+                # Último chamador desistiu: a chamada não é mais necessária
+                task.cancel()
+                metrics.increment("llm_calls_cancelled")
+                logger.info(f"Chamada ao LLM cancelada: nenhum chamador aguardando ({key[:12]})")
+                self._forget(key, task)
+            raise
+        finally:
+            self._waiters[task] -= 1
+            if not self._waiters[task]:
+                del self._waiters[task]
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "waiters": sum(self._waiters.values()),
+        }
+
+
+llm_single_flight = SingleFlight()
+metrics.register_gauge("llm_single_flight", llm_single_flight.stats)
@@ -0,0 +1,177 @@
+"""
+Sketches mergeáveis para perfilamento aproximado em streaming.
+
+Cada sketch consome blocos de valores (arrays NumPy), ocupa memória limitada
+independentemente do número de linhas e pode ser combinado com outro sketch do
+mesmo tipo via `merge`, permitindo dividir o perfilamento entre workers.
+"""
+import math
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+class MomentsSketch:
+    """
+    Contagem, mínimo, máximo, média e variância (Welford / Chan et al.).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def update(self, values: np.ndarray):
+        values = values[~np.isnan(values)] if values.dtype.kind == "f" else values
+        if values.size == 0:
+            return
+        other = MomentsSketch()
+        other.count = int(values.size)
+        other.mean = float(values.mean(dtype=np.float64))
+        other.m2 = float(np.square(values - other.mean, dtype=np.float64).sum())
+        other.min = values.min().item()
+        other.max = values.max().item()
+        self.merge(other)
+
+    def merge(self, other: "MomentsSketch") -> "MomentsSketch":
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / total
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def std(self) -> Optional[float]:
+        if self.count < 2:
+            return None
+        return math.sqrt(self.m2 / (self.count - 1))
+
+
+class KLLSketch:
+    """
+    Sketch KLL para quantis aproximados.
+
+    Itens no nível h têm peso 2^h. Quando um nível excede sua capacidade, ele é
+    ordenado e metade dos itens (posições pares ou ímpares, ao acaso) sobe para o
+    nível seguinte. O erro de rank é da ordem de 1/k.
+    """
+
+    def __init__(self, k: int = 200, seed: Optional[int] = None):
+        self.k = k
+        self.n = 0
+        self.levels = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def update(self, values: np.ndarray):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        self.n += int(values.size)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self._compress()
+        return self
+
+    def _compress(self):
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if items.size > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                # Com tamanho ímpar, o último item permanece no nível atual com o mesmo peso
+                keep = items[-1:] if items.size % 2 else items[:0]
+                paired = items[:items.size - keep.size]
+                offset = int(self._rng.integers(0, 2))
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], paired[offset::2]])
+                self.levels[level] = keep
+                # A capacidade dos níveis inferiores depende da altura total; recomeça a verificação
+                level = 0
+                continue
+            level += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        if self.n == 0:
+            return None
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(items_at.size, 2 ** level, dtype=np.float64) for level, items_at in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        cumulative = np.cumsum(weights[order])
+        target = q * cumulative[-1]
+        index = min(int(np.searchsorted(cumulative, target, side="left")), items.size - 1)
+        return float(items[order][index])
+
+
+class HyperLogLog:
+    """
+    Estimativa de cardinalidade (nunique) com 2^p registradores de 1 byte.
+
+    O erro padrão relativo é ~1.04 / sqrt(2^p) (≈0.8% para p=14).
+    """
+
+    def __init__(self, precision: int = 14):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, values: np.ndarray):
+        if len(values) == 0:
+            return
+        hashes = pd.util.hash_array(np.asarray(values), categorize=True)
+        suffix_bits = 64 - self.precision
+        index = (hashes >> np.uint64(suffix_bits)).astype(np.int64)
+        suffix = hashes & np.uint64((1 << suffix_bits) - 1)
+        rank = (suffix_bits - _bit_length(suffix) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.precision != self.precision:
+            raise ValueError("HyperLogLog com precisões diferentes não podem ser combinados.")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> int:
+        m = self.registers.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            # Correção para cardinalidades pequenas (linear counting)
+            return int(round(m * math.log(m / zeros)))
+        return int(round(raw))
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    """
+    Número de bits significativos de cada uint64, calculado sem perda de precisão
+    dividindo o valor em duas metades de 32 bits.
+    """
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    high_bits = np.frexp(high)[1]
+    low_bits = np.frexp(low)[1]
+    return np.where(high_bits > 0, high_bits + 32, low_bits).astype(np.int64)
@@ -0,0 +1,111 @@
+"""
+Execução headless de um dashboard gerado, em um subprocesso isolado (ver smoke_testing).
+
+Uso: python smoke_runner.py <diretório com app.py e data.csv> <timeout em segundos> <limite de memória em MB>
+     python smoke_runner.py --check
+
+O modo --check descreve o ambiente em que o runner executa (usuário, interfaces de rede e
+versão do streamlit), para a verificação do sandbox na inicialização da API.
+
+Executado como script pelo interpretador SMOKE_TEST_PYTHON, sem importar a aplicação: só a
+biblioteca padrão e o streamlit. Limita memória, CPU e tamanho de arquivos do próprio processo,
+roda o app com o harness de testes do Streamlit (AppTest) e escreve o resultado em JSON na
+saída padrão.
+"""
+import json
+import os
+import resource
+import socket
+import sys
+import threading
+import time
+
+
+def _limit_resources(timeout: float, memory_mb: int):
+    memory = memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    # Margem sobre o timeout do app para a importação do streamlit; o processo pai também mata por tempo
+    cpu = int(timeout) + 30
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (64 * 1024 * 1024, 64 * 1024 * 1024))
+
+
+def _peak_memory_mb() -> float:
+    # ru_maxrss é dado em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _report(result: dict):
+    result["peak_memory_mb"] = _peak_memory_mb()
+    print(json.dumps(result), flush=True)
+    # A thread do script pode continuar rodando (ex.: laço infinito); encerra sem esperá-la
+    os._exit(0)
+
+
+def _watchdog(timeout: float, started: float):
+    # O timeout do AppTest não interrompe scripts que nunca devolvem o controle
+    def expire():
+        _report({
+            "status": "timeout",
+            "exceptions": [f"Execução excedeu {timeout:g}s"],
+            "seconds": time.monotonic() - started,
+        })
+    timer = threading.Timer(timeout + 1, expire)
+    timer.daemon = True
+    timer.start()
+
+
+def run(directory: str, timeout: float, memory_mb: int) -> dict:
+    _limit_resources(timeout, memory_mb)
+    os.chdir(directory)
+    try:
+        from streamlit.testing.v1 import AppTest
+    except ImportError as e:
+        return {"status": "unavailable", "exceptions": [str(e)]}
+
+    started = time.monotonic()
+    _watchdog(timeout, started)
+    try:
+        app = AppTest.from_file(os.path.join(directory, "app.py"), default_timeout=timeout)
+        app.run()
+    except MemoryError:
+        return {"status": "memory", "exceptions": ["MemoryError"], "seconds": time.monotonic() - started}
+    except RuntimeError as e:
+        # AppTest sinaliza o estouro de tempo com RuntimeError
+        status = "timeout" if "timed out" in str(e) else "failed"
+        return {"status": status, "exceptions": [str(e)], "seconds": time.monotonic() - started}
+    seconds = time.monotonic() - started
+
+    exceptions = [
+        "\n".join([f"{element.proto.type}: {element.message}", *element.stack_trace[-3:]])
+        for element in app.exception
+    ]
+    if any("MemoryError" in exception for exception in exceptions):
+        status = "memory"
+    else:
+        status = "failed" if exceptions else "passed"
+    return {
+        "status": status,
+        "exceptions": exceptions,
+        "seconds": seconds,
+    }
+
+
+def check() -> dict:
+    try:
+        import streamlit
+        version = streamlit.__version__
+    except ImportError:
+        version = None
+    return {
+        "uid": os.getuid(),
+        "interfaces": [name for _, name in socket.if_nameindex()],
+        "streamlit": version,
+    }
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--check"]:
+        print(json.dumps(check()), flush=True)
+    else:
+        _report(run(sys.argv[1], float(sys.argv[2]), int(sys.argv[3])))
@@ -0,0 +1,299 @@
+"""
+Verificação opcional dos dashboards gerados por execução headless.
+
+O `app.py` gerado roda contra o `data.csv` do dataset em um subprocesso (ver
+smoke_runner): com o usuário sem privilégios SMOKE_TEST_USER (setpriv), sem rede
+(namespace de rede vazio, via unshare), em um diretório temporário próprio, com um
+ambiente sem as variáveis da API (chaves de provedores, banco) e com limites de memória,
+CPU e tempo. O código gerado pode ser manipulado por injeção de prompt: sem outro usuário,
+ele leria o `.env` e os caches da API pelo caminho absoluto. No máximo SMOKE_TEST_WORKERS
+execuções simultâneas.
+
+Dashboards que levantam exceções, estouram o tempo ou a memória são rejeitados antes de
+chegarem ao usuário; o tempo de execução e o pico de memória são registrados como custo
+de execução do dashboard. O ambiente (streamlit instalado, usuário e rede) é verificado
+na inicialização quando SMOKE_TEST_ENABLED está ativo, e na primeira requisição que pede
+a execução nos demais casos. O usuário do sandbox e o namespace de rede exigem root (ou
+CAP_SYS_ADMIN para o unshare): sem eles, as requisições que pedem a execução falham com
+SmokeTestUnavailableError (503), antes da chamada ao LLM.
+"""
+import asyncio
+import json
+import logging
+import os
+import pwd
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field, asdict
+from typing import List, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from ..core.config import settings
+from . import metrics
+from .data_loader import write_dataset_csv
+
+logger = logging.getLogger(__name__)
+
+SMOKE_RUNNER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "smoke_runner.py")
+
+# Variáveis repassadas ao subprocesso; as demais (chaves de API, credenciais) ficam de fora
+SMOKE_TEST_ENV = {
+    "LANG": "C.UTF-8",
+    "PYTHONDONTWRITEBYTECODE": "1",
+    # Bibliotecas numéricas com uma thread: menos memória virtual reservada sob o RLIMIT_AS
+    "OMP_NUM_THREADS": "1",
+    "OPENBLAS_NUM_THREADS": "1",
+    "MKL_NUM_THREADS": "1",
+}
+
+# Status que rejeitam o dashboard ("unavailable", streamlit ausente, é um erro de configuração)
+REJECTED_STATUSES = {"failed", "timeout", "memory", "crashed"}
+
+_slots: Optional[asyncio.Semaphore] = None
+_running = 0
+_environment_checked = False
+# Falha da verificação do ambiente, repetida às requisições seguintes sem nova verificação
+_environment_error: Optional["SmokeTestUnavailableError"] = None
+
+
+class SmokeTestUnavailableError(Exception):
+    pass
+
+
+@dataclass
+class SmokeTestResult:
+    status: str
+    exceptions: List[str] = field(default_factory=list)
+    seconds: Optional[float] = None
+    peak_memory_mb: Optional[float] = None
+
+    @property
+    def rejected(self) -> bool:
+        return self.status in REJECTED_STATUSES
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def _sandbox_user() -> Optional[tuple]:
+    # (uid, gid) do usuário que executa o código gerado, ou None para o usuário da API
+    if not settings.SMOKE_TEST_USER:
+        return None
+    try:
+        entry = pwd.getpwnam(settings.SMOKE_TEST_USER)
+    except KeyError:
+        raise SmokeTestUnavailableError(f"Usuário SMOKE_TEST_USER inexistente: {settings.SMOKE_TEST_USER}")
+    return entry.pw_uid, entry.pw_gid
+
+
+def _command(directory: str, *args: str) -> List[str]:
+    """
+    Linha de comando do runner, dentro do sandbox: o unshare cria o namespace de rede
+    (ainda como root) e o setpriv troca de usuário antes de executar o interpretador.
+    O runner é copiado para o diretório da execução, já que o código da API pode não ser
+    legível pelo usuário do sandbox.
+    """
+    shutil.copy(SMOKE_RUNNER_PATH, os.path.join(directory, "smoke_runner.py"))
+    command = [settings.SMOKE_TEST_PYTHON or sys.executable, "smoke_runner.py", *args]
+    user = _sandbox_user()
+    if user is not None:
+        uid, gid = user
+        command = ["setpriv", f"--reuid={uid}", f"--regid={gid}", "--clear-groups", "--", *command]
+    if settings.SMOKE_TEST_ISOLATE_NETWORK:
+        command = ["unshare", "--net", "--", *command]
+    return command
+
+
+def _prepare(directory: str, code: str, source):
+    with open(os.path.join(directory, "app.py"), "w", encoding="utf-8") as f:
+        f.write(code)
+    write_dataset_csv(source, os.path.join(directory, "data.csv"))
+    user = _sandbox_user()
+    if user is not None:
+        # O diretório (HOME e TMPDIR do runner) passa a ser do usuário do sandbox
+        for name in ("", "app.py", "data.csv"):
+            _chown(os.path.join(directory, name), user)
+
+
+def _chown(path: str, user: tuple):
+    try:
+        os.chown(path, *user)
+    except OSError as e:
+        # A API não roda como root: não pode entregar os arquivos ao usuário do sandbox
+        raise SmokeTestUnavailableError(
+            f"Não foi possível preparar os arquivos para o usuário {settings.SMOKE_TEST_USER} ({e}); "
+            f"a execução de teste exige root ou SMOKE_TEST_USER vazio"
+        )
+
+
+def _environment(directory: str) -> dict:
+    env = {**SMOKE_TEST_ENV, "HOME": directory, "TMPDIR": directory}
+    if os.environ.get("PATH"):
+        env["PATH"] = os.environ["PATH"]
+    return env
+
+
+async def check_smoke_test_environment():
+    """
+    Executa o runner em modo --check dentro do sandbox e confirma que o streamlit está
+    instalado, que o processo roda com SMOKE_TEST_USER e que não há interfaces de rede
+    além da loopback. Levanta SmokeTestUnavailableError com os problemas encontrados.
+
+    O resultado é guardado: depois da primeira verificação, a chamada é imediata.
+    """
+    global _environment_checked, _environment_error
+    if _environment_error is not None:
+        raise _environment_error
+    if _environment_checked:
+        return
+    try:
+        await _check_environment()
+    except SmokeTestUnavailableError as e:
+        logger.error(str(e))
+        _environment_error = e
+        raise
+    _environment_checked = True
+
+
+async def _check_environment():
+    directory = tempfile.mkdtemp(prefix="autodash_smoke_")
+    try:
+        user = _sandbox_user()
+        if user is not None:
+            _chown(directory, user)
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *_command(directory, "--check"),
+                cwd=directory,
+                env=_environment(directory),
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except OSError as e:
+            raise SmokeTestUnavailableError(f"Não foi possível iniciar o sandbox da execução de teste: {e}")
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), settings.SMOKE_TEST_STARTUP_SECONDS)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise SmokeTestUnavailableError(
+                f"O runner da execução de teste não respondeu em {settings.SMOKE_TEST_STARTUP_SECONDS:g}s"
+            )
+        try:
+            environment = json.loads(stdout.decode("utf-8", "replace").strip().splitlines()[-1])
+        except (ValueError, IndexError):
+            # Ex.: "unshare failed: Operation not permitted" fora de root ou sob o seccomp padrão do Docker
+            detail = stderr.decode("utf-8", "replace").strip()[-500:]
+            raise SmokeTestUnavailableError(
+                f"Sandbox da execução de teste indisponível: {detail} (o isolamento exige root/CAP_SYS_ADMIN; "
+                f"ver SMOKE_TEST_USER e SMOKE_TEST_ISOLATE_NETWORK)"
+            )
+    finally:
+        shutil.rmtree(directory, True)
+
+    problems = []
+    if not environment["streamlit"]:
+        problems.append(f"streamlit não instalado em {settings.SMOKE_TEST_PYTHON or sys.executable}")
+    if user is not None and environment["uid"] != user[0]:
+        problems.append(f"o runner executa com uid {environment['uid']}, e não com {settings.SMOKE_TEST_USER}")
+    if settings.SMOKE_TEST_ISOLATE_NETWORK and set(environment["interfaces"]) - {"lo"}:
+        problems.append(f"o runner tem acesso à rede ({', '.join(environment['interfaces'])})")
+    if problems:
+        raise SmokeTestUnavailableError(f"Execução de teste indisponível: {'; '.join(problems)}")
+    logger.info(
+        f"Sandbox da execução de teste: streamlit {environment['streamlit']}, uid {environment['uid']}, "
+        f"interfaces {environment['interfaces']}"
+    )
+
+
+async def _run(directory: str) -> SmokeTestResult:
+    process = await asyncio.create_subprocess_exec(
+        *_command(directory, directory, str(settings.SMOKE_TEST_TIMEOUT_SECONDS), str(settings.SMOKE_TEST_MEMORY_MB)),
+        cwd=directory,
+        env=_environment(directory),
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
+    )
+    # Margem para a importação do streamlit, além do tempo do próprio app
+    deadline = settings.SMOKE_TEST_TIMEOUT_SECONDS + settings.SMOKE_TEST_STARTUP_SECONDS
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), deadline)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return SmokeTestResult("timeout", [f"Execução excedeu {deadline:.0f}s"], seconds=deadline)
+    except asyncio.CancelledError:
+        process.kill()
+        await process.wait()
+        raise
+
+    try:
+        output = json.loads(stdout.decode("utf-8", "replace").strip().splitlines()[-1])
+    except (ValueError, IndexError):
+        # Sem resultado: processo morto por limite de recursos (CPU, memória) ou falha do interpretador
+        detail = stderr.decode("utf-8", "replace").strip().splitlines()[-5:]
+        if process.returncode == -signal.SIGXCPU:
+            status = "timeout"
+        elif any("MemoryError" in line for line in detail):
+            status = "memory"
+        else:
+            status = "crashed"
+        return SmokeTestResult(status, detail or [f"Código de saída {process.returncode}"])
+    return SmokeTestResult(
+        status=output["status"],
+        exceptions=output.get("exceptions", []),
+        seconds=output.get("seconds"),
+        peak_memory_mb=output.get("peak_memory_mb"),
+    )
+
+
+async def smoke_test_dashboard(code: str, source) -> SmokeTestResult:
+    """
+    Executa o dashboard contra os dados em um subprocesso isolado e retorna o resultado.
+    """
+    global _slots, _running
+    if _slots is None:
+        _slots = asyncio.Semaphore(settings.SMOKE_TEST_WORKERS)
+    await check_smoke_test_environment()
+
+    async with _slots:
+        _running += 1
+        directory = tempfile.mkdtemp(prefix="autodash_smoke_")
+        started = time.monotonic()
+        try:
+            await run_in_threadpool(_prepare, directory, code, source)
+            result = await _run(directory)
+        finally:
+            _running -= 1
+            await run_in_threadpool(shutil.rmtree, directory, True)
+
+    metrics.increment(f"smoke_tests.{result.status}")
+    metrics.observe("smoke_test_wall_seconds", time.monotonic() - started)
+    if result.seconds is not None:
+        metrics.observe("smoke_test_run_seconds", result.seconds)
+    if result.peak_memory_mb is not None:
+        metrics.observe("smoke_test_peak_memory_mb", result.peak_memory_mb)
+    if result.status == "unavailable":
+        raise SmokeTestUnavailableError(f"Execução de teste indisponível: {'; '.join(result.exceptions)}")
+    logger.info(
+        f"Smoke test do dashboard: {result.status}, {result.seconds or 0:.1f}s, "
+        f"pico de memória {result.peak_memory_mb or 0:.0f} MB"
+    )
+    return result
+
+
+def smoke_test_stats() -> dict:
+    return {
+        "workers": settings.SMOKE_TEST_WORKERS,
+        "running": _running,
+    }
+
+
+metrics.register_gauge("smoke_tests", smoke_test_stats)
@@ -2,7 +2,10 @@ import uuid
 import threading
 import time
 
-# Dicionário para armazenar o estado: {uuid: {'code': ..., 'timestamp': ...}}
+from .dataset_registry import retain_dataset_file, release_dataset_file
+
+# Dicionário para armazenar o estado: {uuid: {'code': ..., 'table_data': ..., 'dataset_id': ..., 'timestamp': ...,
+# 'parent_id': ..., 'version': ...}}; edições criam uma nova entrada apontando para a versão anterior
 state_store = {}
 lock = threading.Lock()
 
@@ -12,12 +15,28 @@ EXPIRATION_TIME = 3600
 def generate_unique_id():
     return uuid.uuid4().hex
 
-def store_dashboard_code(code, preview_data):
+def store_dashboard_code(code, preview_data, dataset_id=None, parent_id=None):
     unique_id = generate_unique_id()
+    if isinstance(preview_data, str):
+        # Dataset em streaming: o arquivo é mantido enquanto a entrada existir
+        retain_dataset_file(preview_data)
     with lock:
-        state_store[unique_id] = {'code': code, 'table_data': preview_data, 'timestamp': time.time()}
+        parent = state_store.get(parent_id) if parent_id else None
+        version = parent.get('version', 1) + 1 if parent else 1
+        # preview_data é uma referência ao mesmo DataFrame do registro de datasets (sem cópia)
+        state_store[unique_id] = {
+            'code': code, 'table_data': preview_data, 'dataset_id': dataset_id, 'timestamp': time.time(),
+            'parent_id': parent_id, 'version': version
+        }
     return unique_id
 
+def get_dashboard_entry(unique_id):
+    with lock:
+        data = state_store.get(unique_id)
+        if data:
+            return dict(data)
+        return None
+
 def get_dashboard_code(unique_id):
     with lock:
         data = state_store.get(unique_id)
@@ -32,11 +51,16 @@ def get_table_data(unique_id):
             return data.get('table_data')
         return None
 
+def remove_expired_entries():
+    current_time = time.time()
+    with lock:
+        expired_keys = [key for key, value in state_store.items() if current_time - value['timestamp'] > EXPIRATION_TIME]
+        expired = [state_store.pop(key) for key in expired_keys]
+    for entry in expired:
+        if isinstance(entry['table_data'], str):
+            release_dataset_file(entry['table_data'])
+
 def cleanup_expired_entries():
     while True:
         time.sleep(600)  # Verifica a cada 10 minutos
-        current_time = time.time()
-        with lock:
-            expired_keys = [key for key, value in state_store.items() if current_time - value['timestamp'] > EXPIRATION_TIME]
-            for key in expired_keys:
-                del state_store[key]
+        remove_expired_entries()
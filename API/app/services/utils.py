@@ -1,58 +1,76 @@
 from http.client import HTTPException
 import os
+from .profiler import profile_chunks, profile_dataframe, render_profile
 
 def generate_data_description(df):
-    description = []
-    description.append(f"O dataset contém {df.shape[0]} linhas e {df.shape[1]} colunas.")
-    description.append("\nColunas e seus tipos de dados:")
-    for col in df.columns:
-        description.append(f"- {col}: {df[col].dtype}")
-    
-    numeric_columns = df.select_dtypes(include=['int64', 'float64']).columns
-    categorical_columns = df.select_dtypes(include=['object', 'category']).columns
-    
-    if len(numeric_columns) > 0:
-        description.append("\nColunas Numéricas:")
-        for col in numeric_columns:
-            description.append(
-                f"- {col}: min={df[col].min()}, max={df[col].max()}, média={df[col].mean():.2f}, "
-                f"mediana={df[col].median()}, desvio padrão={df[col].std():.2f}, "
-                f"valores ausentes={df[col].isnull().sum()}"
-            )
-    
-    if len(categorical_columns) > 0:
-        description.append("\nColunas Categóricas:")
-        for col in categorical_columns:
-            description.append(
-                f"- {col}: {df[col].nunique()} valores únicos, "
-                f"valores ausentes={df[col].isnull().sum()}"
-            )
-    
-    # Adicionando correlação para colunas numéricas
-    if len(numeric_columns) > 1:
-        corr_matrix = df[numeric_columns].corr().to_dict()
-        description.append("\nCorrelação entre colunas numéricas:")
-        for col1 in numeric_columns:
-            for col2 in numeric_columns:
-                if col1 != col2 and col2 not in description[-1]:
-                    corr_value = corr_matrix[col1][col2]
-                    description.append(f"- Correlação entre {col1} e {col2}: {corr_value:.2f}")
-                    break  # Para evitar repetições
-    
-    # Informações adicionais
-    description.append("\nResumo geral:")
-    description.append(f"- Total de valores ausentes no dataset: {df.isnull().sum().sum()}")
-    
-    return "\n".join(description)
+    """
+    Gera a descrição textual dos dados a partir do perfil vetorizado do dataset.
+    """
+    return render_profile(profile_dataframe(df))
+
+def generate_streaming_data_description(chunks, **kwargs):
+    """
+    Versão aproximada de generate_data_description para datasets maiores que a memória:
+    consome blocos de linhas e usa sketches (estatísticas aproximadas, sem correlações).
+    """
+    return render_profile(profile_chunks(chunks, **kwargs))
 
 def clean_dashboard_code(code: str) -> str:
-    lines = code.split('\n')
-    # Remove ```python at the start and ``` at the end, if present
-    if lines and lines[0].strip().startswith('```python'):
-        lines = lines[1:]
-    if lines and lines[-1].strip() == '```':
-        lines = lines[:-1]
-    return '\n'.join(line for line in lines if line.strip())
+    cleaner = DashboardCodeCleaner()
+    return cleaner.feed(code) + cleaner.finish()
+
+def is_valid_dashboard_code(code: str) -> bool:
+    """
+    Verificação rápida do código gerado: Python sintaticamente válido que usa Streamlit.
+    """
+    if not code or "streamlit" not in code:
+        return False
+    try:
+        compile(code, "dashboard.py", "exec")
+    except (SyntaxError, ValueError):
+        return False
+    return True
+
+class DashboardCodeCleaner:
+    """
+    Versão incremental de `clean_dashboard_code` para respostas em streaming.
+
+    Remove a cerca ```python da primeira linha, a cerca ``` da última linha e as linhas
+    em branco. Cada chamada de `feed` devolve apenas o texto já limpo das linhas
+    completas; a linha incompleta fica retida, pois pode ser a última.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._first_line = True
+        self._emitted = False
+
+    def feed(self, text: str) -> str:
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split('\n')
+        return ''.join(self._process(line) for line in lines)
+
+    def finish(self) -> str:
+        line, self._buffer = self._buffer, ""
+        if line.strip() == '```':
+            # Cerca na última linha da resposta (seguida de quebra de linha, ela é mantida)
+            return ""
+        return self._process(line)
+
+    def _process(self, line: str) -> str:
+        if self._first_line:
+            self._first_line = False
+            if line.strip().startswith('```python'):
+                return ""
+        if not line.strip():
+            return ""
+        return self._emit(line)
+
+    def _emit(self, line: str) -> str:
+        # Linhas são unidas por '\n', como no join de clean_dashboard_code
+        prefix = '\n' if self._emitted else ""
+        self._emitted = True
+        return prefix + line
 
 def fake_code():
     return """
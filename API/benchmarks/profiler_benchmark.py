@@ -0,0 +1,106 @@
+"""
+Benchmark do perfilamento de dados: compara a implementação original de
+generate_data_description (laço por coluna, uma varredura por estatística)
+com o profiler vetorizado de app/services/profiler.py.
+
+Uso (a partir do diretório API):
+    python -m benchmarks.profiler_benchmark --rows 1000000 --numeric 100 --categorical 20
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services.profiler import profile_dataframe, render_profile
+
+
+def legacy_generate_data_description(df):
+    description = []
+    description.append(f"O dataset contém {df.shape[0]} linhas e {df.shape[1]} colunas.")
+    description.append("\nColunas e seus tipos de dados:")
+    for col in df.columns:
+        description.append(f"- {col}: {df[col].dtype}")
+
+    numeric_columns = df.select_dtypes(include=['int64', 'float64']).columns
+    categorical_columns = df.select_dtypes(include=['object', 'category']).columns
+
+    if len(numeric_columns) > 0:
+        description.append("\nColunas Numéricas:")
+        for col in numeric_columns:
+            description.append(
+                f"- {col}: min={df[col].min()}, max={df[col].max()}, média={df[col].mean():.2f}, "
+                f"mediana={df[col].median()}, desvio padrão={df[col].std():.2f}, "
+                f"valores ausentes={df[col].isnull().sum()}"
+            )
+
+    if len(categorical_columns) > 0:
+        description.append("\nColunas Categóricas:")
+        for col in categorical_columns:
+            description.append(
+                f"- {col}: {df[col].nunique()} valores únicos, "
+                f"valores ausentes={df[col].isnull().sum()}"
+            )
+
+    if len(numeric_columns) > 1:
+        corr_matrix = df[numeric_columns].corr().to_dict()
+        description.append("\nCorrelação entre colunas numéricas:")
+        for col1 in numeric_columns:
+            for col2 in numeric_columns:
+                if col1 != col2 and col2 not in description[-1]:
+                    corr_value = corr_matrix[col1][col2]
+                    description.append(f"- Correlação entre {col1} e {col2}: {corr_value:.2f}")
+                    break
+
+    description.append("\nResumo geral:")
+    description.append(f"- Total de valores ausentes no dataset: {df.isnull().sum().sum()}")
+
+    return "\n".join(description)
+
+
+def build_frame(rows: int, numeric: int, categorical: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(numeric):
+        if i % 2:
+            values = rng.normal(size=rows)
+            values[rng.random(rows) < 0.01] = np.nan
+        else:
+            values = rng.integers(0, 1000, size=rows)
+        data[f"num_{i}"] = values
+    labels = np.array([f"cat_{k}" for k in range(50)], dtype=object)
+    for i in range(categorical):
+        data[f"cat_{i}"] = labels[rng.integers(0, len(labels), size=rows)]
+    return pd.DataFrame(data)
+
+
+def timed(func, *args, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--numeric", type=int, default=50)
+    parser.add_argument("--categorical", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    df = build_frame(args.rows, args.numeric, args.categorical)
+    print(f"DataFrame: {df.shape[0]} linhas x {df.shape[1]} colunas")
+
+    legacy = timed(legacy_generate_data_description, df, repeat=args.repeat)
+    vectorized = timed(lambda frame: render_profile(profile_dataframe(frame)), df, repeat=args.repeat)
+
+    print(f"generate_data_description (original): {legacy:.3f}s")
+    print(f"profile_dataframe + render_profile:   {vectorized:.3f}s")
+    print(f"speedup: {legacy / vectorized:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
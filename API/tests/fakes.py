@@ -0,0 +1,92 @@
+"""
+Provedores de LLM falsos para os testes do pipeline de geração.
+"""
+import asyncio
+import textwrap
+
+from app.models import AIModelEnum
+from app.services import code_validation, generation
+from app.services.llm_cache import LLMResponseCache
+from app.services.llm_models import AsyncAIModel
+from app.services.llm_providers import provider_registry, MODEL_TIER_PRIMARY, MODEL_TIER_FALLBACK
+
+DASHBOARD_CODE = textwrap.dedent("""
+    import streamlit as st
+    import pandas as pd
+    import plotly.express as px
+
+    df = pd.read_csv("data.csv")
+    st.title("Vendas")
+    st.plotly_chart(px.bar(df, x="genre", y="rating"))
+""").strip()
+
+
+class FakeLLM(AsyncAIModel):
+    """
+    Responde com `response` (texto ou função de (prompt, system)) após `delay` segundos
+    e registra as chamadas recebidas.
+    """
+
+    def __init__(self, model: str, response=DASHBOARD_CODE, delay: float = 0.0, chunk_size: int = 20):
+        self.model = model
+        self.params = {}
+        self.response = response
+        self.delay = delay
+        self.chunk_size = chunk_size
+        self.calls = []
+        self.cancelled = 0
+
+    def _text(self, prompt, system) -> str:
+        return self.response(prompt, system) if callable(self.response) else self.response
+
+    async def generate_response(self, prompt, system=None):
+        self.calls.append((prompt, system))
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        text = self._text(prompt, system)
+        if isinstance(text, Exception):
+            raise text
+        return text
+
+    async def stream_response(self, prompt, system=None):
+        self.calls.append((prompt, system))
+        text = self._text(prompt, system)
+        for i in range(0, len(text), self.chunk_size):
+            await asyncio.sleep(self.delay)
+            yield text[i:i + self.chunk_size]
+
+    async def close(self):
+        pass
+
+
+class FakeProviders:
+    def __init__(self):
+        self.clients = {}
+        for model_choice in AIModelEnum:
+            for tier in (MODEL_TIER_PRIMARY, MODEL_TIER_FALLBACK):
+                self.set(model_choice, tier)
+
+    def set(self, model_choice: AIModelEnum, tier: str = MODEL_TIER_PRIMARY, **kwargs) -> FakeLLM:
+        client = FakeLLM(f"{model_choice.value}-{tier}", **kwargs)
+        self.clients[model_choice, tier] = client
+        provider_registry._clients[model_choice, tier] = client
+        return client
+
+    def get(self, model_choice: AIModelEnum, tier: str = MODEL_TIER_PRIMARY) -> FakeLLM:
+        return self.clients[model_choice, tier]
+
+
+def install_fake_providers(monkeypatch, tmp_path) -> FakeProviders:
+    """
+    Substitui os clientes dos provedores por FakeLLM, usa um cache de respostas vazio em
+    `tmp_path` e valida o código no threadpool em vez do pool de processos.
+    """
+    monkeypatch.setattr(provider_registry, "_clients", {})
+    monkeypatch.setattr(generation, "llm_cache", LLMResponseCache(str(tmp_path / "llm_cache.sqlite3"), 3600, 10_000_000))
+    monkeypatch.setattr(code_validation, "_get_executor", lambda: None)
+    # store_generation grava o prompt em prompts/ no diretório atual
+    monkeypatch.chdir(tmp_path)
+    return FakeProviders()
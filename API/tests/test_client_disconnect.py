@@ -0,0 +1,131 @@
+import asyncio
+import os
+
+import pandas as pd
+import pytest
+from app.core.config import settings
+from app.models import AIModelEnum
+from app.services import generation
+from app.services.client_disconnect import ClientDisconnected, run_until_disconnected, stream_until_disconnected
+from app.services.dataset_registry import register_dataset
+from app.services.llm_scheduler import llm_scheduler
+from tests.fakes import install_fake_providers
+
+FRAME = pd.DataFrame({"genre": ["x", "y", "x"], "rating": [1.0, 2.0, 3.0]})
+
+
+class FakeRequest:
+    def __init__(self, disconnect_after: float = None):
+        self.disconnect_after = disconnect_after
+        self.started = None
+
+    async def is_disconnected(self) -> bool:
+        loop = asyncio.get_running_loop()
+        self.started = self.started or loop.time()
+        return self.disconnect_after is not None and loop.time() - self.started >= self.disconnect_after
+
+
+@pytest.fixture(autouse=True)
+def fast_poll(monkeypatch):
+    monkeypatch.setattr(settings, "CLIENT_DISCONNECT_POLL_SECONDS", 0.01)
+
+
+@pytest.fixture
+def providers(monkeypatch, tmp_path):
+    return install_fake_providers(monkeypatch, tmp_path)
+
+
+async def _slow(value, seconds: float, state: dict):
+    try:
+        await asyncio.sleep(seconds)
+        return value
+    except asyncio.CancelledError:
+        state["cancelled"] = True
+        raise
+
+
+@pytest.mark.asyncio
+async def test_returns_result_while_connected():
+    state = {}
+
+    assert await run_until_disconnected(FakeRequest(), _slow("pronto", 0.05, state)) == "pronto"
+    assert not state
+
+
+@pytest.mark.asyncio
+async def test_disconnect_cancels_work():
+    state = {}
+
+    with pytest.raises(ClientDisconnected):
+        await run_until_disconnected(FakeRequest(disconnect_after=0.05), _slow("pronto", 5, state))
+    # O cancelamento é entregue à task na próxima iteração do event loop
+    await asyncio.sleep(0.01)
+    assert state["cancelled"]
+
+
+@pytest.mark.asyncio
+async def test_work_error_propagates():
+    async def fail():
+        raise ValueError("falhou")
+
+    with pytest.raises(ValueError, match="falhou"):
+        await run_until_disconnected(FakeRequest(), fail())
+
+
+@pytest.mark.asyncio
+async def test_disconnect_cancels_provider_call(providers):
+    claude = providers.set(AIModelEnum.CLAUDE, delay=5)
+    generation_task = generation.generate_dashboard(FRAME, AIModelEnum.CLAUDE, register_dataset(FRAME))
+
+    with pytest.raises(ClientDisconnected):
+        await run_until_disconnected(FakeRequest(disconnect_after=0.1), generation_task)
+    await asyncio.sleep(0.05)
+
+    assert claude.cancelled == 1
+    # A vaga no agendador é liberada e nada é armazenado
+    assert llm_scheduler.stats()["claude"]["active"] == 0
+    assert not os.path.exists("prompts")
+
+
+async def _events(items, state: dict, idle: float = 0.0):
+    try:
+        for item in items:
+            if isinstance(item, Exception):
+                raise item
+            yield item
+        await asyncio.sleep(idle)
+    finally:
+        state["closed"] = True
+
+
+@pytest.mark.asyncio
+async def test_stream_passes_items_through():
+    state = {}
+
+    items = [item async for item in stream_until_disconnected(FakeRequest(), _events(["a", "b", "c"], state))]
+
+    assert items == ["a", "b", "c"]
+    assert state["closed"]
+
+
+@pytest.mark.asyncio
+async def test_stream_disconnect_while_generator_idle():
+    state = {}
+    received = []
+
+    with pytest.raises(ClientDisconnected):
+        async for item in stream_until_disconnected(FakeRequest(disconnect_after=0.05), _events(["a"], state, idle=5)):
+            received.append(item)
+
+    assert received == ["a"]
+    await asyncio.sleep(0.01)
+    assert state["closed"]
+
+
+@pytest.mark.asyncio
+async def test_stream_error_propagates():
+    state = {}
+
+    with pytest.raises(RuntimeError, match="provedor"):
+        async for _ in stream_until_disconnected(FakeRequest(), _events(["a", RuntimeError("provedor")], state)):
+            pass
@@ -0,0 +1,172 @@
+import pytest
+from app.core.config import settings
+from app.models import AIModelEnum
+from app.services.code_validation import analyze_code, repair_instruction, validate_code
+from app.services.generation import InvalidDashboardCode, validate_and_repair
+from app.services.prompt_builder import EDIT_INSTRUCTIONS
+from tests.fakes import install_fake_providers
+
+COLUMNS = ["genre", "rating", "studio"]
+
+
+@pytest.fixture
+def providers(monkeypatch, tmp_path):
+    return install_fake_providers(monkeypatch, tmp_path)
+
+
+def _edit(search: str, replace: str) -> str:
+    return f"<<<<<<< BUSCAR\n{search}\n=======\n{replace}\n>>>>>>> SUBSTITUIR"
+
+
+def test_valid_code():
+    code = (
+        "import streamlit as st\nimport pandas as pd\nimport plotly.express as px\n"
+        "df = pd.read_csv('data.csv')\n"
+        "st.plotly_chart(px.bar(df, x='genre', y=['rating']))\n"
+        "st.write(df.groupby('studio')['rating'].mean())\n"
+    )
+
+    result = analyze_code(code, COLUMNS)
+
+    assert result.ok
+    assert result.problems == []
+
+
+@pytest.mark.parametrize("code, message", [
+    ("", "vazio"),
+    ("import streamlit as st\nst.title('x'", "erro de sintaxe"),
+    ("import pandas as pd\nprint(1)", "não importa o streamlit"),
+    ("import streamlit as st\nreturn 1", "erro de sintaxe"),
+])
+def test_errors(code, message):
+    result = analyze_code(code, COLUMNS)
+
+    assert not result.ok
+    assert message in result.errors[0]
+
+
+def test_missing_columns_are_warnings_with_line_numbers():
+    code = (
+        "import streamlit as st\nimport pandas as pd\nimport plotly.express as px\n"
+        "data = pd.read_csv('data.csv')\n"
+        "filtered = data[data['rating'] > 2]\n"
+        "st.write(filtered['budget'])\n"
+        "st.plotly_chart(px.line(filtered, x='year', y='rating'))\n"
+    )
+
+    result = analyze_code(code, COLUMNS)
+
+    assert result.ok
+    assert result.warnings == [
+        "Linha 6: coluna 'budget' não existe nos dados",
+        "Linha 7: coluna 'year' não existe nos dados",
+    ]
+
+
+def test_columns_created_by_the_code_are_not_missing():
+    code = (
+        "import streamlit as st\nimport pandas as pd\n"
+        "df = pd.read_csv('data.csv')\n"
+        "df['score'] = df['rating'] * 2\n"
+        "totals = df.groupby('genre').agg(total=('rating', 'sum')).reset_index()\n"
+        "counts = df['genre'].value_counts().reset_index()\n"
+        "long = df.melt(id_vars=['genre'], value_name='valor')\n"
+        "st.write(df['score'], totals['total'], counts['count'], long['valor'], long['variable'])\n"
+    )
+
+    assert analyze_code(code, COLUMNS).warnings == []
+
+
+def test_repair_instruction_lists_problems_and_columns():
+    result = analyze_code("import streamlit as st\nimport pandas as pd\ndf = pd.read_csv('x')\ndf['ano']", COLUMNS)
+
+    instruction = repair_instruction(result, COLUMNS)
+
+    assert "coluna 'ano'" in instruction
+    assert "genre, rating, studio" in instruction
+
+
+@pytest.mark.asyncio
+async def test_validate_code_in_process_pool():
+    result = await validate_code("import streamlit as st\nst.title('x'", COLUMNS)
+
+    assert not result.ok
+
+
+BROKEN = "import streamlit as st\nst.title('Vendas'"
+FIXED = "import streamlit as st\nst.title('Vendas')"
+
+
+@pytest.mark.asyncio
+async def test_repair_fixes_errors(providers):
+    client = providers.set(AIModelEnum.CLAUDE, response=_edit("st.title('Vendas'", "st.title('Vendas')"))
+
+    code, report = await validate_and_repair(BROKEN, COLUMNS, AIModelEnum.CLAUDE)
+
+    assert code == FIXED
+    assert report["repairs"] == 1
+    assert report["errors"] == []
+    prompt, system = client.calls[0]
+    assert system == EDIT_INSTRUCTIONS
+    assert "erro de sintaxe" in prompt
+
+
+@pytest.mark.asyncio
+async def test_repair_requested_for_missing_columns(providers):
+    code = "import streamlit as st\nimport pandas as pd\ndf = pd.read_csv('data.csv')\nst.write(df['nota'])"
+    client = providers.set(AIModelEnum.CLAUDE, response=_edit("st.write(df['nota'])", "st.write(df['rating'])"))
+
+    repaired, report = await validate_and_repair(code, COLUMNS, AIModelEnum.CLAUDE)
+
+    assert repaired.endswith("st.write(df['rating'])")
+    assert report["repairs"] == 1
+    assert report["warnings"] == []
+    assert "coluna 'nota'" in client.calls[0][0]
+
+
+@pytest.mark.asyncio
+async def test_unresolved_missing_columns_do_not_reject_code(providers, monkeypatch):
+    monkeypatch.setattr(settings, "VALIDATION_MAX_REPAIRS", 2)
+    code = "import streamlit as st\nimport pandas as pd\ndf = pd.read_csv('data.csv')\nst.write(df['nota'])"
+    # A correção não casa com o código: nada muda, e a coluna continua como aviso
+    client = providers.set(AIModelEnum.CLAUDE, response=_edit("st.write(df['outra'])", "st.write(df['rating'])"))
+
+    repaired, report = await validate_and_repair(code, COLUMNS, AIModelEnum.CLAUDE)
+
+    assert repaired == code
+    assert report["repairs"] == 2
+    assert len(client.calls) == 2
+    assert report["warnings"] == ["Linha 4: coluna 'nota' não existe nos dados"]
+
+
+@pytest.mark.asyncio
+async def test_repair_that_breaks_valid_code_is_discarded(providers, monkeypatch):
+    monkeypatch.setattr(settings, "VALIDATION_MAX_REPAIRS", 1)
+    code = "import streamlit as st\nimport pandas as pd\ndf = pd.read_csv('data.csv')\nst.write(df['nota'])"
+    providers.set(AIModelEnum.CLAUDE, response=_edit("st.write(df['nota'])", "st.write(df['rating']"))
+
+    repaired, report = await validate_and_repair(code, COLUMNS, AIModelEnum.CLAUDE)
+
+    assert repaired == code
+    assert report["errors"] == []
+
+
+@pytest.mark.asyncio
+async def test_code_still_broken_after_repairs_is_rejected(providers, monkeypatch):
+    monkeypatch.setattr(settings, "VALIDATION_MAX_REPAIRS", 2)
+    client = providers.set(AIModelEnum.CLAUDE, response="sem blocos de edição")
+
+    with pytest.raises(InvalidDashboardCode, match="erro de sintaxe"):
+        await validate_and_repair(BROKEN, COLUMNS, AIModelEnum.CLAUDE)
+    assert len(client.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_valid_code_is_not_sent_for_repair(providers):
+    client = providers.get(AIModelEnum.CLAUDE)
+
+    code, report = await validate_and_repair(FIXED, COLUMNS, AIModelEnum.CLAUDE)
+
+    assert code == FIXED
+    assert report["repairs"] == 0
+    assert client.calls == []
@@ -0,0 +1,66 @@
+import io
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+
+
+@pytest.fixture
+def client():
+    # Sem o lifespan: os testes não chegam a chamar o LLM
+    return TestClient(app)
+
+
+def _arrow_stream(df: pd.DataFrame) -> bytes:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _parquet(df: pd.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    return buffer.getvalue()
+
+
+FRAME = pd.DataFrame({"genre": ["x", "y", "x"], "rating": [1.0, 2.0, 3.0]})
+
+MALFORMED = {
+    "arrow truncado": lambda: _arrow_stream(FRAME)[:-40],
+    "parquet truncado": lambda: _parquet(FRAME)[:-20],
+    "bytes aleatórios": lambda: b"isto nao e uma tabela colunar",
+    "vazio": lambda: b"",
+}
+
+
+@pytest.mark.parametrize("payload", MALFORMED.values(), ids=MALFORMED.keys())
+def test_generate_dashboard_rejects_malformed_columnar_body(client, payload):
+    response = client.post(
+        "/api/v1/generate-dashboard",
+        files={"table": ("table.arrows", payload(), "application/vnd.apache.arrow.stream")},
+        data={"model": "claude"}
+    )
+
+    assert response.status_code == 400
+    assert "Tabela colunar inválida" in response.json()["detail"]
+
+
+@pytest.mark.parametrize("payload", MALFORMED.values(), ids=MALFORMED.keys())
+def test_create_github_repo_rejects_malformed_columnar_body(client, payload):
+    response = client.post(
+        "/api/v1/create-github-repo",
+        files={"table": ("table.parquet", payload(), "application/vnd.apache.parquet")},
+        data={"access_token": "token", "repo_name": "repo", "generated_code": "import streamlit as st"}
+    )
+
+    assert response.status_code == 400
+
+
+def test_generate_dashboard_requires_table_field(client):
+    response = client.post("/api/v1/generate-dashboard", files={"other": ("x.csv", b"a,b", "text/csv")})
+
+    assert response.status_code == 422
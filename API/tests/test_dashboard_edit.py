@@ -0,0 +1,97 @@
+import pytest
+from app.services.dashboard_edit import DashboardEditError, EditBlock, apply_edit_blocks, parse_edit_blocks
+
+CODE = """import streamlit as st
+import plotly.express as px
+
+def render_chart(df):
+    fig = px.bar(df, x="genre", y="rating")
+    st.plotly_chart(fig)
+
+def render_table(df):
+    st.dataframe(df)
+"""
+
+
+def test_apply_single_block():
+    block = EditBlock('    fig = px.bar(df, x="genre", y="rating")', '    fig = px.pie(df, names="genre", values="rating")')
+
+    result = apply_edit_blocks(CODE, [block])
+
+    assert 'px.pie(df, names="genre", values="rating")' in result
+    assert "px.bar" not in result
+    assert result.count("\n") == CODE.count("\n")
+
+
+def test_apply_blocks_in_sequence():
+    blocks = [
+        EditBlock("import plotly.express as px", "import plotly.express as px\nimport plotly.graph_objects as go"),
+        EditBlock("    st.dataframe(df)", "    st.dataframe(df, use_container_width=True)"),
+    ]
+
+    result = apply_edit_blocks(CODE, blocks)
+
+    assert "import plotly.graph_objects as go" in result
+    assert "st.dataframe(df, use_container_width=True)" in result
+
+
+def test_missing_search_is_rejected():
+    block = EditBlock("st.line_chart(df)", "st.area_chart(df)")
+
+    with pytest.raises(DashboardEditError, match="não encontrado"):
+        apply_edit_blocks(CODE, [block])
+
+
+def test_duplicate_search_is_rejected():
+    code = CODE + "\ndef render_again(df):\n    st.dataframe(df)\n"
+
+    with pytest.raises(DashboardEditError, match="ambíguo"):
+        apply_edit_blocks(code, [EditBlock("    st.dataframe(df)", "    st.table(df)")])
+
+
+def test_failed_block_invalidates_whole_edit():
+    blocks = [
+        EditBlock("    st.dataframe(df)", "    st.table(df)"),
+        EditBlock("st.line_chart(df)", "st.area_chart(df)"),
+    ]
+
+    with pytest.raises(DashboardEditError):
+        apply_edit_blocks(CODE, blocks)
+
+
+def test_empty_search_is_rejected():
+    with pytest.raises(DashboardEditError):
+        apply_edit_blocks(CODE, [EditBlock("  ", "st.write('x')")])
+
+
+def test_indentation_is_reapplied_when_search_is_dedented():
+    # O modelo devolveu o trecho sem a indentação da função
+    block = EditBlock(
+        'fig = px.bar(df, x="genre", y="rating")\nst.plotly_chart(fig)',
+        'fig = px.pie(df, names="genre")\nif fig:\n    st.plotly_chart(fig)'
+    )
+
+    result = apply_edit_blocks(CODE, [block])
+
+    assert '    fig = px.pie(df, names="genre")\n    if fig:\n        st.plotly_chart(fig)\n' in result
+    compile(result, "app.py", "exec")
+
+
+def test_indentation_is_removed_when_search_is_over_indented():
+    block = EditBlock("        import plotly.express as px", "        import plotly.express as px\n        import numpy as np")
+
+    result = apply_edit_blocks(CODE, [block])
+
+    assert result.startswith("import streamlit as st\nimport plotly.express as px\nimport numpy as np\n")
+    compile(result, "app.py", "exec")
+
+
+def test_parse_edit_blocks():
+    response = (
+        "Segue a alteração:\r\n"
+        "<<<<<<< BUSCAR\r\n    st.dataframe(df)\r\n=======\r\n    st.table(df)\r\n>>>>>>> SUBSTITUIR\r\n"
+    )
+
+    assert parse_edit_blocks(response) == [EditBlock("    st.dataframe(df)", "    st.table(df)")]
+    with pytest.raises(DashboardEditError):
+        parse_edit_blocks("Sem blocos de edição")
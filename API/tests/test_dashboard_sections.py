@@ -0,0 +1,139 @@
+import asyncio
+import json
+import sys
+import time
+import types
+import uuid
+
+import numpy as np
+import pandas as pd
+import pytest
+from app.models import AIModelEnum
+from app.services.dashboard_sections import default_plan, parse_plan, render_preamble, stitch, UNAVAILABLE_SECTION_BODY
+from app.services.generation import complete_sectioned, prepare_prompt
+from app.services.llm_providers import MODEL_TIER_FALLBACK
+from app.services.prompt_builder import SECTION_PLAN_INSTRUCTIONS
+from tests.fakes import install_fake_providers
+
+FRAME = pd.DataFrame({
+    "genre": ["drama", "comedy", None, "drama", "comedy", None],
+    "studio": ["a", "b", "a", None, "b", "a"],
+    "rating": [1.0, 2.0, 3.0, 4.0, 5.0, 6.0],
+})
+
+PLAN = {
+    "title": "Filmes",
+    "sections": [
+        {"id": "kpis", "title": "Indicadores", "description": "Totais", "columns": ["rating", "inexistente"]},
+        {"id": "generos", "title": "Gêneros", "description": "Notas por gênero", "columns": ["genre", "rating"]},
+        {"id": "tabela", "title": "Dados", "description": "Tabela", "columns": []},
+    ],
+}
+
+BODIES = {
+    "Indicadores": 'st.metric("Total", df["rating"].sum())',
+    "Gêneros": 'st.bar_chart(df.groupby("genre")["rating"].mean())',
+    "Dados": "st.dataframe(df)",
+}
+
+
+@pytest.fixture
+def providers(monkeypatch, tmp_path):
+    return install_fake_providers(monkeypatch, tmp_path)
+
+
+def _section_response(prompt, system):
+    title = prompt.split("Seção a implementar: ")[1].split("\n")[0]
+    return f"```python\n{BODIES[title]}\n```"
+
+
+def test_parse_plan_drops_unknown_columns_and_limits_sections():
+    plan = parse_plan("Plano:\n" + json.dumps(PLAN), FRAME)
+
+    assert plan.title == "Filmes"
+    assert [section.id for section in plan.sections] == ["kpis", "generos", "tabela"]
+    assert plan.sections[0].columns == ["rating"]
+
+
+def test_invalid_plan_falls_back_to_default():
+    plan = parse_plan("não é um plano", FRAME)
+
+    assert plan == default_plan(FRAME)
+    assert plan.sections[-1].id == "tabela"
+
+
+def test_stitch_keeps_plan_order_and_replaces_invalid_sections():
+    plan = parse_plan(json.dumps(PLAN), FRAME)
+    code = stitch(plan, FRAME, [BODIES["Indicadores"], "def quebrado(:", ""])
+
+    compile(code, "app.py", "exec")
+    calls = [code.index(f"secao_{section.id}(df_filtrado)") for section in plan.sections]
+    assert calls == sorted(calls)
+    assert code.count(UNAVAILABLE_SECTION_BODY) == 2
+
+
+@pytest.mark.asyncio
+async def test_sections_generated_concurrently_and_stitched(providers):
+    providers.set(AIModelEnum.CLAUDE, MODEL_TIER_FALLBACK, response=json.dumps(PLAN))
+    sections = providers.set(AIModelEnum.CLAUDE, response=_section_response, delay=0.3)
+    dataset_id = uuid.uuid4().hex
+    prompt = prepare_prompt(FRAME, AIModelEnum.CLAUDE, dataset_id)
+
+    started = time.monotonic()
+    code = await complete_sectioned(FRAME, AIModelEnum.CLAUDE, dataset_id, prompt)
+    elapsed = time.monotonic() - started
+
+    # Três seções de 0,3s em paralelo, e não em série
+    assert len(sections.calls) == 3
+    assert elapsed < 0.75
+    assert providers.get(AIModelEnum.CLAUDE, MODEL_TIER_FALLBACK).calls[0][1] == SECTION_PLAN_INSTRUCTIONS
+    compile(code, "app.py", "exec")
+    for body in BODIES.values():
+        assert f"    {body}\n" in code
+    assert "```" not in code
+
+
+class _Sidebar:
+    def __init__(self, selections):
+        self.selections = selections
+
+    def header(self, *args):
+        pass
+
+    def multiselect(self, label, options, default):
+        return self.selections.get(label, default)
+
+
+def _run_preamble(monkeypatch, tmp_path, selections) -> pd.DataFrame:
+    streamlit = types.SimpleNamespace(
+        set_page_config=lambda **kwargs: None,
+        title=lambda *args: None,
+        cache_data=lambda func: func,
+        sidebar=_Sidebar(selections),
+    )
+    plotly = types.ModuleType("plotly")
+    plotly.express = types.ModuleType("plotly.express")
+    monkeypatch.setitem(sys.modules, "streamlit", streamlit)
+    monkeypatch.setitem(sys.modules, "plotly", plotly)
+    monkeypatch.setitem(sys.modules, "plotly.express", plotly.express)
+    monkeypatch.chdir(tmp_path)
+    FRAME.to_csv("data.csv", index=False)
+
+    namespace = {}
+    exec(render_preamble(parse_plan(json.dumps(PLAN), FRAME), FRAME), namespace)
+    return namespace["df_filtrado"]
+
+
+def test_default_filters_keep_rows_with_nulls(monkeypatch, tmp_path):
+    filtered = _run_preamble(monkeypatch, tmp_path, {})
+
+    # Mesmos totais do app gerado sem seções
+    assert len(filtered) == len(FRAME)
+    assert filtered["rating"].sum() == FRAME["rating"].sum()
+
+
+def test_changed_selection_filters_rows(monkeypatch, tmp_path):
+    filtered = _run_preamble(monkeypatch, tmp_path, {"genre": ["drama"]})
+
+    assert filtered["genre"].tolist() == ["drama", "drama"]
+    assert np.isclose(filtered["rating"].sum(), 5.0)
@@ -0,0 +1,123 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.main import app
+from app.services.data_loader import (
+    concat_chunks_by_column, iter_csv_chunks, iter_excel_chunks, read_uploaded_file
+)
+from tests.fakes import install_fake_providers
+
+FRAME = pd.DataFrame({
+    "genre": ["x", "y", "x", "z", "y", "x", "z"],
+    "rating": [1.0, 2.5, 3.0, np.nan, 4.0, 5.0, 2.0],
+    "votes": [10, 20, 30, 40, 50, 60, 70],
+})
+
+
+def _csv(df: pd.DataFrame) -> io.BytesIO:
+    return io.BytesIO(df.to_csv(index=False).encode("utf-8"))
+
+
+def _xlsx(df: pd.DataFrame) -> io.BytesIO:
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.fixture
+def providers(monkeypatch, tmp_path):
+    return install_fake_providers(monkeypatch, tmp_path)
+
+
+def test_csv_chunks_cover_all_rows():
+    chunks = list(iter_csv_chunks(_csv(FRAME), chunk_rows=3))
+
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), FRAME)
+
+
+def test_excel_chunks_skip_blank_rows():
+    blank = pd.DataFrame([[None, None, None]], columns=FRAME.columns)
+    frame = pd.concat([FRAME.iloc[:2].astype(object), blank, FRAME.iloc[2:].astype(object)])
+    chunks = list(iter_excel_chunks(_xlsx(frame), chunk_rows=4))
+
+    assert [len(chunk) for chunk in chunks] == [4, 3]
+    result = pd.concat(chunks, ignore_index=True)
+    assert result["genre"].tolist() == FRAME["genre"].tolist()
+    assert result["votes"].tolist() == FRAME["votes"].tolist()
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 2, 3, 100])
+def test_concat_by_column_matches_pd_concat(chunk_rows):
+    # Blocos com tipos diferentes na mesma coluna (int/float, int/object)
+    chunks = [
+        pd.DataFrame({"a": [1, 2], "b": [1, 2], "c": ["x", "y"]}),
+        pd.DataFrame({"a": [3.5, np.nan], "b": ["três", 4], "c": ["z", None]}),
+        pd.DataFrame({"a": [5, 6], "b": [5, 6], "c": ["w", "v"]}),
+    ]
+    pieces = [chunk.iloc[i:i + chunk_rows] for chunk in chunks for i in range(0, len(chunk), chunk_rows)]
+
+    result = concat_chunks_by_column(iter(pieces))
+
+    pd.testing.assert_frame_equal(result, pd.concat(pieces, ignore_index=True))
+
+
+def test_concat_by_column_without_chunks():
+    assert concat_chunks_by_column(iter([])) is None
+
+
+@pytest.mark.parametrize("filename, payload", [("dados.csv", _csv), ("dados.xlsx", _xlsx)])
+def test_read_uploaded_file(filename, payload):
+    result = read_uploaded_file(payload(FRAME), filename, chunk_rows=2)
+
+    assert result.shape == FRAME.shape
+    assert result["genre"].tolist() == FRAME["genre"].tolist()
+    assert result["rating"].equals(FRAME["rating"])
+
+
+def test_read_uploaded_file_rejects_empty_and_unknown_formats():
+    with pytest.raises(ValueError, match="não contém dados"):
+        read_uploaded_file(_xlsx(pd.DataFrame()), "vazio.xlsx")
+    with pytest.raises(ValueError, match="não suportado"):
+        read_uploaded_file(_csv(FRAME), "dados.json")
+
+
+def test_upload_endpoint_generates_dashboard(providers):
+    response = TestClient(app).post(
+        "/api/v1/generate-dashboard/upload",
+        files={"file": ("dados.csv", _csv(FRAME).getvalue(), "text/csv")},
+        data={"model": "claude"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["dashboard_code"].startswith("import streamlit as st")
+    # O prompt é montado a partir do arquivo lido em blocos
+    prompt, _ = providers.get("claude").calls[0]
+    assert "genre" in prompt and "votes" in prompt
+
+
+def test_upload_endpoint_rejects_oversized_files(providers, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_UPLOAD_BYTES", 16)
+
+    response = TestClient(app).post(
+        "/api/v1/datasets", files={"file": ("dados.csv", _csv(FRAME).getvalue(), "text/csv")}
+    )
+
+    assert response.status_code == 413
+
+
+def test_datasets_endpoint_registers_upload(providers):
+    response = TestClient(app).post(
+        "/api/v1/datasets", files={"file": ("dados.xlsx", _xlsx(FRAME).getvalue(), "application/octet-stream")}
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["rows"] == len(FRAME)
+    assert body["columns"] == ["genre", "rating", "votes"]
+    assert body["dataset_id"]
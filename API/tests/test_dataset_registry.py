@@ -0,0 +1,85 @@
+import os
+import time
+
+import pandas as pd
+import pytest
+from app.services import dataset_registry, state_manager
+from app.services.dataset_registry import (
+    compute_dataset_id, get_dataset, register_dataset, register_dataset_file, release_dataset_file,
+    remove_expired_datasets, retain_dataset_file
+)
+from app.services.state_manager import get_table_data, remove_expired_entries, store_dashboard_code
+
+
+@pytest.fixture
+def dataset_file(tmp_path):
+    path = tmp_path / "dataset.csv"
+    path.write_text("a,b\n1,2\n")
+    return str(path)
+
+
+def _expire(store, key):
+    store[key]["timestamp"] = time.time() - dataset_registry.EXPIRATION_TIME - 1
+
+
+def test_same_content_same_dataset_id():
+    df = pd.DataFrame({"a": [1, 2, 3], "b": ["x", "y", None]})
+
+    assert compute_dataset_id(df) == compute_dataset_id(df.copy())
+    assert compute_dataset_id(df) != compute_dataset_id(df.rename(columns={"b": "c"}))
+    assert register_dataset(df) == register_dataset(df.copy())
+    assert get_dataset(compute_dataset_id(df)) is df
+
+
+def test_expired_file_removed_without_references(dataset_file):
+    register_dataset_file("sem-referencias", dataset_file)
+    _expire(dataset_registry.dataset_store, "sem-referencias")
+
+    remove_expired_datasets()
+
+    assert get_dataset("sem-referencias") is None
+    assert not os.path.exists(dataset_file)
+
+
+def test_file_kept_while_dashboard_uses_it(dataset_file):
+    register_dataset_file("com-dashboard", dataset_file)
+    unique_id = store_dashboard_code("import streamlit", dataset_file, dataset_id="com-dashboard")
+    # Edição: nova versão apontando para o mesmo arquivo
+    edited_id = store_dashboard_code("import streamlit as st", dataset_file, "com-dashboard", parent_id=unique_id)
+
+    _expire(dataset_registry.dataset_store, "com-dashboard")
+    remove_expired_datasets()
+    assert get_dataset("com-dashboard") is None
+    assert get_table_data(edited_id) == dataset_file
+    assert os.path.exists(dataset_file)
+
+    _expire(state_manager.state_store, unique_id)
+    remove_expired_entries()
+    assert os.path.exists(dataset_file)
+
+    _expire(state_manager.state_store, edited_id)
+    remove_expired_entries()
+    assert not os.path.exists(dataset_file)
+
+
+def test_retained_file_survives_registry_expiry(dataset_file):
+    register_dataset_file("com-job", dataset_file)
+    retain_dataset_file(dataset_file)
+
+    _expire(dataset_registry.dataset_store, "com-job")
+    remove_expired_datasets()
+    assert os.path.exists(dataset_file)
+
+    release_dataset_file(dataset_file)
+    assert not os.path.exists(dataset_file)
+    assert dataset_file not in dataset_registry.file_references
+
+
+def test_registering_same_file_twice_counts_once(dataset_file):
+    register_dataset_file("duplicado", dataset_file)
+    register_dataset_file("duplicado", dataset_file)
+
+    assert dataset_registry.file_references[dataset_file] == 1
+    _expire(dataset_registry.dataset_store, "duplicado")
+    remove_expired_datasets()
+    assert not os.path.exists(dataset_file)
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.main import app
+from app.models import AIModelEnum
+from app.services import generation
+from app.services.dataset_registry import register_dataset
+from app.services.llm_providers import MODEL_TIER_FALLBACK
+from app.services.llm_scheduler import LLMUnavailableError
+from tests.fakes import install_fake_providers
+
+rng = np.random.default_rng(5)
+FRAME = pd.DataFrame({"genre": rng.choice(["x", "y", "z"], 3_000), "rating": rng.normal(5, 2, 3_000).round(3)})
+
+
+@pytest.fixture
+def providers(monkeypatch, tmp_path):
+    return install_fake_providers(monkeypatch, tmp_path)
+
+
+async def _generate(**kwargs):
+    return await generation.generate_dashboard(
+        FRAME, AIModelEnum.CLAUDE, register_dataset(FRAME), use_cache=False, **kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_no_deadline_by_default(providers):
+    providers.set(AIModelEnum.CLAUDE, delay=0.2)
+
+    result = await _generate()
+
+    assert result["tier"] == "primary"
+    assert result["model_name"] == settings.LLM_MODEL_CLAUDE
+    assert not providers.get(AIModelEnum.CLAUDE, MODEL_TIER_FALLBACK).calls
+
+
+@pytest.mark.asyncio
+async def test_deadline_falls_back_to_faster_tier(providers, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_FALLBACK_PROMPT_TOKEN_BUDGET", 2_000)
+    primary = providers.set(AIModelEnum.CLAUDE, delay=5)
+
+    result = await _generate(deadline=0.2)
+
+    assert result["tier"] == "fallback"
+    assert result["model_name"] == settings.LLM_FALLBACK_MODEL_CLAUDE
+    assert result["dashboard_code"].startswith("import streamlit as st")
+    assert primary.cancelled == 1
+    # O fallback recebe um prompt reduzido
+    fallback_prompt, _ = providers.get(AIModelEnum.CLAUDE, MODEL_TIER_FALLBACK).calls[0]
+    primary_prompt, _ = primary.calls[0]
+    assert len(fallback_prompt) < len(primary_prompt)
+
+
+@pytest.mark.asyncio
+async def test_fallback_timeout_is_unavailable(providers, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_FALLBACK_TIMEOUT_SECONDS", 0.1)
+    providers.set(AIModelEnum.CLAUDE, delay=5)
+    fallback = providers.set(AIModelEnum.CLAUDE, MODEL_TIER_FALLBACK, delay=5)
+
+    with pytest.raises(LLMUnavailableError) as error:
+        await _generate(deadline=0.1)
+
+    assert error.value.status_code == 504
+    assert fallback.cancelled == 1
+
+
+def test_deadline_from_request(providers):
+    providers.set(AIModelEnum.CLAUDE, delay=5)
+    table = {"columns": ["genre", "rating"], "data": [["x", 1.0], ["y", 2.0]]}
+
+    response = TestClient(app).post(
+        "/api/v1/generate-dashboard", json={"model": "claude", "table_data": table, "deadline": 0.2}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["tier"] == "fallback"
@@ -0,0 +1,98 @@
+import asyncio
+import os
+import time
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models import AIModelEnum
+from app.services import generation
+from app.services.dataset_registry import register_dataset
+from app.services.prompt_builder import DASHBOARD_INSTRUCTIONS
+from tests.fakes import install_fake_providers
+
+TABLE = {"columns": ["genre", "rating"], "data": [["x", 1.0], ["y", 2.0], ["x", 3.0]]}
+
+
+@pytest.fixture
+def providers(monkeypatch, tmp_path):
+    return install_fake_providers(monkeypatch, tmp_path)
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def _generate(client, **body):
+    return client.post("/api/v1/generate-dashboard", json={"model": "claude", "table_data": TABLE, **body})
+
+
+def test_generate_dashboard_endpoint(providers, client):
+    response = _generate(client)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["dashboard_code"].startswith("import streamlit as st")
+    assert (body["model"], body["tier"]) == ("claude", "primary")
+    prompt, system = providers.get(AIModelEnum.CLAUDE).calls[0]
+    assert system == DASHBOARD_INSTRUCTIONS
+    assert "genre,rating" in prompt
+    with open(os.path.join("prompts", f"{body['unique_id']}.txt")) as f:
+        assert f.read() == f"{DASHBOARD_INSTRUCTIONS}\n\n{prompt}"
+
+
+def test_repeated_generation_served_from_cache(providers, client):
+    first = _generate(client).json()
+    second = _generate(client).json()
+    assert second["dashboard_code"] == first["dashboard_code"]
+    assert len(providers.get(AIModelEnum.CLAUDE).calls) == 1
+
+    _generate(client, bypass_cache=True)
+    assert len(providers.get(AIModelEnum.CLAUDE).calls) == 2
+
+
+def test_generate_from_registered_dataset(providers, client):
+    dataset_id = _generate(client).json()["dataset_id"]
+
+    response = client.post("/api/v1/generate-dashboard", json={"model": "claude", "dataset_id": dataset_id})
+
+    assert response.status_code == 200
+    assert response.json()["dataset_id"] == dataset_id
+    assert client.post(
+        "/api/v1/generate-dashboard", json={"model": "claude", "dataset_id": "expirado"}
+    ).status_code == 404
+
+
+def test_invalid_code_returns_422(providers, client):
+    providers.set(AIModelEnum.CLAUDE, response="desculpe, não consigo ajudar")
+
+    response = _generate(client)
+
+    assert response.status_code == 422
+
+
+def test_inconsistent_rows_return_400(providers, client):
+    table = {"columns": ["genre", "rating"], "data": [["x", 1.0], ["y"]]}
+
+    response = client.post("/api/v1/generate-dashboard", json={"model": "claude", "table_data": table})
+
+    assert response.status_code == 400
+    assert not providers.get(AIModelEnum.CLAUDE).calls
+
+
+@pytest.mark.asyncio
+async def test_generations_do_not_block_event_loop(providers):
+    providers.set(AIModelEnum.CLAUDE, delay=0.3)
+    frames = [pd.DataFrame({"genre": ["x", "y"], "rating": [float(i), 2.0]}) for i in range(4)]
+
+    started = time.monotonic()
+    results = await asyncio.gather(*[
+        generation.generate_dashboard(df, AIModelEnum.CLAUDE, register_dataset(df)) for df in frames
+    ])
+
+    # As quatro chamadas ao provedor aguardam em paralelo
+    assert time.monotonic() - started < 0.9
+    assert len({result["unique_id"] for result in results}) == 4
+    assert len(providers.get(AIModelEnum.CLAUDE).calls) == 4
@@ -0,0 +1,168 @@
+import asyncio
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app.api.v1 import dashboard
+from app.main import app
+from app.models import AIModelEnum
+from app.services import generation_jobs
+from app.services.generation_jobs import (
+    JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JobQueueFullError, JobRunner, JobStore
+)
+from tests.fakes import install_fake_providers
+
+FRAME = pd.DataFrame({"genre": ["x", "y", "x"], "rating": [1.0, 2.0, 3.0]})
+
+PARAMS = {
+    "model": "claude", "use_cache": True, "user": "teste", "hedge": False, "hedge_delay": None,
+    "deadline": None, "sectioned": False, "smoke_test": False,
+}
+
+
+@pytest.fixture
+def providers(monkeypatch, tmp_path):
+    return install_fake_providers(monkeypatch, tmp_path)
+
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    monkeypatch.setattr(generation_jobs, "JOB_DATASET_DIR", str(tmp_path / "jobs"))
+    return JobStore(str(tmp_path / "generation_jobs.sqlite3"))
+
+
+async def _wait_finished(store: JobStore, job_id: str) -> dict:
+    for _ in range(200):
+        job = store.get(job_id)
+        if job["status"] in (JOB_DONE, JOB_FAILED):
+            return job
+        await asyncio.sleep(0.02)
+    raise AssertionError(f"Job {job_id} não terminou: {job['status']}")
+
+
+@pytest.mark.asyncio
+async def test_job_runs_to_done(providers, store):
+    runner = JobRunner(store, workers=2, max_queued=10)
+    await runner.start()
+    try:
+        job_id = await runner.submit(FRAME, "dataset-pronto", PARAMS)
+        assert store.get(job_id)["status"] in (JOB_QUEUED, JOB_RUNNING)
+        path = store.get(job_id)["dataset_path"]
+        job = await _wait_finished(store, job_id)
+    finally:
+        await runner.stop()
+
+    assert job["status"] == JOB_DONE
+    assert job["attempts"] == 1
+    assert job["result"]["dashboard_code"].startswith("import streamlit as st")
+    assert job["result"]["dataset_id"] == "dataset-pronto"
+    # A cópia do dataset do job é removida ao final
+    assert not os.path.exists(path)
+
+
+@pytest.mark.asyncio
+async def test_invalid_code_fails_with_422(providers, store):
+    providers.set(AIModelEnum.CLAUDE, response="não é código")
+    runner = JobRunner(store, workers=1, max_queued=10)
+    await runner.start()
+    try:
+        job = await _wait_finished(store, await runner.submit(FRAME, "dataset-invalido", PARAMS))
+    finally:
+        await runner.stop()
+
+    assert job["status"] == JOB_FAILED
+    assert job["error_status"] == 422
+
+
+@pytest.mark.asyncio
+async def test_worker_survives_store_errors(providers, store, monkeypatch):
+    mark_running = store.mark_running
+    failures = []
+
+    def flaky_mark_running(job_id):
+        if not failures:
+            failures.append(job_id)
+            raise sqlite3.OperationalError("database is locked")
+        mark_running(job_id)
+
+    monkeypatch.setattr(store, "mark_running", flaky_mark_running)
+    runner = JobRunner(store, workers=1, max_queued=10)
+    await runner.start()
+    try:
+        first = await runner.submit(FRAME, "dataset-a", PARAMS)
+        second = await runner.submit(FRAME, "dataset-b", PARAMS)
+        second_job = await _wait_finished(store, second)
+        first_job = store.get(first)
+    finally:
+        await runner.stop()
+
+    assert first_job["status"] == JOB_FAILED
+    assert first_job["error_status"] == 500
+    assert "database is locked" in first_job["error"]
+    # O único worker continua atendendo a fila
+    assert second_job["status"] == JOB_DONE
+
+
+@pytest.mark.asyncio
+async def test_queue_full(store):
+    runner = JobRunner(store, workers=0, max_queued=2)
+    await runner.start()
+    await runner.submit(FRAME, "dataset-1", PARAMS)
+    await runner.submit(FRAME, "dataset-2", PARAMS)
+
+    with pytest.raises(JobQueueFullError):
+        await runner.submit(FRAME, "dataset-3", PARAMS)
+    assert runner.stats()["queued"] == 2
+
+
+@pytest.mark.asyncio
+async def test_mixed_object_columns_persisted(store):
+    mixed = pd.DataFrame({"codigo": [1, "A-2", 3.5], "valor": [1, 2, 3]})
+    runner = JobRunner(store, workers=0, max_queued=2)
+    await runner.start()
+
+    job = store.get(await runner.submit(mixed, "dataset-misto", PARAMS))
+
+    assert job["dataset_path"].endswith(".pkl")
+    pd.testing.assert_frame_equal(generation_jobs._load_job_source(job), mixed)
+
+
+def test_recover_requeues_interrupted_jobs(store, tmp_path):
+    store.create("primeiro", "dataset", None, False, PARAMS)
+    store.create("interrompido", "dataset", None, False, PARAMS)
+    store.create("concluido", "dataset", None, False, PARAMS)
+    store.mark_running("interrompido")
+    store.mark_running("concluido")
+    store.mark_done("concluido", {"dashboard_code": "import streamlit"})
+
+    # Outra instância sobre o mesmo arquivo, como após um reinício
+    restarted = JobStore(store.path)
+
+    assert restarted.recover() == ["primeiro", "interrompido"]
+    assert restarted.get("interrompido")["status"] == JOB_QUEUED
+    assert restarted.get("interrompido")["attempts"] == 1
+    assert restarted.count_by_status() == {JOB_QUEUED: 2, JOB_DONE: 1}
+
+
+def test_status_and_result_endpoints(store, monkeypatch):
+    monkeypatch.setattr(dashboard, "job_store", store)
+    store.create("pronto", "dataset", None, False, PARAMS)
+    store.mark_done("pronto", {"unique_id": "abc", "dashboard_code": "import streamlit"})
+    store.create("falhou", "dataset", None, False, PARAMS)
+    store.mark_failed("falhou", "Código gerado inválido", 422)
+    store.create("na-fila", "dataset", None, False, PARAMS)
+    client = TestClient(app)
+
+    status = client.get("/api/v1/generate-dashboard/jobs/pronto").json()
+    assert status["status"] == JOB_DONE
+    assert status["model"] == "claude"
+    assert client.get("/api/v1/generate-dashboard/jobs/pronto/result").json()["unique_id"] == "abc"
+
+    failed = client.get("/api/v1/generate-dashboard/jobs/falhou/result")
+    assert failed.status_code == 422
+    assert failed.json()["detail"] == "Código gerado inválido"
+
+    assert client.get("/api/v1/generate-dashboard/jobs/na-fila/result").status_code == 409
+    assert client.get("/api/v1/generate-dashboard/jobs/inexistente").status_code == 404
@@ -0,0 +1,78 @@
+import time
+
+import pandas as pd
+import pytest
+from app.models import AIModelEnum
+from app.services import generation, metrics
+from app.services.dataset_registry import register_dataset
+from app.services.generation import InvalidDashboardCode
+from tests.fakes import install_fake_providers
+
+FRAME = pd.DataFrame({"genre": ["x", "y", "x"], "rating": [1.0, 2.0, 3.0]})
+
+
+@pytest.fixture
+def providers(monkeypatch, tmp_path):
+    return install_fake_providers(monkeypatch, tmp_path)
+
+
+async def _generate(**kwargs):
+    return await generation.generate_dashboard(
+        FRAME, AIModelEnum.CLAUDE, register_dataset(FRAME), use_cache=False, hedge=True, **kwargs
+    )
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_does_not_fire_hedge(providers):
+    result = await _generate(hedge_delay=1.0)
+
+    assert result["model"] == "claude"
+    assert not providers.get(AIModelEnum.OPENAI).calls
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_loses_to_hedge(providers):
+    claude = providers.set(AIModelEnum.CLAUDE, delay=5.0)
+    fired = metrics.snapshot()["counters"].get("llm_hedges_fired", 0)
+
+    started = time.monotonic()
+    result = await _generate(hedge_delay=0.05)
+
+    assert time.monotonic() - started < 2.0
+    assert result["model"] == "openai"
+    # A chamada perdedora é cancelada
+    assert claude.cancelled == 1
+    assert len(providers.get(AIModelEnum.OPENAI).calls) == 1
+    assert metrics.snapshot()["counters"]["llm_hedges_fired"] == fired + 1
+
+
+@pytest.mark.asyncio
+async def test_invalid_primary_fires_hedge_without_waiting(providers):
+    providers.set(AIModelEnum.CLAUDE, response="desculpe, não consigo")
+
+    started = time.monotonic()
+    result = await _generate(hedge_delay=30.0)
+
+    assert time.monotonic() - started < 2.0
+    assert result["model"] == "openai"
+
+
+@pytest.mark.asyncio
+async def test_hedge_prompt_built_for_secondary(providers):
+    providers.set(AIModelEnum.CLAUDE, delay=5.0)
+
+    result = await _generate(hedge_delay=0.0)
+
+    prompt, _ = providers.get(AIModelEnum.OPENAI).calls[0]
+    assert "genre,rating" in prompt
+    with open(f"prompts/{result['unique_id']}.txt") as f:
+        assert f.read().endswith(prompt)
+
+
+@pytest.mark.asyncio
+async def test_both_providers_invalid(providers):
+    providers.set(AIModelEnum.CLAUDE, response="sem código")
+    providers.set(AIModelEnum.OPENAI, response="também sem código")
+
+    with pytest.raises(InvalidDashboardCode):
+        await _generate(hedge_delay=0.0)
@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+import pytest
+from app.services import llm_cache as cache_module
+from app.services.llm_cache import LLMResponseCache, normalize_prompt
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(cache_module, "time", SimpleNamespace(time=fake))
+    return fake
+
+
+def _cache(tmp_path, ttl_seconds=3600, max_bytes=1_000_000):
+    return LLMResponseCache(str(tmp_path / "llm_cache.sqlite3"), ttl_seconds, max_bytes)
+
+
+def test_put_and_get(tmp_path, clock):
+    cache = _cache(tmp_path)
+    cache.put("key", "model", "resposta")
+
+    assert cache.get("key") == "resposta"
+    assert cache.get("other") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_entries_expire_after_ttl(tmp_path, clock):
+    cache = _cache(tmp_path, ttl_seconds=60)
+    cache.put("key", "model", "resposta")
+
+    clock.now += 59
+    assert cache.get("key") == "resposta"
+
+    # O acesso não renova o prazo: a validade conta da gravação
+    clock.now += 2
+    assert cache.get("key") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_expired_entries_removed_on_put(tmp_path, clock):
+    cache = _cache(tmp_path, ttl_seconds=60)
+    cache.put("old", "model", "antiga")
+    clock.now += 61
+    cache.put("new", "model", "nova")
+
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert stats["evictions"] == 1
+
+
+def test_least_recently_used_evicted_over_max_bytes(tmp_path, clock):
+    cache = _cache(tmp_path, max_bytes=30)
+    for key in ["a", "b", "c"]:
+        cache.put(key, "model", key * 10)
+        clock.now += 1
+
+    # "a" é lida e passa a ser a mais recente; "b" é a primeira a sair
+    assert cache.get("a") == "a" * 10
+    clock.now += 1
+    cache.put("d", "model", "d" * 10)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "a" * 10
+    assert cache.get("c") == "c" * 10
+    assert cache.get("d") == "d" * 10
+    assert cache.stats()["bytes"] == 30
+    assert cache.stats()["evictions"] == 1
+
+
+def test_response_larger_than_cache_is_not_stored(tmp_path, clock):
+    cache = _cache(tmp_path, max_bytes=10)
+    cache.put("key", "model", "x" * 11)
+
+    assert cache.get("key") is None
+
+
+def test_delete(tmp_path, clock):
+    cache = _cache(tmp_path)
+    cache.put("key", "model", "resposta")
+    cache.delete("key")
+
+    assert cache.get("key") is None
+
+
+def test_normalize_prompt_ignores_formatting():
+    assert normalize_prompt("\r\n    linha 1  \r\n    linha 2\r\n") == normalize_prompt("linha 1\nlinha 2")
@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+import pytest
+from app.services import metrics
+from app.services.llm_cache import cache_key
+from app.services.llm_models import AsyncClaudeClient, AsyncOpenAIClient
+from app.services.prompt_builder import DASHBOARD_INSTRUCTIONS, render_prompt
+
+
+@pytest.fixture
+def claude():
+    return AsyncClaudeClient(model="claude-teste", max_tokens=100)
+
+
+@pytest.fixture
+def openai_client():
+    return AsyncOpenAIClient(model="o1-teste")
+
+
+def _counter(name: str) -> float:
+    return metrics.snapshot()["counters"].get(name, 0)
+
+
+def test_claude_instructions_sent_as_cached_system_block(claude):
+    request = claude._request("dados", DASHBOARD_INSTRUCTIONS)
+
+    assert request["system"] == [{"type": "text", "text": DASHBOARD_INSTRUCTIONS, "cache_control": {"type": "ephemeral"}}]
+    assert request["messages"] == [{"role": "user", "content": [
+        {"type": "text", "text": "dados", "cache_control": {"type": "ephemeral"}}
+    ]}]
+    assert (request["model"], request["max_tokens"]) == ("claude-teste", 100)
+    assert "system" not in claude._request("dados", None)
+
+
+def test_openai_instructions_lead_user_message(openai_client):
+    # O o1-mini não aceita mensagens de sistema
+    assert openai_client._messages("dados", "instruções") == [{"role": "user", "content": "instruções\n\ndados"}]
+    assert openai_client._messages("dados", None) == [{"role": "user", "content": "dados"}]
+    assert openai_client.params == {}
+
+
+def test_instructions_precede_data():
+    prompt = render_prompt("descrição", "a,b\n1,2\n", is_sample=False)
+
+    assert prompt.startswith("Descrição dos dados:")
+    assert DASHBOARD_INSTRUCTIONS not in prompt
+
+
+def test_claude_usage_counts_cached_tokens(claude):
+    before = [_counter(f"llm_{kind}.claude") for kind in ("input_tokens", "cached_input_tokens", "cache_write_tokens")]
+
+    claude._record_usage(SimpleNamespace(input_tokens=10, cache_read_input_tokens=900, cache_creation_input_tokens=90))
+
+    after = [_counter(f"llm_{kind}.claude") for kind in ("input_tokens", "cached_input_tokens", "cache_write_tokens")]
+    assert [b - a for a, b in zip(before, after)] == [1000, 900, 90]
+
+
+def test_openai_usage_without_details(openai_client):
+    before = _counter("llm_input_tokens.openai"), _counter("llm_cached_input_tokens.openai")
+
+    openai_client._record_usage(SimpleNamespace(prompt_tokens=50, prompt_tokens_details=SimpleNamespace(cached_tokens=30)))
+    openai_client._record_usage(SimpleNamespace(prompt_tokens=5, prompt_tokens_details=None))
+
+    assert _counter("llm_input_tokens.openai") - before[0] == 55
+    assert _counter("llm_cached_input_tokens.openai") - before[1] == 30
+
+
+def test_cache_key_includes_instructions(claude):
+    assert cache_key(claude, "dados", "instruções") != cache_key(claude, "dados", "outras instruções")
+    assert cache_key(claude, "dados", None) == cache_key(claude, "dados", "")
+    assert cache_key(claude, "dados", "instruções") != cache_key(AsyncClaudeClient(model="outro"), "dados", "instruções")
@@ -0,0 +1,98 @@
+import httpx
+import pytest
+from app.core.config import settings
+from app.models import AIModelEnum
+from app.services import llm_providers
+from app.services.llm_models import AsyncClaudeClient, AsyncOpenAIClient
+from app.services.llm_providers import MODEL_TIER_FALLBACK, MODEL_TIER_PRIMARY, ProviderRegistry, tier_model
+from app.services.llm_scheduler import LLMScheduler
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    scheduler = LLMScheduler()
+    monkeypatch.setattr(llm_providers, "llm_scheduler", scheduler)
+    return scheduler
+
+
+@pytest.fixture
+def registry():
+    return ProviderRegistry()
+
+
+async def _exchange(registry, model_choice, headers):
+    # Executa os event hooks do cliente HTTP do provedor para uma requisição e sua resposta
+    http_client = registry._http_client(model_choice)
+    request = httpx.Request("POST", "https://llm.invalid/v1/messages")
+    for hook in http_client.event_hooks["request"]:
+        await hook(request)
+    for hook in http_client.event_hooks["response"]:
+        await hook(httpx.Response(200, headers=headers, request=request))
+
+
+def test_tiers_share_provider_http_client(registry):
+    primary = registry.get(AIModelEnum.CLAUDE)
+    fallback = registry.get(AIModelEnum.CLAUDE, MODEL_TIER_FALLBACK)
+
+    assert isinstance(primary, AsyncClaudeClient)
+    assert isinstance(registry.get(AIModelEnum.OPENAI), AsyncOpenAIClient)
+    assert registry.get(AIModelEnum.CLAUDE) is primary
+    assert (primary.model, fallback.model) == (settings.LLM_MODEL_CLAUDE, settings.LLM_FALLBACK_MODEL_CLAUDE)
+    assert primary.client._client is fallback.client._client
+    assert primary.client._client is not registry.get(AIModelEnum.OPENAI).client._client
+    # As repetições ficam com o agendador
+    assert primary.client.max_retries == 0
+
+
+def test_tier_model(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_MAX_TOKENS_OPENAI", None)
+
+    assert tier_model(AIModelEnum.CLAUDE, MODEL_TIER_PRIMARY) == (settings.LLM_MODEL_CLAUDE, settings.LLM_MAX_TOKENS_CLAUDE)
+    assert tier_model(AIModelEnum.OPENAI, MODEL_TIER_PRIMARY) == (settings.LLM_MODEL_OPENAI, None)
+    assert tier_model(AIModelEnum.OPENAI, MODEL_TIER_FALLBACK) == (
+        settings.LLM_FALLBACK_MODEL_OPENAI, settings.LLM_FALLBACK_MAX_TOKENS
+    )
+
+
+@pytest.mark.asyncio
+async def test_http_hooks_count_requests_and_read_rate_limits(registry, scheduler):
+    await _exchange(registry, AIModelEnum.CLAUDE, {"anthropic-ratelimit-requests-remaining": "42"})
+    await _exchange(registry, AIModelEnum.CLAUDE, {
+        "anthropic-ratelimit-requests-remaining": "41",
+        "anthropic-ratelimit-input-tokens-remaining": "0",
+        "anthropic-ratelimit-input-tokens-reset": "30s",
+    })
+
+    assert registry.stats()["claude"]["requests"] == 2
+    stats = scheduler.stats()["claude"]
+    assert stats["provider_remaining"] == {
+        "anthropic-ratelimit-requests-remaining": 41, "anthropic-ratelimit-input-tokens-remaining": 0
+    }
+    # Cota esgotada: o provedor fica pausado até o reset
+    assert 25 < stats["paused_for_seconds"] <= 30
+    await registry.close()
+
+
+@pytest.mark.asyncio
+async def test_openai_headers_observed(registry, scheduler):
+    await _exchange(registry, AIModelEnum.OPENAI, {"x-ratelimit-remaining-requests": "7", "x-ratelimit-remaining-tokens": "n/a"})
+
+    assert scheduler.stats()["openai"]["provider_remaining"] == {"x-ratelimit-remaining-requests": 7}
+    assert scheduler.stats()["openai"]["paused_for_seconds"] == 0
+    assert registry.stats()["openai"]["requests"] == 1
+    await registry.close()
+
+
+@pytest.mark.asyncio
+async def test_close_releases_clients(registry):
+    registry.start()
+    http_client = registry._http_client(AIModelEnum.CLAUDE)
+    assert len(registry._clients) == 2 * len(AIModelEnum)
+
+    await registry.close()
+
+    assert http_client.is_closed
+    assert registry.stats() == {}
+    # Depois de fechado, um novo cliente é criado sob demanda
+    assert registry.get(AIModelEnum.CLAUDE).client._client is not http_client
+    await registry.close()
@@ -0,0 +1,188 @@
+import asyncio
+from types import SimpleNamespace
+
+import anthropic
+import httpx
+import pytest
+from app.core.config import settings
+from app.models import AIModelEnum
+from app.services import llm_scheduler as scheduler_module
+from app.services.llm_scheduler import FairQueue, LLMScheduler, LLMUnavailableError, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(scheduler_module, "time", SimpleNamespace(monotonic=fake, time=lambda: fake.now))
+    return fake
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded = []
+    real_sleep = asyncio.sleep
+
+    async def fake_sleep(delay, *args, **kwargs):
+        recorded.append(delay)
+        await real_sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", fake_sleep)
+    return recorded
+
+
+@pytest.fixture
+def retry_settings(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 2)
+    monkeypatch.setattr(settings, "LLM_BACKOFF_BASE_SECONDS", 0.5)
+    monkeypatch.setattr(settings, "LLM_BACKOFF_MAX_SECONDS", 1.0)
+
+
+def _status_error(error_class, status_code, headers=None):
+    request = httpx.Request("POST", "https://api.anthropic.com/v1/messages")
+    response = httpx.Response(status_code, headers=headers or {}, request=request)
+    return error_class("erro do provedor", response=response, body=None)
+
+
+def test_token_bucket_refills_over_time(clock):
+    bucket = TokenBucket(per_minute=60)
+
+    assert bucket.reserve(60) == 0.0
+    assert bucket.available == 0
+
+    clock.now += 10
+    assert bucket.available == pytest.approx(10)
+
+    clock.now += 120
+    assert bucket.available == 60
+
+
+def test_token_bucket_reservation_waits_for_deficit(clock):
+    bucket = TokenBucket(per_minute=60)
+    bucket.reserve(60)
+
+    # Saldo negativo: cada reserva seguinte espera o tempo de reabastecer o déficit
+    assert bucket.reserve(5) == pytest.approx(5)
+    assert bucket.reserve(5) == pytest.approx(10)
+    # Reservas acima da capacidade são limitadas a ela
+    assert TokenBucket(per_minute=60).reserve(600) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_fair_queue_round_robin_between_users():
+    queue = FairQueue(capacity=1)
+    await queue.acquire("a")
+    served = []
+
+    async def call(user, name):
+        await queue.acquire(user)
+        served.append(name)
+
+    tasks = []
+    for user, name in [("a", "a2"), ("a", "a3"), ("b", "b1"), ("c", "c1")]:
+        tasks.append(asyncio.ensure_future(call(user, name)))
+        await asyncio.sleep(0)
+    assert queue.depth == 4
+    assert queue.users_waiting == 3
+
+    for _ in tasks:
+        queue.release()
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+
+    assert served == ["a2", "b1", "c1", "a3"]
+    assert queue.active == 1
+
+
+@pytest.mark.asyncio
+async def test_fair_queue_skips_cancelled_waiters():
+    queue = FairQueue(capacity=1)
+    await queue.acquire("a")
+    cancelled = asyncio.ensure_future(queue.acquire("b"))
+    waiting = asyncio.ensure_future(queue.acquire("c"))
+    await asyncio.sleep(0)
+
+    cancelled.cancel()
+    await asyncio.gather(cancelled, return_exceptions=True)
+    queue.release()
+    await waiting
+
+    assert queue.active == 1
+    assert queue.depth == 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_retries_transient_errors(retry_settings, sleeps):
+    scheduler = LLMScheduler()
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise _status_error(anthropic.InternalServerError, 500)
+        return "ok"
+
+    assert await scheduler.run(AIModelEnum.CLAUDE, "user", 10, call) == "ok"
+    assert len(attempts) == 3
+    assert len(sleeps) == 2
+    assert all(0 <= delay <= settings.LLM_BACKOFF_MAX_SECONDS for delay in sleeps)
+
+
+@pytest.mark.asyncio
+async def test_scheduler_honours_retry_after(retry_settings, sleeps):
+    scheduler = LLMScheduler()
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise _status_error(anthropic.RateLimitError, 429, {"retry-after": "7"})
+        return "ok"
+
+    assert await scheduler.run(AIModelEnum.CLAUDE, "user", 10, call) == "ok"
+    # O Retry-After é o mínimo da espera, acima do teto do backoff
+    assert sleeps[0] >= 7
+    # e o provedor fica pausado para as demais chamadas
+    assert scheduler.stats()["claude"]["paused_for_seconds"] > 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_gives_up_with_status_and_retry_after(retry_settings, sleeps):
+    scheduler = LLMScheduler()
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        raise _status_error(anthropic.RateLimitError, 429, {"retry-after-ms": "1500"})
+
+    with pytest.raises(LLMUnavailableError) as raised:
+        await scheduler.run(AIModelEnum.CLAUDE, "user", 10, call)
+
+    assert raised.value.status_code == 429
+    assert raised.value.retry_after == 1.5
+    assert len(attempts) == settings.LLM_MAX_RETRIES + 1
+    assert scheduler.stats()["claude"]["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_scheduler_does_not_retry_other_errors(retry_settings, sleeps):
+    scheduler = LLMScheduler()
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        raise _status_error(anthropic.BadRequestError, 400)
+
+    with pytest.raises(anthropic.BadRequestError):
+        await scheduler.run(AIModelEnum.CLAUDE, "user", 10, call)
+
+    assert len(attempts) == 1
+    assert sleeps == []
+    assert scheduler.stats()["claude"]["active"] == 0
@@ -0,0 +1,105 @@
+import io
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models import TableData
+from app.services import generation
+from app.services.data_loader import read_columnar_table, table_data_to_dataframe
+from app.services.dataset_registry import compute_dataset_id
+from app.services.profile_cache import CachedProfile, ProfileCache
+
+FRAME = pd.DataFrame({"genre": ["x", "y", "x", None], "rating": [1.0, 2.5, None, 4.0], "votes": [1, 2, 3, 4]})
+
+
+def _entry(rows: int = 10) -> CachedProfile:
+    return CachedProfile(description="perfil", sample_pool=FRAME.sample(rows, replace=True, random_state=1), total_rows=rows)
+
+
+def test_evicts_least_recently_used_entry():
+    cache = ProfileCache(max_entries=2, max_bytes=10 ** 9)
+    cache.put("a", _entry())
+    cache.put("b", _entry())
+    assert cache.get("a") is not None
+
+    cache.put("c", _entry())
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_bounded_by_bytes():
+    entry = _entry()
+    cache = ProfileCache(max_entries=100, max_bytes=entry.nbytes * 2 + 1)
+    for key in "abc":
+        cache.put(key, _entry())
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["bytes"] <= cache.max_bytes
+    assert cache.get("a") is None
+
+
+def test_oversized_entry_not_stored():
+    cache = ProfileCache(max_entries=10, max_bytes=100)
+    cache.put("grande", _entry(1000))
+
+    assert cache.get("grande") is None
+    assert cache.stats()["bytes"] == 0
+
+
+def test_replacing_entry_keeps_byte_count():
+    cache = ProfileCache(max_entries=10, max_bytes=10 ** 9)
+    cache.put("a", _entry(10))
+    cache.put("a", _entry(20))
+
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["bytes"] == _entry(20).nbytes
+
+
+def test_stats_hit_rate():
+    cache = ProfileCache(max_entries=10, max_bytes=10 ** 9)
+    cache.put("a", _entry())
+    cache.get("a")
+    cache.get("a")
+    cache.get("b")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 1)
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+
+
+def test_dataset_id_independent_of_transport():
+    table = TableData(columns=list(FRAME.columns), data=FRAME.astype(object).where(FRAME.notna(), None).values.tolist())
+    buffer = io.BytesIO()
+    FRAME.to_parquet(buffer, index=False)
+
+    from_json = table_data_to_dataframe(table)
+    from_parquet = read_columnar_table(buffer.getvalue())
+
+    assert compute_dataset_id(from_json) == compute_dataset_id(from_parquet) == compute_dataset_id(FRAME)
+    assert compute_dataset_id(FRAME) != compute_dataset_id(FRAME.iloc[::-1])
+
+
+def test_get_profile_reuses_cached_description(monkeypatch):
+    cache = ProfileCache(max_entries=10, max_bytes=10 ** 9)
+    calls = []
+    monkeypatch.setattr(generation, "profile_cache", cache)
+    monkeypatch.setattr(generation, "generate_data_description", lambda df: calls.append(df) or "descrição")
+    dataset_id = compute_dataset_id(FRAME)
+
+    first = generation.get_profile(FRAME, dataset_id)
+    second = generation.get_profile(FRAME.copy(), dataset_id)
+
+    assert second is first
+    assert len(calls) == 1
+    assert first.total_rows == len(FRAME)
+    assert cache.stats()["hits"] == 1
+
+
+def test_metrics_endpoint_reports_cache():
+    gauges = TestClient(app).get("/api/v1/metrics").json()["gauges"]
+
+    assert {"entries", "bytes", "hits", "misses", "evictions", "hit_rate"} <= set(gauges["profile_cache"])
@@ -0,0 +1,226 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.core.config import settings
+from app.services import profiler
+from app.services.profiler import (
+    compute_correlations, profile_dataframe, profile_numeric_columns, profile_numeric_columns_parallel,
+    profile_workers, render_profile, shm_block_bytes
+)
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(7)
+    rows = 2_000
+    base = rng.normal(size=rows)
+    df = pd.DataFrame({
+        "base": base,
+        "strong": base * 3 + rng.normal(scale=0.1, size=rows),
+        "inverse": -base + rng.normal(scale=0.5, size=rows),
+        "weak": base + rng.normal(scale=3, size=rows),
+        "noise": rng.normal(size=rows),
+        "constant": np.ones(rows),
+    })
+    # Nulos em posições diferentes por coluna: a exclusão tem de ser par a par
+    for column in ["base", "strong", "inverse", "weak"]:
+        df.loc[rng.choice(rows, 300, replace=False), column] = np.nan
+    return df
+
+
+def _pairs(result):
+    return {(pair.left, pair.right): pair.value for pair in result}
+
+
+def test_correlations_match_pandas_with_nans(frame):
+    columns = list(frame.columns)
+    result = compute_correlations(frame, columns, top_k=100, sample_rows=0)
+
+    expected = frame.corr()
+    values = _pairs(result)
+    for i, left in enumerate(columns):
+        for right in columns[i + 1:]:
+            exact = expected.loc[left, right]
+            if np.isnan(exact):
+                assert (left, right) not in values
+            else:
+                assert values[(left, right)] == pytest.approx(exact, abs=1e-9)
+
+
+def test_correlations_top_k_ordered_by_absolute_value(frame):
+    columns = list(frame.columns)
+    result = compute_correlations(frame, columns, top_k=3, sample_rows=0)
+
+    expected = frame.corr().where(np.triu(np.ones((len(columns), len(columns)), dtype=bool), k=1)).stack()
+    expected = expected.reindex(expected.abs().sort_values(ascending=False).index)[:3]
+    assert [(pair.left, pair.right) for pair in result] == list(expected.index)
+    assert [abs(pair.value) for pair in result] == sorted((abs(pair.value) for pair in result), reverse=True)
+    assert result[0].left == "base" and result[0].right == "strong"
+
+
+def test_correlations_sample_close_to_exact(frame):
+    columns = ["base", "strong", "inverse"]
+    result = compute_correlations(frame, columns, top_k=3, sample_rows=1_000)
+
+    expected = frame[columns].corr()
+    for (left, right), value in _pairs(result).items():
+        assert value == pytest.approx(expected.loc[left, right], abs=0.05)
+
+
+def test_correlations_without_enough_columns_or_rows(frame):
+    assert compute_correlations(frame, ["base"], top_k=5, sample_rows=0) == []
+    assert compute_correlations(frame.head(1), list(frame.columns), top_k=5, sample_rows=0) == []
+    assert compute_correlations(frame, list(frame.columns), top_k=0, sample_rows=0) == []
+
+
+@pytest.fixture
+def mixed():
+    return pd.DataFrame({
+        "ints": pd.Series([3, 1, 4, 1, 5], dtype="int64"),
+        "floats": [1.5, np.nan, 2.5, 4.0, np.nan],
+        "small": pd.Series([1, 2, 3, 4, 5], dtype="int8"),
+        "genre": ["a", "b", None, "a", "c"],
+        "kind": pd.Categorical(["x", "y", "x", "x", "y"]),
+        "duration": pd.to_timedelta([1, None, 3, 4, 5], unit="s"),
+        "when": pd.date_range("2024-01-01", periods=5),
+    })
+
+
+def test_profile_matches_pandas_statistics(mixed):
+    profile = profile_dataframe(mixed)
+
+    assert profile.rows == 5
+    assert profile.column_count == 7
+    assert profile.total_missing == int(mixed.isna().sum().sum())
+    numeric = {col.name: col for col in profile.numeric}
+    assert list(numeric) == ["ints", "floats", "small"]
+    for name, col in numeric.items():
+        series = mixed[name]
+        assert col.min == pytest.approx(series.min())
+        assert col.max == pytest.approx(series.max())
+        assert col.mean == pytest.approx(series.mean())
+        assert col.median == pytest.approx(series.median())
+        assert col.std == pytest.approx(series.std())
+        assert col.missing == series.isna().sum()
+    categorical = {col.name: (col.unique, col.missing) for col in profile.categorical}
+    assert categorical == {"genre": (3, 1), "kind": (2, 0)}
+
+
+def test_timedelta_columns_only_listed_in_types(mixed):
+    profile = profile_dataframe(mixed)
+    text = render_profile(profile)
+
+    assert "duration" not in {col.name for col in profile.numeric}
+    assert all("duration" not in (pair.left, pair.right) for pair in profile.correlations)
+    assert "- duration: timedelta64[ns]" in text
+    assert "-9.2" not in text
+
+
+def test_render_profile_matches_original_format(mixed):
+    text = render_profile(profile_dataframe(mixed[["ints", "genre"]]))
+
+    assert text.splitlines() == [
+        "O dataset contém 5 linhas e 2 colunas.",
+        "",
+        "Colunas e seus tipos de dados:",
+        "- ints: int64",
+        "- genre: object",
+        "",
+        "Colunas Numéricas:",
+        "- ints: min=1, max=5, média=2.80, mediana=3.0, desvio padrão=1.79, valores ausentes=0",
+        "",
+        "Colunas Categóricas:",
+        "- genre: 3 valores únicos, valores ausentes=1",
+        "",
+        "Resumo geral:",
+        "- Total de valores ausentes no dataset: 1",
+    ]
+
+
+def test_profile_of_all_null_numeric_column():
+    profile = profile_dataframe(pd.DataFrame({"empty": [np.nan, np.nan], "x": [1.0, 2.0]}))
+
+    empty = profile.numeric[0]
+    assert (empty.min, empty.max, empty.mean, empty.missing) == (None, None, None, 2)
+    assert "min=nan" in render_profile(profile)
+
+
+@pytest.fixture
+def wide():
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame(rng.normal(size=(300, 24)), columns=[f"f{i}" for i in range(24)])
+    df.loc[rng.choice(300, 40, replace=False), "f3"] = np.nan
+    for i in range(8):
+        df[f"i{i}"] = rng.integers(-50, 50, size=300)
+    return df
+
+
+def test_parallel_profile_matches_in_process(wide, monkeypatch):
+    monkeypatch.setattr(profiler, "_profile_executor", None)
+    null_counts = wide.isna().sum()
+    columns = list(wide.columns)
+
+    expected = profile_numeric_columns(wide, columns, null_counts)
+    # Blocos pequenos: várias cópias para memória compartilhada e fatias por worker
+    try:
+        parallel = profile_numeric_columns_parallel(wide, columns, null_counts, workers=2, block_bytes=300 * 8 * 5)
+    finally:
+        profiler._profile_executor.shutdown()
+
+    assert [col.name for col in parallel] == columns
+    for left, right in zip(parallel, expected):
+        assert left.dtype == right.dtype
+        assert left.missing == right.missing
+        for stat in ("min", "max", "mean", "median", "std"):
+            assert getattr(left, stat) == pytest.approx(getattr(right, stat))
+
+
+def test_profile_dataframe_uses_pool_above_threshold(wide, monkeypatch):
+    calls = []
+    monkeypatch.setattr(settings, "PROFILE_PARALLEL_MIN_COLUMNS", 10)
+    monkeypatch.setattr(profiler, "profile_workers", lambda: 2)
+    monkeypatch.setattr(profiler, "profile_numeric_columns_parallel", lambda *args: calls.append(args) or [])
+
+    profile_dataframe(wide)
+    assert len(calls) == 1
+
+    # Sem espaço em /dev/shm para uma coluna, o perfil é calculado no processo
+    monkeypatch.setattr(profiler, "shm_block_bytes", lambda: 8)
+    assert len(profile_dataframe(wide).numeric) == wide.shape[1]
+    assert len(calls) == 1
+
+
+def test_profile_workers_bounded_by_memory(monkeypatch):
+    monkeypatch.setattr(settings, "PROFILE_WORKERS", None)
+    monkeypatch.setattr(profiler.os, "sched_getaffinity", lambda pid: set(range(16)), raising=False)
+
+    monkeypatch.setattr(profiler, "_available_memory", lambda: 3 * profiler.WORKER_MEMORY_BYTES + 1)
+    assert profile_workers() == 3
+    monkeypatch.setattr(profiler, "_available_memory", lambda: 64 * profiler.WORKER_MEMORY_BYTES)
+    assert profile_workers() == 16
+    monkeypatch.setattr(profiler, "_available_memory", lambda: 0)
+    assert profile_workers() == 1
+    monkeypatch.setattr(profiler, "_available_memory", lambda: None)
+    assert profile_workers() == 1
+
+    monkeypatch.setattr(settings, "PROFILE_WORKERS", 5)
+    assert profile_workers() == 5
+
+
+def test_shm_block_bytes_bounded_by_free_space(monkeypatch):
+    class Stats:
+        f_bavail = 1000
+        f_frsize = 4096
+
+    monkeypatch.setattr(profiler.os, "statvfs", lambda path: Stats)
+    monkeypatch.setattr(settings, "PROFILE_SHM_BLOCK_BYTES", 10 ** 9)
+    assert shm_block_bytes() == 1000 * 4096 // 2
+
+    monkeypatch.setattr(settings, "PROFILE_SHM_BLOCK_BYTES", 1024)
+    assert shm_block_bytes() == 1024
+
+    def missing(path):
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(profiler.os, "statvfs", missing)
+    assert shm_block_bytes() == 0
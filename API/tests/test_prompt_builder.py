@@ -0,0 +1,102 @@
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+import pytest
+from app.core.config import settings
+from app.models import AIModelEnum
+from app.services.prompt_builder import (
+    DASHBOARD_INSTRUCTIONS, build_dashboard_prompt, estimate_tokens, token_budget_for, truncate_text_cells
+)
+
+
+@pytest.fixture
+def pool():
+    rng = np.random.default_rng(11)
+    rows = 2_000
+    return pd.DataFrame({
+        "id": np.arange(rows),
+        "genre": rng.choice(["drama", "comedy", "horror"], rows),
+        "rating": rng.normal(5, 2, rows).round(2),
+    }).sample(frac=1, random_state=3)
+
+
+@pytest.mark.parametrize("budget", [2_000, 3_000, 5_000])
+def test_prompt_fits_budget(pool, budget):
+    plan = build_dashboard_prompt("descrição", pool, len(pool), AIModelEnum.CLAUDE, token_budget=budget)
+
+    assert plan.estimated_tokens <= budget
+    assert plan.estimated_tokens == estimate_tokens(DASHBOARD_INSTRUCTIONS) + estimate_tokens(plan.prompt)
+    assert settings.PROMPT_MIN_SAMPLE_ROWS <= plan.sample_rows < len(pool)
+    assert plan.is_sample
+    assert "amostra do dataset completo" in plan.prompt
+
+
+def test_larger_budget_takes_more_rows(pool):
+    small = build_dashboard_prompt("descrição", pool, len(pool), AIModelEnum.CLAUDE, token_budget=2_000)
+    large = build_dashboard_prompt("descrição", pool, len(pool), AIModelEnum.CLAUDE, token_budget=5_000)
+
+    assert large.sample_rows > small.sample_rows
+    # Mais da metade do orçamento disponível é aproveitada
+    assert large.estimated_tokens > 2_500
+
+
+def test_whole_table_when_it_fits(pool):
+    small = pool.head(20)
+    plan = build_dashboard_prompt("descrição", small, len(small), AIModelEnum.CLAUDE, token_budget=100_000)
+
+    assert plan.sample_rows == 20
+    assert not plan.is_sample
+    assert "amostra" not in plan.prompt
+    # A amostra segue a ordem original das linhas
+    csv_ids = [int(line.split(",")[0]) for line in plan.prompt.split("```csv\n")[1].splitlines()[1:21]]
+    assert csv_ids == sorted(small["id"])
+
+
+def test_keeps_minimum_rows_when_description_exceeds_budget(pool):
+    plan = build_dashboard_prompt("x" * 50_000, pool, len(pool), AIModelEnum.CLAUDE, token_budget=1_000)
+
+    assert plan.sample_rows == settings.PROMPT_MIN_SAMPLE_ROWS
+
+
+def test_token_budget_per_model(monkeypatch):
+    monkeypatch.setattr(settings, "PROMPT_TOKEN_BUDGET_OPENAI", 111)
+    monkeypatch.setattr(settings, "PROMPT_TOKEN_BUDGET_CLAUDE", 222)
+
+    assert token_budget_for(AIModelEnum.OPENAI) == 111
+    assert token_budget_for(AIModelEnum.CLAUDE) == 222
+
+
+def test_truncate_long_text_cells():
+    df = pd.DataFrame({"text": ["curto", "x" * 30, None], "n": [1, 2, 3]})
+
+    result, truncated = truncate_text_cells(df, 10)
+
+    assert truncated == 1
+    assert result["text"].tolist() == ["curto", "x" * 9 + "…", None]
+    assert df["text"][1] == "x" * 30
+
+
+def test_truncate_ignores_non_string_values():
+    # Colunas object vindas de Parquet (decimais) ou JSON (booleanos com nulos)
+    df = pd.DataFrame({
+        "price": [Decimal("1.50"), Decimal("12345678901234.5"), None],
+        "flag": [True, None, False],
+        "mixed": [1, "y" * 20, 2.5],
+    })
+
+    result, truncated = truncate_text_cells(df, 10)
+
+    assert truncated == 1
+    assert result["price"].tolist() == df["price"].tolist()
+    assert result["flag"].tolist() == df["flag"].tolist()
+    assert result["mixed"].tolist() == [1, "y" * 9 + "…", 2.5]
+
+
+def test_truncate_returns_same_frame_without_long_cells():
+    df = pd.DataFrame({"text": ["a", "b"]})
+
+    result, truncated = truncate_text_cells(df, 10)
+
+    assert result is df
+    assert truncated == 0
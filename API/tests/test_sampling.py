@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.services.sampling import ReservoirSampler, StreamingSampler, representative_sample, sample_chunks
+
+
+def _frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "valor": rng.normal(size=rows),
+        "quantidade": rng.integers(0, 1_000, size=rows),
+        "categoria": rng.choice(["comum", "comum", "comum", "outra"], size=rows),
+        "identificador": [f"id-{i}" for i in range(rows)],
+    })
+    # Uma única linha da categoria rara
+    df.loc[rows // 2, "categoria"] = "rara"
+    return df
+
+
+def _required(df: pd.DataFrame) -> set:
+    labels = {df[col].idxmin() for col in ["valor", "quantidade"]}
+    labels |= {df[col].idxmax() for col in ["valor", "quantidade"]}
+    labels |= {df.index[df["categoria"] == "rara"][0]}
+    return labels
+
+
+@pytest.mark.parametrize("rows", [50, 1_000, 5_000])
+def test_prefix_contains_extremes_and_rare_categories(rows):
+    df = _frame(rows)
+    sample = representative_sample(df, 1_000)
+    required = _required(df)
+
+    assert len(sample) == min(rows, 1_000)
+    assert not sample.index.duplicated().any()
+    # Mesmo o menor prefixo usado no prompt traz os extremos e as categorias raras
+    assert required <= set(sample.head(len(required) + 2).index)
+    assert set(sample["categoria"].head(10)) == {"comum", "outra", "rara"}
+
+
+def test_small_dataset_returns_every_row():
+    df = _frame(200)
+    sample = representative_sample(df, 1_000)
+
+    assert sorted(sample.index) == list(df.index)
+    pd.testing.assert_frame_equal(sample.sort_index(), df)
+
+
+def test_sample_is_deterministic():
+    df = _frame(3_000)
+
+    pd.testing.assert_frame_equal(representative_sample(df, 100), representative_sample(df, 100))
+
+
+def test_reservoir_keeps_size_and_is_roughly_uniform():
+    counts = np.zeros(1_000)
+    for seed in range(200):
+        sampler = ReservoirSampler(50, seed=seed)
+        for start in range(0, 1_000, 137):
+            sampler.update(pd.DataFrame({"x": np.arange(start, min(start + 137, 1_000))}))
+        assert len(sampler.reservoir) == 50
+        counts[sampler.reservoir["x"].to_numpy()] += 1
+
+    # Cada linha tem probabilidade 50/1000 de estar no reservatório
+    assert counts[:500].mean() == pytest.approx(10, rel=0.1)
+    assert counts[500:].mean() == pytest.approx(10, rel=0.1)
+
+
+def test_streaming_sampler_keeps_extremes_and_strata():
+    df = _frame(20_000, seed=3)
+    chunks = [df.iloc[i:i + 3_000] for i in range(0, len(df), 3_000)]
+    sample = sample_chunks(chunks, 100)
+
+    assert len(sample) == 100
+    assert _required(df) <= set(sample.index)
+    assert sample.loc[df["valor"].idxmax(), "valor"] == df["valor"].max()
+    # Coluna de alta cardinalidade não é estratificada: não ocupa a amostra toda
+    assert sample["categoria"].nunique() == 3
+
+
+def test_streaming_sampler_small_input():
+    df = _frame(30)
+    sampler = StreamingSampler(100)
+    sampler.update(df.iloc[:10]).update(df.iloc[10:])
+
+    assert sorted(sampler.result()["identificador"]) == sorted(df["identificador"])
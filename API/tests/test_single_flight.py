@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+from app.services.single_flight import SingleFlight
+
+
+class SlowCall:
+    def __init__(self):
+        self.calls = 0
+        self.cancelled = False
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.calls += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        return "resposta"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    call = SlowCall()
+    callers = [asyncio.ensure_future(flight.do("key", call)) for _ in range(3)]
+    await asyncio.sleep(0)
+
+    assert flight.stats() == {"in_flight": 1, "waiters": 3}
+    call.release.set()
+
+    assert await asyncio.gather(*callers) == ["resposta"] * 3
+    assert call.calls == 1
+    assert flight.stats() == {"in_flight": 0, "waiters": 0}
+
+
+@pytest.mark.asyncio
+async def test_call_survives_while_a_caller_remains():
+    flight = SingleFlight()
+    call = SlowCall()
+    leaving = asyncio.ensure_future(flight.do("key", call))
+    staying = asyncio.ensure_future(flight.do("key", call))
+    await asyncio.sleep(0)
+
+    leaving.cancel()
+    await asyncio.gather(leaving, return_exceptions=True)
+    assert not call.cancelled
+
+    call.release.set()
+    assert await staying == "resposta"
+    assert call.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_call_cancelled_when_last_caller_leaves():
+    flight = SingleFlight()
+    call = SlowCall()
+    callers = [asyncio.ensure_future(flight.do("key", call)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    for caller in callers:
+        caller.cancel()
+    await asyncio.gather(*callers, return_exceptions=True)
+    await asyncio.sleep(0)
+
+    assert call.cancelled
+    assert flight.stats() == {"in_flight": 0, "waiters": 0}
+
+    # Uma nova chamada com a mesma chave não reaproveita a task cancelada
+    second = SlowCall()
+    second.release.set()
+    assert await flight.do("key", second) == "resposta"
+    assert second.calls == 1
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.services.sketches import MomentsSketch, KLLSketch, HyperLogLog
+
+
+@pytest.fixture
+def values():
+    rng = np.random.default_rng(42)
+    data = rng.lognormal(mean=3, sigma=1, size=50_000)
+    data[rng.choice(data.size, 500, replace=False)] = np.nan
+    return data
+
+
+def _chunks(data, size=7_000):
+    return [data[i:i + size] for i in range(0, data.size, size)]
+
+
+def test_moments_match_pandas(values):
+    sketch = MomentsSketch()
+    for chunk in _chunks(values):
+        sketch.update(chunk)
+
+    series = pd.Series(values)
+    assert sketch.count == series.count()
+    assert sketch.min == series.min()
+    assert sketch.max == series.max()
+    assert sketch.mean == pytest.approx(series.mean(), rel=1e-12)
+    assert sketch.std == pytest.approx(series.std(), rel=1e-10)
+
+
+def test_moments_merge_matches_single_pass(values):
+    left, right = MomentsSketch(), MomentsSketch()
+    left.update(values[:12_345])
+    right.update(values[12_345:])
+    left.merge(right)
+
+    series = pd.Series(values)
+    assert left.count == series.count()
+    assert left.mean == pytest.approx(series.mean(), rel=1e-12)
+    assert left.std == pytest.approx(series.std(), rel=1e-10)
+    assert (left.min, left.max) == (series.min(), series.max())
+
+
+def test_moments_merge_with_empty_sketch():
+    sketch = MomentsSketch()
+    sketch.update(np.array([1.0, 2.0, np.nan]))
+    sketch.merge(MomentsSketch())
+    empty = MomentsSketch().merge(sketch)
+
+    assert (empty.count, empty.mean, empty.min, empty.max) == (2, 1.5, 1.0, 2.0)
+    assert MomentsSketch().std is None
+
+
+def _rank_error(sorted_values, estimate, q):
+    rank = np.searchsorted(sorted_values, estimate, side="right") / sorted_values.size
+    return abs(rank - q)
+
+
+@pytest.mark.parametrize("q", [0.01, 0.25, 0.5, 0.75, 0.99])
+def test_kll_quantiles_within_rank_error(values, q):
+    sketch = KLLSketch(k=200, seed=0)
+    for chunk in _chunks(values):
+        sketch.update(chunk)
+
+    exact = np.sort(values[~np.isnan(values)])
+    assert sketch.n == exact.size
+    assert _rank_error(exact, sketch.quantile(q), q) < 0.02
+
+
+@pytest.mark.parametrize("q", [0.1, 0.5, 0.9])
+def test_kll_merge_within_rank_error(values, q):
+    parts = []
+    for seed, chunk in enumerate(_chunks(values, size=12_500)):
+        sketch = KLLSketch(k=200, seed=seed)
+        sketch.update(chunk)
+        parts.append(sketch)
+    merged = parts[0]
+    for sketch in parts[1:]:
+        merged.merge(sketch)
+
+    exact = np.sort(values[~np.isnan(values)])
+    assert merged.n == exact.size
+    assert _rank_error(exact, merged.quantile(q), q) < 0.02
+
+
+def test_kll_small_input_is_exact():
+    sketch = KLLSketch(k=200, seed=0)
+    sketch.update(np.array([5.0, 1.0, 3.0, np.nan]))
+
+    assert sketch.quantile(0.0) == 1.0
+    assert sketch.quantile(0.5) == 3.0
+    assert sketch.quantile(1.0) == 5.0
+    assert KLLSketch().quantile(0.5) is None
+
+
+@pytest.mark.parametrize("cardinality", [10, 1_000, 100_000])
+def test_hyperloglog_estimates_nunique(cardinality):
+    rng = np.random.default_rng(cardinality)
+    series = pd.Series(rng.integers(0, cardinality, size=200_000))
+    sketch = HyperLogLog(precision=14)
+    for chunk in _chunks(series.to_numpy(), size=30_000):
+        sketch.update(chunk)
+
+    assert sketch.estimate() == pytest.approx(series.nunique(), rel=0.03)
+
+
+def test_hyperloglog_merge_counts_union_once():
+    words = pd.Series([f"item-{i}" for i in range(60_000)])
+    left, right = HyperLogLog(), HyperLogLog()
+    left.update(words[:40_000].to_numpy())
+    right.update(words[20_000:].to_numpy())
+    left.merge(right)
+
+    assert left.estimate() == pytest.approx(words.nunique(), rel=0.03)
+
+
+def test_hyperloglog_merge_rejects_different_precision():
+    with pytest.raises(ValueError):
+        HyperLogLog(precision=12).merge(HyperLogLog(precision=14))
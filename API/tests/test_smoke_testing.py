@@ -0,0 +1,127 @@
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.main import app
+from app.models import AIModelEnum
+from app.services import smoke_testing
+from app.services.smoke_testing import SmokeTestUnavailableError, check_smoke_test_environment, smoke_test_dashboard
+from tests.fakes import install_fake_providers
+
+FRAME = pd.DataFrame({"genre": ["x", "y"], "rating": [1.0, 2.0]})
+
+
+@pytest.fixture(autouse=True)
+def unchecked_environment(monkeypatch):
+    monkeypatch.setattr(smoke_testing, "_environment_checked", False)
+    monkeypatch.setattr(smoke_testing, "_environment_error", None)
+
+
+@pytest.fixture
+def providers(monkeypatch, tmp_path):
+    return install_fake_providers(monkeypatch, tmp_path)
+
+
+def _streamlit_available() -> bool:
+    python = settings.SMOKE_TEST_PYTHON or sys.executable
+    return subprocess.run([python, "-c", "import streamlit"], capture_output=True).returncode == 0
+
+
+@pytest.mark.asyncio
+async def test_unknown_sandbox_user(monkeypatch):
+    monkeypatch.setattr(settings, "SMOKE_TEST_USER", "usuario-inexistente-autodash")
+
+    with pytest.raises(SmokeTestUnavailableError, match="SMOKE_TEST_USER inexistente"):
+        await check_smoke_test_environment()
+
+
+@pytest.mark.asyncio
+async def test_failed_check_is_remembered(monkeypatch):
+    calls = []
+
+    async def failing_check():
+        calls.append(1)
+        raise SmokeTestUnavailableError("sandbox indisponível")
+
+    monkeypatch.setattr(smoke_testing, "_check_environment", failing_check)
+    for _ in range(3):
+        with pytest.raises(SmokeTestUnavailableError):
+            await check_smoke_test_environment()
+    assert len(calls) == 1
+
+
+@pytest.mark.asyncio
+async def test_chown_without_root(monkeypatch):
+    def not_permitted(*args):
+        raise PermissionError(1, "Operation not permitted")
+
+    monkeypatch.setattr(settings, "SMOKE_TEST_USER", "nobody")
+    monkeypatch.setattr(smoke_testing.os, "chown", not_permitted)
+
+    with pytest.raises(SmokeTestUnavailableError, match="exige root"):
+        await check_smoke_test_environment()
+
+
+@pytest.mark.asyncio
+async def test_sandbox_that_cannot_start(monkeypatch):
+    # Como o unshare sem CAP_SYS_ADMIN: o processo termina sem o relatório do runner
+    monkeypatch.setattr(settings, "SMOKE_TEST_USER", None)
+    monkeypatch.setattr(settings, "SMOKE_TEST_ISOLATE_NETWORK", False)
+    monkeypatch.setattr(settings, "SMOKE_TEST_PYTHON", "false")
+
+    with pytest.raises(SmokeTestUnavailableError, match="CAP_SYS_ADMIN"):
+        await check_smoke_test_environment()
+
+
+def _unavailable(monkeypatch):
+    async def failing_check():
+        raise SmokeTestUnavailableError("Execução de teste indisponível: sem root")
+
+    monkeypatch.setattr(smoke_testing, "_check_environment", failing_check)
+
+
+def test_generation_returns_503_before_calling_the_model(monkeypatch, providers):
+    _unavailable(monkeypatch)
+    client = TestClient(app)
+
+    response = client.post("/api/v1/generate-dashboard", json={
+        "table_data": {"columns": list(FRAME.columns), "data": FRAME.values.tolist()},
+        "smoke_test": True,
+    })
+
+    assert response.status_code == 503
+    assert "indisponível" in response.json()["detail"]
+    assert providers.get(AIModelEnum.CLAUDE).calls == []
+
+
+def test_job_creation_returns_503(monkeypatch, providers):
+    _unavailable(monkeypatch)
+    client = TestClient(app)
+
+    response = client.post("/api/v1/generate-dashboard/jobs", json={
+        "table_data": {"columns": list(FRAME.columns), "data": FRAME.values.tolist()},
+        "smoke_test": True,
+    })
+
+    assert response.status_code == 503
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not _streamlit_available(), reason="streamlit não instalado em SMOKE_TEST_PYTHON")
+async def test_dashboard_execution_without_isolation(monkeypatch):
+    monkeypatch.setattr(settings, "SMOKE_TEST_USER", None)
+    monkeypatch.setattr(settings, "SMOKE_TEST_ISOLATE_NETWORK", False)
+
+    passed = await smoke_test_dashboard(
+        "import streamlit as st\nimport pandas as pd\nst.dataframe(pd.read_csv('data.csv'))", FRAME
+    )
+    failed = await smoke_test_dashboard(
+        "import streamlit as st\nimport pandas as pd\nst.write(pd.read_csv('data.csv')['inexistente'])", FRAME
+    )
+
+    assert passed.status == "passed"
+    assert failed.rejected
+    assert "KeyError" in failed.exceptions[0]
@@ -0,0 +1,50 @@
+import pytest
+from app.services.utils import DashboardCodeCleaner, clean_dashboard_code
+
+
+def reference_clean(code: str) -> str:
+    # Implementação original (não incremental) de clean_dashboard_code
+    lines = code.split('\n')
+    if lines and lines[0].strip().startswith('```python'):
+        lines = lines[1:]
+    if lines and lines[-1].strip() == '```':
+        lines = lines[:-1]
+    return '\n'.join(line for line in lines if line.strip())
+
+
+RESPONSES = [
+    "```python\nimport streamlit as st\n\nst.title('Vendas')\n```",
+    "```python\nimport streamlit as st\n\n\nst.title('Vendas')\n```\n",
+    "import streamlit as st\nst.title('Vendas')",
+    "  ```python  \nimport streamlit as st\n    st.write(1)\n   ```   ",
+    "```python\nst.markdown('''\n```\ncódigo\n```\n''')\n```",
+    "```python\n",
+    "```",
+    "",
+    "\n\n\n",
+    "st.write(1)\r\nst.write(2)\r\n",
+]
+
+
+@pytest.mark.parametrize("response", RESPONSES)
+def test_clean_dashboard_code_matches_reference(response):
+    assert clean_dashboard_code(response) == reference_clean(response)
+
+
+@pytest.mark.parametrize("response", RESPONSES)
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 50])
+def test_streaming_cleaner_matches_reference(response, chunk_size):
+    cleaner = DashboardCodeCleaner()
+    output = "".join(cleaner.feed(response[i:i + chunk_size]) for i in range(0, len(response), chunk_size))
+    output += cleaner.finish()
+
+    assert output == reference_clean(response)
+
+
+def test_streaming_cleaner_emits_only_complete_lines():
+    cleaner = DashboardCodeCleaner()
+
+    assert cleaner.feed("```python\nimport stream") == ""
+    assert cleaner.feed("lit as st\nst.ti") == "import streamlit as st"
+    assert cleaner.feed("tle('x')\n```") == "\nst.title('x')"
+    assert cleaner.finish() == ""